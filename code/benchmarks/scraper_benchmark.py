@@ -0,0 +1,308 @@
+import argparse
+import datetime
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import utilities
+from mock_wiki.mock_wiki_server import MockWikiServer
+from mock_wiki.wiki_corpus import WikiCorpus
+from networking.http_client import HttpClient
+from networking.rate_limiter import RateLimiter
+from parsers.parser_backend import build_parser_backend
+from planet_scraper import PlanetScraper
+from scrapers.concurrent_scraper import ConcurrentScraper
+from scrapers.planet_category_scraper import PlanetCategoryScraper
+from scrapers.planet_data_scraper import PlanetDataScraper
+from storage.planet_data_reader import PlanetDataReader
+
+BENCHMARKS = ["parse", "index", "end_to_end"]
+## The timings that are compared against a baseline, as paths into the results
+COMPARED_TIMINGS = {
+    "index": ["index", "seconds"],
+    "end_to_end": ["end_to_end", "seconds"]
+}
+## The mock wiki is local, so don't hold the scraper back, it's the scraper's own throughput that's being measured. Injected
+## errors still cost their retries, but they can't throttle the rest of the run.
+UNTHROTTLED_RATE_LIMIT = {
+    "rate_limit_requests_per_second": 10000,
+    "rate_limit_burst": 10000,
+    "rate_limit_min_requests_per_second": 1000
+}
+
+
+def _summarize_seconds(samples: list[float]) -> dict:
+    ordered = sorted(samples)
+
+    return {
+        "count": len(ordered),
+        "total_seconds": sum(ordered),
+        "mean_seconds": statistics.fmean(ordered),
+        "p50_seconds": ordered[len(ordered) // 2],
+        "p95_seconds": ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))],
+        "max_seconds": ordered[-1]
+    }
+
+
+def benchmark_parse(corpus: WikiCorpus, config: dict, parser_backend_names: list[str], partial_parse: bool) -> dict:
+    """
+    Times parsing and extracting every planet page in the corpus, for each parser backend
+    """
+
+    ## Render everything up front, so only the parse is timed
+    pages = {name: corpus.render_planet_page(name) for name in corpus.planets}
+
+    results = {}
+    for parser_backend_name in parser_backend_names:
+        planet_data_scraper = PlanetDataScraper(
+            config.get("required_properties", []),
+            config.get("vague_data_mappings", {}),
+            build_parser_backend(parser_backend_name, partial_parse),
+            None,
+            None
+        )
+
+        samples = []
+        built_count = 0
+        matching_count = 0
+        for name, content in pages.items():
+            start = time.perf_counter()
+            planet = planet_data_scraper.parse(name, content)
+            samples.append(time.perf_counter() - start)
+
+            if (planet is not None):
+                built_count += 1
+                matching_count += planet.to_dict() == corpus.planets[name]
+
+        results[parser_backend_name] = {
+            **_summarize_seconds(samples),
+            "pages_per_second": len(samples) / sum(samples),
+            "built_count": built_count,
+            "matching_count": matching_count
+        }
+        print(
+            f"parse ({parser_backend_name}): {results[parser_backend_name]['mean_seconds'] * 1000:.2f} ms/page, "
+            f"{matching_count} of {len(pages)} planets built correctly"
+        )
+
+    return results
+
+
+def benchmark_index(corpus: WikiCorpus, config: dict, parser_backend_name: str) -> dict:
+    """
+    Times building the planet index from the mock wiki's planet category
+    """
+
+    max_concurrent_scrapes = config.get("max_concurrent_scrapes", 1)
+
+    with MockWikiServer(corpus) as server:
+        planet_category_scraper = PlanetCategoryScraper(
+            server.root_url,
+            config.get("url_query_param_format_string", "?from={}"),
+            config.get("page_name_starts_with_blacklist", []),
+            build_parser_backend(parser_backend_name),
+            ConcurrentScraper(max_concurrent_scrapes, config.get("max_concurrent_scrapes_per_host", 1)),
+            HttpClient("PlanetScraperBenchmark", 30, max_concurrent_scrapes),
+            RateLimiter(
+                UNTHROTTLED_RATE_LIMIT["rate_limit_requests_per_second"],
+                UNTHROTTLED_RATE_LIMIT["rate_limit_burst"],
+                UNTHROTTLED_RATE_LIMIT["rate_limit_min_requests_per_second"],
+                30,
+                0.5,
+                1
+            )
+        )
+
+        start = time.perf_counter()
+        planet_index = planet_category_scraper.scrape(None, f"{server.root_url}/wiki/{WikiCorpus.CATEGORY_TITLE}")
+        seconds = time.perf_counter() - start
+        request_count = server.request_count
+
+    results = {
+        "seconds": seconds,
+        "request_count": request_count,
+        "planet_count": len(planet_index),
+        "missing_count": len(set(corpus.planets) - set(planet_index))
+    }
+    print(f"index: {seconds:.2f} seconds, {request_count} requests, {results['missing_count']} planets missing")
+
+    return results
+
+
+def benchmark_end_to_end(
+        corpus: WikiCorpus,
+        config: dict,
+        latency_seconds: float,
+        latency_jitter_seconds: float,
+        error_rate: float,
+        seed: int
+) -> dict:
+    """
+    Times a whole PlanetScraper run against the mock wiki, from building the index to storing the planets
+    """
+
+    mock_wiki_server = MockWikiServer(
+        corpus,
+        latency_seconds=latency_seconds,
+        latency_jitter_seconds=latency_jitter_seconds,
+        error_rate=error_rate,
+        seed=seed
+    )
+    with mock_wiki_server as server, tempfile.TemporaryDirectory() as directory:
+        run_config = {
+            **config,
+            **UNTHROTTLED_RATE_LIMIT,
+            "root_url": server.root_url,
+            "planet_category_url_path": f"/wiki/{WikiCorpus.CATEGORY_TITLE}",
+            "api_url_path": "/api.php",
+            "scrape_backend": "html",
+            "output_directory_path": directory,
+            "metrics_directory_path": directory,
+            "response_cache_enabled": False,
+            "incremental_refresh": False,
+            "compare_parser_backend": None,
+            ## Retry injected errors quickly, rather than waiting as long as a real server would need
+            "retry_base_delay_seconds": 0.1,
+            "retry_max_delay_seconds": 1,
+            "circuit_breaker_open_seconds": 1
+        }
+
+        start = time.perf_counter()
+        PlanetScraper(run_config).scrape()
+        seconds = time.perf_counter() - start
+
+        planet_data_path = (
+            Path(directory) /
+            f"{run_config.get('planet_data_json_name', 'planet_data')}.{run_config.get('planet_data_format', 'json')}"
+        )
+        planet_data = dict(PlanetDataReader(planet_data_path).iterate_dicts())
+        request_count = server.request_count
+        error_count = server.error_count
+
+    results = {
+        "seconds": seconds,
+        "planets_per_second": len(corpus) / seconds,
+        "request_count": request_count,
+        "injected_error_count": error_count,
+        "built_count": len(planet_data),
+        "matching_count": sum(planet == corpus.planets.get(name) for name, planet in planet_data.items()),
+        "latency_seconds": latency_seconds,
+        "latency_jitter_seconds": latency_jitter_seconds,
+        "error_rate": error_rate
+    }
+    print(
+        f"end_to_end: {seconds:.2f} seconds, {request_count} requests ({error_count} failed on purpose), "
+        f"{results['matching_count']} of {len(corpus)} planets built correctly"
+    )
+
+    return results
+
+
+def _get_timing(results: dict, path: list[str]) -> float:
+    for key in path:
+        if (not isinstance(results, dict) or key not in results):
+            return None
+        results = results[key]
+
+    return results
+
+
+def compare(results: dict, baseline: dict, max_regression: float) -> list[str]:
+    """
+    Compares the timings against a baseline run, and returns a description of each one that regressed by more than
+    max_regression (ex. 0.1 for 10%)
+    """
+
+    timing_paths = dict(COMPARED_TIMINGS)
+    for parser_backend_name in results.get("parse", {}):
+        timing_paths[f"parse ({parser_backend_name})"] = ["parse", parser_backend_name, "mean_seconds"]
+
+    regressions = []
+    for name, path in timing_paths.items():
+        seconds = _get_timing(results, path)
+        baseline_seconds = _get_timing(baseline, path)
+        if (seconds is None or not baseline_seconds):
+            continue
+
+        change = (seconds - baseline_seconds) / baseline_seconds
+        print(f"{name}: {baseline_seconds:.4f} -> {seconds:.4f} seconds ({change:+.1%})")
+        if (change > max_regression):
+            regressions.append(f"{name} regressed by {change:.1%}")
+
+    return regressions
+
+
+if (__name__ == "__main__"):
+    config = utilities.get_config()
+    output_directory_path = utilities.get_root_path() / config.get("output_directory_path", "out")
+
+    parser = argparse.ArgumentParser(description="Benchmarks the scraper offline, against a generated copy of the wiki")
+    parser.add_argument(
+        "--planet-data",
+        type=Path,
+        default=output_directory_path / "planet_data.json",
+        help="The planet data to generate the corpus from"
+    )
+    parser.add_argument("--scale", type=int, default=1, help="How many copies of each planet to put in the corpus")
+    parser.add_argument("--benchmarks", nargs="+", choices=BENCHMARKS, default=BENCHMARKS, help="The benchmarks to run")
+    parser.add_argument(
+        "--parser-backends",
+        nargs="+",
+        default=[config.get("parser_backend", "html.parser")],
+        help="The parser backends to benchmark parsing with"
+    )
+    parser.add_argument("--latency", type=float, default=0.01, help="Seconds that the mock wiki delays responses by")
+    parser.add_argument("--latency-jitter", type=float, default=0.01, help="Up to this many more seconds of random delay")
+    parser.add_argument("--error-rate", type=float, default=0.02, help="The share of mock wiki planet pages that fail")
+    parser.add_argument("--seed", type=int, default=0, help="Seeds the mock wiki's latency and errors")
+    parser.add_argument("--output", type=Path, default=None, help="Where to store the results")
+    parser.add_argument("--baseline", type=Path, default=None, help="Previous results to compare against")
+    parser.add_argument(
+        "--max-regression",
+        type=float,
+        default=0.1,
+        help="How much slower than the baseline a timing can get before failing (ex. 0.1 for 10%%)"
+    )
+    args = parser.parse_args()
+
+    corpus = WikiCorpus.generate(
+        (planet for _, planet in PlanetDataReader(args.planet_data).iterate_dicts()),
+        args.scale
+    )
+    started_at = datetime.datetime.now(datetime.timezone.utc)
+
+    results = {
+        "started_at": started_at.isoformat(),
+        "python_version": platform.python_version(),
+        "platform": platform.platform(),
+        "planet_count": len(corpus),
+        "scale": args.scale
+    }
+    if ("parse" in args.benchmarks):
+        results["parse"] = benchmark_parse(corpus, config, args.parser_backends, config.get("partial_parse", False))
+    if ("index" in args.benchmarks):
+        results["index"] = benchmark_index(corpus, config, args.parser_backends[0])
+    if ("end_to_end" in args.benchmarks):
+        results["end_to_end"] = benchmark_end_to_end(
+            corpus,
+            config,
+            args.latency,
+            args.latency_jitter,
+            args.error_rate,
+            args.seed
+        )
+
+    output_path = args.output or (
+        output_directory_path / "benchmarks" / f"scraper_benchmark_{started_at.strftime('%Y%m%d-%H%M%S')}.json"
+    )
+    utilities.store_json(results, output_path)
+    print(f"Stored benchmark results in: {output_path}")
+
+    if (args.baseline is not None):
+        regressions = compare(results, utilities.load_json(args.baseline), args.max_regression)
+        if (regressions):
+            print("\n".join(regressions))
+            sys.exit(1)
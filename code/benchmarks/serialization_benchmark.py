@@ -0,0 +1,84 @@
+import argparse
+import json
+import timeit
+from pathlib import Path
+from typing import Callable
+
+import utilities
+from extensions import fast_json
+from models.planet import Planet
+
+
+def _reflective_to_dict(planet: Planet) -> dict:
+    """
+    The original ToDict.to_dict, which reflects over the whole object every time it's called
+    """
+
+    output = {}
+
+    for member in dir(planet):
+        if (member.startswith("_")):
+            continue
+
+        attribute = getattr(planet, member)
+
+        if (callable(attribute)):
+            continue
+
+        output[member] = attribute
+
+    return output
+
+
+def _time(name: str, function: Callable, repeat: int, baseline_seconds: float = None) -> float:
+    ## Take the best of the runs, since anything slower is just noise from the rest of the system
+    seconds = min(timeit.repeat(function, number=1, repeat=repeat))
+    speedup = f"{baseline_seconds / seconds:.1f}x" if baseline_seconds is not None else "baseline"
+
+    print(f"{name:<40} {seconds * 1000:>10.2f} ms {speedup:>10}")
+
+    return seconds
+
+
+def run(planet_data_path: Path, repeat: int):
+    with open(planet_data_path, encoding="utf-8") as fd:
+        raw_planet_data = fd.read()
+
+    planet_data: dict[str, dict] = json.loads(raw_planet_data)
+    planets = [Planet(**planet) for planet in planet_data.values()]
+
+    ## The fast path has to give the exact same output as the reflective path it replaces
+    assert([planet.to_dict() for planet in planets] == [_reflective_to_dict(planet) for planet in planets])
+
+    print(f"Benchmarking {len(planets)} planets from {planet_data_path}, best of {repeat} runs")
+    print(f"orjson is {'installed' if fast_json.orjson is not None else 'not installed'}\n")
+
+    print("Planet.to_dict")
+    baseline = _time("reflective", lambda: [_reflective_to_dict(planet) for planet in planets], repeat)
+    _time("cached fields", lambda: [planet.to_dict() for planet in planets], repeat, baseline)
+
+    print("\nEncoding")
+    baseline = _time("json (indent=4)", lambda: json.dumps(planet_data, indent=4), repeat)
+    _time("json (compact)", lambda: json.dumps(planet_data, separators=(",", ":")), repeat, baseline)
+    _time("fast_json", lambda: fast_json.dumps(planet_data), repeat, baseline)
+    _time("fast_json (per planet, as ndjson)", lambda: [fast_json.dumps(planet) for planet in planet_data.values()], repeat, baseline)
+
+    print("\nDecoding")
+    baseline = _time("json", lambda: json.loads(raw_planet_data), repeat)
+    _time("fast_json", lambda: fast_json.loads(raw_planet_data), repeat, baseline)
+
+
+if (__name__ == "__main__"):
+    config = utilities.get_config()
+    default_path = (
+        utilities.get_root_path() /
+        config.get("output_directory_path", "out") /
+        f"{config.get('planet_data_json_name', 'planet_data')}.json"
+    )
+
+    parser = argparse.ArgumentParser(description="Benchmarks serializing and loading planet data")
+    parser.add_argument("--path", type=Path, default=default_path, help="The planet data (json) to benchmark with")
+    parser.add_argument("--repeat", type=int, default=5, help="How many times to run each benchmark")
+    args = parser.parse_args()
+
+    run(args.path, args.repeat)
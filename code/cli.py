@@ -0,0 +1,287 @@
+import argparse
+import sys
+from pathlib import Path
+
+import utilities
+from models.planet import LOCATION_FIELDS, NUMERIC_FIELDS
+
+## Each command imports what it needs when it runs, so short jobs (ex. a query) don't pay to import the scrapers,
+## parsers, or numpy at startup. Only the (light) planet fields are needed up front, to check the query's arguments.
+
+
+def _get_output_directory_path(config: dict) -> Path:
+    return utilities.get_root_path() / config.get("output_directory_path", "out")
+
+
+def _get_planet_data_path(config: dict) -> Path:
+    planet_data_name = config.get("planet_data_json_name", "planet_data")
+
+    return _get_output_directory_path(config) / f"{planet_data_name}.{config.get('planet_data_format', 'json')}"
+
+
+def _get_planet_database_path(config: dict) -> Path:
+    from storage.planet_database import PlanetDatabase
+
+    planet_database_name = config.get("planet_database_name", "planet_data")
+
+    return _get_output_directory_path(config) / f"{planet_database_name}{PlanetDatabase.SUFFIX}"
+
+
+def _is_planet_database(path: Path) -> bool:
+    if (path.suffix != ".sqlite3"):
+        return False
+
+    ## Connecting would otherwise create an empty database in its place
+    if (not path.exists()):
+        raise SystemExit(f"No planet database at: {path}")
+
+    return True
+
+
+def _parse_range(value: str) -> tuple[str, float, float]:
+    """
+    Parses a FIELD:MIN:MAX range, where either end can be left empty to leave it open (ex. radius_km:5000:)
+    """
+
+    try:
+        field, minimum, maximum = value.split(":")
+        parsed_range = (field, float(minimum) if minimum else None, float(maximum) if maximum else None)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Ranges must look like FIELD:MIN:MAX, not {value}")
+
+    if (field not in NUMERIC_FIELDS):
+        raise argparse.ArgumentTypeError(f"Unknown numeric field {field}, must be one of {', '.join(NUMERIC_FIELDS)}")
+
+    return parsed_range
+
+
+def run_index(config: dict, args: argparse.Namespace):
+    from planet_scraper import PlanetScraper
+
+    planet_index = PlanetScraper(config).build_index(refresh=not args.cached)
+    print(f"Indexed {len(planet_index)} planets")
+
+
+def run_scrape(config: dict, args: argparse.Namespace):
+    from planet_scraper import PlanetScraper
+
+    if (args.profile):
+        config["profiling_enabled"] = True
+    if (args.profile_sample_every is not None):
+        config["profiling_sample_every"] = args.profile_sample_every
+
+    PlanetScraper(config).scrape(args.resume)
+
+
+def run_export(config: dict, args: argparse.Namespace):
+    path = args.path or _get_planet_data_path(config)
+
+    if (args.format == "sqlite"):
+        from storage.planet_database import PlanetDatabase
+        from storage.planet_data_reader import PlanetDataReader
+
+        output_path = args.output or _get_planet_database_path(config)
+        count = PlanetDatabase(output_path).import_planets(PlanetDataReader(path).iterate_dicts())
+        print(f"Exported {count} planets to: {output_path}")
+        return
+
+    ## The planet database can be exported back out to the planet data (or csv) too
+    if (_is_planet_database(path)):
+        from storage.planet_database import PlanetDatabase
+
+        if (args.format not in ["csv", "json", "ndjson"]):
+            raise SystemExit(f"The planet database can only be exported to csv, json, or ndjson, not {args.format}")
+        if (args.output is None or args.output.suffix != f".{args.format}"):
+            raise SystemExit(f"Exporting to {args.format} needs an --output path ending in .{args.format}")
+
+        with PlanetDatabase(path) as planet_database:
+            count = planet_database.export(args.output, args.format, args.indent)
+        print(f"Exported {count} planets to: {args.output}")
+        return
+
+    if (args.format == "columnar"):
+        from storage.columnar_exporter import ColumnarExporter
+        from storage.planet_data_reader import PlanetDataReader
+
+        ## Stream the planets straight from the store, a catalog would build (and throw away) indexes on every field
+        output_path = args.output or _get_output_directory_path(config) / "planet_columns"
+        manifest = ColumnarExporter(output_path).export(PlanetDataReader(path))
+        print(f"Exported {manifest['row_count']} planets to: {output_path}")
+        return
+
+    if (args.format == "offsets"):
+        from storage.planet_offset_index import PlanetOffsetIndex
+
+        offset_index = PlanetOffsetIndex(path)
+        offsets = offset_index.build()
+        print(f"Indexed the offsets of {len(offsets['offsets'])} planets in: {offset_index.path}")
+        return
+
+    from storage.planet_data_converters import convert
+
+    if (args.output is None):
+        raise SystemExit(f"Exporting to {args.format} needs an --output path")
+    if (args.output.suffix != f".{args.format}"):
+        raise SystemExit(f"Exporting to {args.format} needs an --output path ending in .{args.format}")
+
+    count = convert(path, args.output, args.indent)
+    print(f"Exported {count} planets to: {args.output}")
+
+
+def run_query(config: dict, args: argparse.Namespace):
+    from extensions.fast_json import dumps
+
+    path = args.path or _get_planet_data_path(config)
+
+    def write_planets(planets: list[dict]):
+        if (args.count):
+            print(len(planets))
+            return
+
+        for planet in planets:
+            if (args.fields):
+                planet = {field: planet.get(field) for field in ["name", *args.fields]}
+            sys.stdout.write(dumps(planet) + "\n")
+
+    filtered = any([args.galaxy, args.cluster, args.system, args.range, args.missing])
+    ranges = {field: (minimum, maximum) for field, minimum, maximum in args.range}
+
+    ## The planet database can filter on its indexed columns without loading every planet
+    if (_is_planet_database(path)):
+        from storage.planet_database import PlanetDatabase
+
+        with PlanetDatabase(path) as planet_database:
+            if (args.name and not filtered):
+                planets = [planet for planet in map(planet_database.get_dict, args.name) if planet is not None]
+            else:
+                planets = planet_database.query(args.galaxy, args.cluster, args.system, **ranges)
+
+        if (args.missing):
+            planets = [planet for planet in planets if planet.get(args.missing) is None]
+        if (args.name and filtered):
+            names = set(args.name)
+            planets = [planet for planet in planets if planet["name"] in names]
+
+        write_planets(planets)
+        return
+
+    ## Looking up planets by name is best served by the offset index, which only has to read the planets asked for
+    if (args.name and not filtered):
+        from storage.planet_offset_index import PlanetOffsetReader, StaleOffsetIndexError
+
+        try:
+            with PlanetOffsetReader(path) as reader:
+                write_planets([planet for planet in map(reader.get_dict, args.name) if planet is not None])
+            return
+        except (FileNotFoundError, StaleOffsetIndexError):
+            pass
+
+    from query.planet_catalog import PlanetCatalog
+
+    catalog = PlanetCatalog.load(path)
+    planets = catalog.query(args.galaxy, args.cluster, args.system, **ranges)
+
+    if (args.missing):
+        missing_names = {planet.name for planet in catalog.find_missing(args.missing)}
+        planets = [planet for planet in planets if planet.name in missing_names]
+    if (args.name):
+        names = set(args.name)
+        planets = [planet for planet in planets if planet.name in names]
+
+    write_planets([planet.to_dict() for planet in planets])
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Scrapes planetary data from the Mass Effect wiki, and works with it")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    index_parser = subparsers.add_parser("index", help="Build the index of planets and their wiki pages")
+    index_parser.add_argument(
+        "--cached",
+        action="store_true",
+        help="Use the cached index if there is one, rather than listing the planet category again"
+    )
+    index_parser.set_defaults(run=run_index)
+
+    scrape_parser = subparsers.add_parser("scrape", help="Scrape every planet in the index into the planet data")
+    scrape_parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Resume an interrupted run from its journal, skipping finished planets and retrying failed ones"
+    )
+    scrape_parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="Profile the run, and store hotspot tables and memory reports in the output directory"
+    )
+    scrape_parser.add_argument(
+        "--profile-sample-every",
+        type=int,
+        default=None,
+        help="Only profile every Nth page, to keep the overhead down (overrides profiling_sample_every)"
+    )
+    scrape_parser.set_defaults(run=run_scrape)
+
+    export_parser = subparsers.add_parser("export", help="Export the planet data to another format")
+    export_parser.add_argument(
+        "--format",
+        choices=["csv", "json", "ndjson", "columnar", "offsets", "sqlite"],
+        required=True,
+        help=(
+            "csv, json, or ndjson files, memory-mappable NumPy columns, the offset index used for quick lookups, or the "
+            "SQLite planet database"
+        )
+    )
+    export_parser.add_argument(
+        "--path",
+        type=Path,
+        default=None,
+        help="The planet data to export (or a .sqlite3 planet database, to export it to csv, json, or ndjson)"
+    )
+    export_parser.add_argument("--output", type=Path, default=None, help="Where to export to")
+    export_parser.add_argument("--indent", type=int, default=None, help="The indent for json output (compact if left out)")
+    export_parser.set_defaults(run=run_export)
+
+    query_parser = subparsers.add_parser("query", help="Find planets in the planet data, printed as json lines")
+    query_parser.add_argument(
+        "--path",
+        type=Path,
+        default=None,
+        help="The planet data to query (or a .sqlite3 planet database)"
+    )
+    query_parser.add_argument("--name", nargs="+", default=None, help="Only these planets")
+    query_parser.add_argument("--galaxy", default=None, help="Only planets in this galaxy")
+    query_parser.add_argument("--cluster", default=None, help="Only planets in this cluster")
+    query_parser.add_argument("--system", default=None, help="Only planets in this system")
+    query_parser.add_argument(
+        "--range",
+        type=_parse_range,
+        action="append",
+        default=[],
+        metavar="FIELD:MIN:MAX",
+        help="Only planets with the numeric field in this range, either end of which can be left empty to leave it open"
+    )
+    query_parser.add_argument(
+        "--missing",
+        choices=[*LOCATION_FIELDS, *NUMERIC_FIELDS],
+        default=None,
+        metavar="FIELD",
+        help="Only planets that are missing this location or numeric field"
+    )
+    query_parser.add_argument("--fields", nargs="+", default=None, help="Only print these fields (along with the name)")
+    query_parser.add_argument("--count", action="store_true", help="Only print how many planets were found")
+    query_parser.set_defaults(run=run_query)
+
+    return parser
+
+
+def main(argv: list[str] = None):
+    args = build_parser().parse_args(argv)
+
+    ## The config is shared, so take a copy that the command can override
+    args.run(dict(utilities.get_config()), args)
+
+
+## Parse processes may re-import this module (ex. on Windows), so only run a command when it's run directly
+if (__name__ == "__main__"):
+    main()
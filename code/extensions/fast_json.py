@@ -0,0 +1,26 @@
+import json
+
+## orjson is optional, but much faster at both encoding and decoding when it's installed
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def dumps(data: any) -> str:
+    """
+    Encodes data as compact json. orjson always writes UTF-8 rather than escaping non-ASCII characters, so the standard
+    library does the same, and the output is the same either way.
+    """
+
+    if (orjson is not None):
+        return orjson.dumps(data).decode("utf-8")
+
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":"))
+
+
+def loads(data: str | bytes) -> any:
+    if (orjson is not None):
+        return orjson.loads(data)
+
+    return json.loads(data)
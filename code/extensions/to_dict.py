@@ -1,19 +1,43 @@
 from abc import ABC
+from operator import attrgetter
 
 
 class ToDict(ABC):
-    def to_dict(self) -> dict:
-        output = {}
+    """
+    Turns an object into a dict of its public, non-callable attributes. Finding those attributes means reflecting over
+    the whole class hierarchy, so it's only done once per class, and every object after that just reads its fields
+    straight off of the cached list.
+    """
+
+    ## Don't give slotted subclasses a __dict__ back
+    __slots__ = ()
+
+    ## Maps each class to its sorted field names, and a getter that reads all of them at once
+    _to_dict_fields: dict[type, tuple[tuple[str, ...], attrgetter]] = {}
 
-        for member in dir(self):
-            if (member.startswith("_")):
-                continue
+    @classmethod
+    def _build_to_dict_fields(cls, instance: "ToDict") -> tuple[tuple[str, ...], attrgetter]:
+        ## Attributes can be set in __init__ without being declared on the class, so reflect over an actual instance
+        field_names = tuple(
+            member for member in dir(instance)
+            if not member.startswith("_") and not callable(getattr(instance, member))
+        )
 
-            attribute = getattr(self, member)
+        ## attrgetter hands back a bare value (rather than a tuple) when it's given a single name
+        if (len(field_names) == 1):
+            getter = lambda instance, getter=attrgetter(field_names[0]): (getter(instance),)
+        else:
+            getter = attrgetter(*field_names) if field_names else (lambda instance: ())
 
-            if (callable(attribute)):
-                continue
+        return (field_names, getter)
+
+
+    def to_dict(self) -> dict:
+        fields = ToDict._to_dict_fields.get(type(self))
+        if (fields is None):
+            fields = self._build_to_dict_fields(self)
+            ToDict._to_dict_fields[type(self)] = fields
 
-            output[member] = attribute
+        field_names, getter = fields
 
-        return output
+        return dict(zip(field_names, getter(self)))
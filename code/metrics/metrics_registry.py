@@ -0,0 +1,276 @@
+import bisect
+import math
+import os
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator
+
+import utilities
+
+## Histogram bucket upper bounds, for durations and for sizes
+SECONDS_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+BYTES_BUCKETS = (1024, 4096, 16384, 65536, 131072, 262144, 524288, 1048576, 4194304)
+
+
+class Histogram:
+    """
+    Counts observations into cumulative buckets (just like a Prometheus histogram), along with their count and sum
+    """
+
+    __slots__ = ("buckets", "bucket_counts", "count", "sum", "max")
+
+    def __init__(self, buckets: tuple[float]):
+        self.buckets = buckets
+        ## The last count is for the implicit +Inf bucket
+        self.bucket_counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+
+    def observe(self, value: float):
+        self.bucket_counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+        self.max = max(self.max, value)
+
+
+    def merge(self, other: "Histogram"):
+        for index, count in enumerate(other.bucket_counts):
+            self.bucket_counts[index] += count
+        self.count += other.count
+        self.sum += other.sum
+        self.max = max(self.max, other.max)
+
+
+    def get_quantile(self, quantile: float) -> float:
+        """
+        Estimates the quantile as the upper bound of the bucket it falls in (or the max, if that's closer)
+        """
+
+        if (self.count == 0):
+            return None
+
+        rank = quantile * self.count
+        cumulative_count = 0
+        for index, count in enumerate(self.bucket_counts):
+            cumulative_count += count
+            if (cumulative_count >= rank):
+                return min(self.max, self.buckets[index]) if index < len(self.buckets) else self.max
+
+        return self.max
+
+
+class MetricsRegistry:
+    """
+    Thread safe store of the counters, gauges, and histograms recorded over a run, keyed by their name and labels. It's
+    handed to each part of the scraper that owns a stage (fetching, cooling down, parsing, storing, etc.), and exported
+    as a Prometheus textfile (for node_exporter's textfile collector) and a JSON run summary once the run is done.
+    """
+
+    def __init__(self, namespace: str = "planet_scraper"):
+        self.namespace = namespace
+
+        self._counters: dict[tuple[str, tuple], float] = {}
+        self._gauges: dict[tuple[str, tuple], float] = {}
+        self._histograms: dict[tuple[str, tuple], Histogram] = {}
+        self._lock = threading.Lock()
+
+
+    def _get_key(self, name: str, labels: dict[str, str]) -> tuple[str, tuple]:
+        return (name, tuple(sorted(labels.items())) if labels else ())
+
+
+    def increment(self, name: str, value: float = 1, labels: dict[str, str] = None):
+        key = self._get_key(name, labels)
+
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+
+    def set_gauge(self, name: str, value: float, labels: dict[str, str] = None):
+        key = self._get_key(name, labels)
+
+        with self._lock:
+            self._gauges[key] = value
+
+
+    def observe(self, name: str, value: float, labels: dict[str, str] = None, buckets: tuple[float] = SECONDS_BUCKETS):
+        key = self._get_key(name, labels)
+
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if (histogram is None):
+                histogram = self._histograms[key] = Histogram(buckets)
+
+            histogram.observe(value)
+
+
+    @contextmanager
+    def time(self, name: str, labels: dict[str, str] = None) -> Iterator[None]:
+        """
+        Observes how many seconds the body of the with statement took
+        """
+
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start, labels)
+
+
+    def get_counter(self, name: str, labels: dict[str, str] = None) -> float:
+        with self._lock:
+            return self._counters.get(self._get_key(name, labels), 0)
+
+
+    def get_histogram_sum(self, name: str) -> float:
+        """
+        Gets the total of every observation of the histogram, across all of its labels
+        """
+
+        with self._lock:
+            return sum(
+                histogram.sum for (histogram_name, _), histogram in self._histograms.items() if histogram_name == name
+            )
+
+
+    def drain(self) -> dict:
+        """
+        Hands back everything recorded so far and starts over, so that metrics recorded in another process can be
+        shipped back and merged into the main registry
+        """
+
+        with self._lock:
+            snapshot = {"counters": self._counters, "gauges": self._gauges, "histograms": self._histograms}
+            self._counters = {}
+            self._gauges = {}
+            self._histograms = {}
+
+        return snapshot
+
+
+    def merge(self, snapshot: dict):
+        with self._lock:
+            for key, value in snapshot["counters"].items():
+                self._counters[key] = self._counters.get(key, 0) + value
+
+            self._gauges.update(snapshot["gauges"])
+
+            for key, other in snapshot["histograms"].items():
+                histogram = self._histograms.get(key)
+                if (histogram is None):
+                    histogram = self._histograms[key] = Histogram(other.buckets)
+
+                histogram.merge(other)
+
+    ## Exporting
+
+    def _format_series(self, name: str, labels: tuple, extra_labels: tuple = ()) -> str:
+        all_labels = labels + extra_labels
+        if (not all_labels):
+            return f"{self.namespace}_{name}"
+
+        formatted_labels = ",".join(f'{label}="{self._escape_label_value(value)}"' for label, value in all_labels)
+
+        return f"{self.namespace}_{name}{{{formatted_labels}}}"
+
+
+    def _escape_label_value(self, value: any) -> str:
+        return str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+
+    def _format_value(self, value: float) -> str:
+        if (math.isinf(value)):
+            return "+Inf" if value > 0 else "-Inf"
+
+        return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+    def build_prometheus_text(self) -> str:
+        with self._lock:
+            counters = sorted(self._counters.items())
+            gauges = sorted(self._gauges.items())
+            histograms = sorted(self._histograms.items(), key=lambda item: item[0])
+
+        lines = []
+        typed_names = set()
+
+        def add_type(name: str, metric_type: str):
+            if (name not in typed_names):
+                typed_names.add(name)
+                lines.append(f"# TYPE {self.namespace}_{name} {metric_type}")
+
+        for (name, labels), value in counters:
+            add_type(name, "counter")
+            lines.append(f"{self._format_series(name, labels)} {self._format_value(value)}")
+
+        for (name, labels), value in gauges:
+            add_type(name, "gauge")
+            lines.append(f"{self._format_series(name, labels)} {self._format_value(value)}")
+
+        for (name, labels), histogram in histograms:
+            add_type(name, "histogram")
+
+            cumulative_count = 0
+            for bucket, count in zip(histogram.buckets + (math.inf,), histogram.bucket_counts):
+                cumulative_count += count
+                series = self._format_series(f"{name}_bucket", labels, (("le", self._format_value(bucket)),))
+                lines.append(f"{series} {cumulative_count}")
+
+            lines.append(f"{self._format_series(f'{name}_sum', labels)} {self._format_value(histogram.sum)}")
+            lines.append(f"{self._format_series(f'{name}_count', labels)} {histogram.count}")
+
+        return "\n".join(lines) + "\n"
+
+
+    def write_prometheus(self, path: Path):
+        """
+        Writes the metrics out in the Prometheus text format. The file is swapped in whole, so the textfile collector
+        never reads a half written file.
+        """
+
+        path.parent.mkdir(parents=True, exist_ok=True)
+        temporary_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        with open(temporary_path, "w", encoding="utf-8") as fd:
+            fd.write(self.build_prometheus_text())
+        os.replace(temporary_path, path)
+
+
+    def build_summary(self) -> dict:
+        """
+        Summarizes the metrics into a dict, keyed by each series' name (and labels, Prometheus style)
+        """
+
+        with self._lock:
+            counters = sorted(self._counters.items())
+            gauges = sorted(self._gauges.items())
+            histograms = sorted(self._histograms.items(), key=lambda item: item[0])
+
+        def format_key(name: str, labels: tuple) -> str:
+            if (not labels):
+                return name
+
+            return f"{name}{{{','.join(f'{label}={value}' for label, value in labels)}}}"
+
+        return {
+            "counters": {format_key(name, labels): value for (name, labels), value in counters},
+            "gauges": {format_key(name, labels): value for (name, labels), value in gauges},
+            "histograms": {
+                format_key(name, labels): {
+                    "count": histogram.count,
+                    "sum": histogram.sum,
+                    "mean": histogram.sum / histogram.count if histogram.count else None,
+                    "p50": histogram.get_quantile(0.5),
+                    "p95": histogram.get_quantile(0.95),
+                    "max": histogram.max
+                }
+                for (name, labels), histogram in histograms
+            }
+        }
+
+
+    def write_summary(self, path: Path, extra: dict = None):
+        utilities.store_json({**(extra or {}), **self.build_summary()}, path)
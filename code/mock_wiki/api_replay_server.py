@@ -0,0 +1,150 @@
+import argparse
+import hashlib
+import json
+import logging
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib import request
+from urllib.parse import urlsplit, parse_qsl, urlencode
+
+import utilities
+
+
+class ApiReplayServer:
+    """
+    Local stand-in for the wiki's api.php, which replays recorded responses keyed by their query params. When an upstream
+    API url is provided, any request without a recording is forwarded upstream, and the response is recorded for next
+    time.
+
+    Run it from the code directory with: python -m mock_wiki.api_replay_server <recordings directory>
+    """
+
+    def __init__(
+            self,
+            recordings_directory_path: Path,
+            host: str = "127.0.0.1",
+            port: int = 0,
+            upstream_api_url: str = None
+    ):
+        self.logger = utilities.initialize_logging(logging.getLogger(__name__))
+
+        self.recordings_directory_path = recordings_directory_path
+        self.upstream_api_url = upstream_api_url
+        self.recordings_directory_path.mkdir(parents=True, exist_ok=True)
+
+        replay_server = self
+
+        class ApiReplayRequestHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                replay_server._handle(self)
+
+            def log_message(self, format: str, *args):
+                replay_server.logger.debug(format % args)
+
+        self._http_server = ThreadingHTTPServer((host, port), ApiReplayRequestHandler)
+        self._thread: threading.Thread = None
+
+    ## Properties
+
+    @property
+    def root_url(self) -> str:
+        host, port = self._http_server.server_address[:2]
+        return f"http://{host}:{port}"
+
+
+    @property
+    def api_url(self) -> str:
+        return f"{self.root_url}/api.php"
+
+    ## Methods
+
+    def _get_recording_path(self, query_params: list[tuple[str, str]]) -> Path:
+        canonical_query = urlencode(sorted(query_params))
+
+        return self.recordings_directory_path / f"{hashlib.sha256(canonical_query.encode('utf-8')).hexdigest()}.json"
+
+
+    def _record(self, query_params: list[tuple[str, str]]) -> dict:
+        upstream_url = f"{self.upstream_api_url}?{urlencode(query_params)}"
+        with request.urlopen(upstream_url) as response:
+            recording = {"query_params": query_params, "response": json.loads(response.read())}
+
+        utilities.store_json(recording, self._get_recording_path(query_params))
+        self.logger.info(f"Recorded response for: {upstream_url}")
+
+        return recording
+
+
+    def _handle(self, handler: BaseHTTPRequestHandler):
+        split_url = urlsplit(handler.path)
+        if (split_url.path != "/api.php"):
+            handler.send_error(404)
+            return
+
+        query_params = parse_qsl(split_url.query, keep_blank_values=True)
+        try:
+            recording = utilities.load_json(self._get_recording_path(query_params))
+        except FileNotFoundError:
+            if (self.upstream_api_url is None):
+                self.logger.warning(f"No recording for: {handler.path}")
+                handler.send_error(404, "No recording for this query")
+                return
+
+            recording = self._record(query_params)
+
+        body = json.dumps(recording["response"]).encode("utf-8")
+        handler.send_response(200)
+        handler.send_header("Content-Type", "application/json; charset=utf-8")
+        handler.send_header("Content-Length", str(len(body)))
+        handler.end_headers()
+        handler.wfile.write(body)
+
+
+    def start(self):
+        """
+        Serves in the background until stopped
+        """
+
+        self._thread = threading.Thread(target=self._http_server.serve_forever, name="api-replay-server", daemon=True)
+        self._thread.start()
+        self.logger.info(f"Replaying API responses at: {self.api_url}")
+
+        return self
+
+
+    def stop(self):
+        self._http_server.shutdown()
+        self._http_server.server_close()
+        if (self._thread is not None):
+            self._thread.join()
+
+
+    def __enter__(self):
+        return self.start()
+
+
+    def __exit__(self, exception_type, exception, traceback):
+        self.stop()
+
+
+if (__name__ == "__main__"):
+    parser = argparse.ArgumentParser(description="Replays recorded MediaWiki API responses from a local server")
+    parser.add_argument("recordings_directory_path", type=Path, help="Directory holding the recorded responses")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument(
+        "--upstream",
+        dest="upstream_api_url",
+        help="Real api.php url to forward (and record) any requests that haven't been recorded yet"
+    )
+    args = parser.parse_args()
+
+    with ApiReplayServer(args.recordings_directory_path, args.host, args.port, args.upstream_api_url) as server:
+        print(f"Point root_url at {server.root_url} to scrape through the replay server, Ctrl-C to stop")
+        try:
+            while (True):
+                time.sleep(1)
+        except KeyboardInterrupt:
+            pass
@@ -0,0 +1,248 @@
+import argparse
+import json
+import logging
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import urlsplit, parse_qs
+
+import utilities
+from mock_wiki.wiki_corpus import WikiCorpus
+
+
+class MockWikiServer:
+    """
+    Local stand-in for the wiki, which serves a WikiCorpus's planet and category pages (along with page and revision
+    queries to api.php) so the scraper can be run end to end without touching the real site. Every response can be
+    delayed to simulate latency, and a share of the planet pages can fail with an error status to exercise retries and
+    backoff. Only planet pages fail by default, as they're the only requests the scraper retries (a failed index is
+    given up on).
+
+    Run it from the code directory with: python -m mock_wiki.mock_wiki_server
+    """
+
+    def __init__(
+            self,
+            corpus: WikiCorpus,
+            host: str = "127.0.0.1",
+            port: int = 0,
+            latency_seconds: float = 0,
+            latency_jitter_seconds: float = 0,
+            error_rate: float = 0,
+            error_status_code: int = 503,
+            retry_after_seconds: int = None,
+            fail_planet_pages_only: bool = True,
+            seed: int = None
+    ):
+        self.logger = utilities.initialize_logging(logging.getLogger(__name__))
+
+        assert(latency_seconds >= 0)
+        assert(latency_jitter_seconds >= 0)
+        assert(0 <= error_rate <= 1)
+
+        self.corpus = corpus
+        self.latency_seconds = latency_seconds
+        self.latency_jitter_seconds = latency_jitter_seconds
+        self.error_rate = error_rate
+        self.error_status_code = error_status_code
+        self.retry_after_seconds = retry_after_seconds
+        self.fail_planet_pages_only = fail_planet_pages_only
+
+        self._random = random.Random(seed)
+        self._request_count = 0
+        self._error_count = 0
+        self._lock = threading.Lock()
+
+        mock_wiki_server = self
+
+        class MockWikiRequestHandler(BaseHTTPRequestHandler):
+            ## Keep connections alive, just like the real wiki
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                mock_wiki_server._handle(self)
+
+            def log_message(self, format: str, *args):
+                mock_wiki_server.logger.debug(format % args)
+
+        self._http_server = ThreadingHTTPServer((host, port), MockWikiRequestHandler)
+        self._http_server.daemon_threads = True
+        self._thread: threading.Thread = None
+
+    ## Properties
+
+    @property
+    def root_url(self) -> str:
+        host, port = self._http_server.server_address[:2]
+        return f"http://{host}:{port}"
+
+
+    @property
+    def api_url(self) -> str:
+        return f"{self.root_url}/api.php"
+
+
+    @property
+    def request_count(self) -> int:
+        return self._request_count
+
+
+    @property
+    def error_count(self) -> int:
+        return self._error_count
+
+    ## Methods
+
+    def _send(self, handler: BaseHTTPRequestHandler, status_code: int, content_type: str, body: bytes, headers: dict = None):
+        handler.send_response(status_code)
+        handler.send_header("Content-Type", content_type)
+        handler.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            handler.send_header(name, value)
+        handler.end_headers()
+        handler.wfile.write(body)
+
+
+    def _render_revisions(self, query: dict[str, list[str]]) -> bytes:
+        titles = query.get("titles", [""])[0].split("|")
+        pages = []
+        for title in titles:
+            revision_id = self.corpus.get_revision_id(title)
+            if (revision_id is None):
+                pages.append({"title": title, "missing": True})
+            else:
+                pages.append({"title": title, "revisions": [{"revid": revision_id, "timestamp": "2020-01-01T00:00:00Z"}]})
+
+        return json.dumps({"batchcomplete": True, "query": {"pages": pages}}).encode("utf-8")
+
+
+    def _render_pages(self, query: dict[str, list[str]]) -> bytes:
+        ## The corpus doesn't have any redirects, so every page just resolves to itself
+        titles = query.get("titles", [""])[0].split("|")
+        pages = [
+            {"title": title} if self.corpus.get_revision_id(title) is not None else {"title": title, "missing": True}
+            for title in titles
+        ]
+
+        return json.dumps({"batchcomplete": True, "query": {"pages": pages}}).encode("utf-8")
+
+
+    def _handle(self, handler: BaseHTTPRequestHandler):
+        split_url = urlsplit(handler.path)
+        query = parse_qs(split_url.query)
+        title = self.corpus.get_page_title(split_url.path) if split_url.path != "/api.php" else None
+        can_fail = not self.fail_planet_pages_only or (title is not None and title != WikiCorpus.CATEGORY_TITLE)
+
+        with self._lock:
+            self._request_count += 1
+            latency_seconds = self.latency_seconds + self._random.uniform(0, self.latency_jitter_seconds)
+            failed = can_fail and self._random.random() < self.error_rate
+            if (failed):
+                self._error_count += 1
+
+        if (latency_seconds > 0):
+            time.sleep(latency_seconds)
+
+        if (failed):
+            headers = {"Retry-After": str(self.retry_after_seconds)} if self.retry_after_seconds is not None else {}
+            self._send(handler, self.error_status_code, "text/plain", b"Injected error", headers)
+            return
+
+        if (split_url.path == "/api.php"):
+            if (query.get("prop") is None):
+                self._send(handler, 200, "application/json; charset=utf-8", self._render_pages(query))
+                return
+            if (query.get("prop") != ["revisions"]):
+                self._send(handler, 400, "text/plain", b"Only page and revision queries are supported")
+                return
+
+            self._send(handler, 200, "application/json; charset=utf-8", self._render_revisions(query))
+            return
+
+        if (title == WikiCorpus.CATEGORY_TITLE):
+            body = self.corpus.render_category_page(query.get("from", [""])[0])
+        else:
+            body = self.corpus.render_planet_page(title)
+
+        if (body is None):
+            self._send(handler, 404, "text/plain", b"No such page")
+            return
+
+        self._send(handler, 200, "text/html; charset=utf-8", body)
+
+
+    def start(self):
+        """
+        Serves in the background until stopped
+        """
+
+        self._thread = threading.Thread(target=self._http_server.serve_forever, name="mock-wiki-server", daemon=True)
+        self._thread.start()
+        self.logger.info(f"Serving {len(self.corpus)} planets at: {self.root_url}")
+
+        return self
+
+
+    def stop(self):
+        self._http_server.shutdown()
+        self._http_server.server_close()
+        if (self._thread is not None):
+            self._thread.join()
+
+
+    def __enter__(self):
+        return self.start()
+
+
+    def __exit__(self, exception_type, exception, traceback):
+        self.stop()
+
+
+if (__name__ == "__main__"):
+    config = utilities.get_config()
+
+    parser = argparse.ArgumentParser(description="Serves a generated copy of the wiki's planet pages from a local server")
+    parser.add_argument(
+        "--planet-data",
+        type=Path,
+        default=utilities.get_root_path() / config.get("output_directory_path", "out") / "planet_data.json",
+        help="The planet data to generate the pages from"
+    )
+    parser.add_argument("--scale", type=int, default=1, help="How many copies of each planet to serve")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--latency", type=float, default=0, help="Seconds to delay every response by")
+    parser.add_argument("--latency-jitter", type=float, default=0, help="Up to this many more seconds of random delay")
+    parser.add_argument("--error-rate", type=float, default=0, help="The share of planet pages that fail (0 to 1)")
+    parser.add_argument(
+        "--fail-all-pages",
+        action="store_true",
+        help="Let the category pages and the API fail too, not just the planet pages"
+    )
+    parser.add_argument("--error-status", type=int, default=503, help="The status code that failed responses get")
+    parser.add_argument("--retry-after", type=int, default=None, help="The Retry-After that failed responses get")
+    args = parser.parse_args()
+
+    from storage.planet_data_reader import PlanetDataReader
+    corpus = WikiCorpus.generate((planet for _, planet in PlanetDataReader(args.planet_data).iterate_dicts()), args.scale)
+
+    mock_wiki_server = MockWikiServer(
+        corpus,
+        args.host,
+        args.port,
+        args.latency,
+        args.latency_jitter,
+        args.error_rate,
+        args.error_status,
+        args.retry_after,
+        not args.fail_all_pages
+    )
+    with mock_wiki_server as server:
+        print(f"Point root_url at {server.root_url} to scrape the mock wiki, Ctrl-C to stop")
+        try:
+            while (True):
+                time.sleep(1)
+        except KeyboardInterrupt:
+            pass
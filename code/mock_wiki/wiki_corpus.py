@@ -0,0 +1,174 @@
+import html
+import zlib
+from typing import Iterable
+from urllib.parse import quote, unquote
+
+
+class WikiCorpus:
+    """
+    Generates a corpus of wiki pages from planet data, laid out just like the real wiki's pages: a planet page for every
+    planet (with its infobox, location, and sections), and the paginated planet category that lists them all. Since
+    the pages are built from known planets, anything scraped from them can be checked against what went in.
+    """
+
+    ## Maps each numeric planet field to its infobox data-source, and how the wiki formats it
+    INFOBOX_FIELDS = {
+        "orbital_distance_au": ("orbitaldistance", "{} AU"),
+        "orbital_period_years": ("orbitalperiod", "{} Earth Years"),
+        "keplerian_ratio": ("kepler", "{}"),
+        "radius_km": ("radius", "{} km"),
+        "day_length_earth_hours": ("daylength", "{} Earth Hours"),
+        "atmospheric_pressure": ("atmpressure", "{} atm"),
+        "surface_temperature_celcius": ("surfacetemp", "{} °C"),
+        "surface_gravity_g": ("surfacegrav", "{} g"),
+        "mass_earth_masses": ("mass", "{} Earth Masses"),
+        "satellite_count": ("satellites", "{}")
+    }
+    ## Maps each text planet field to the header of its section
+    SECTION_FIELDS = {
+        "description": "Description",
+        "properties": "Properties",
+        "codex": "Codex Entry",
+        "additional_info": "Additional Information",
+        "survey_text": "Survey"
+    }
+    CATEGORY_TITLE = "Category:Planets"
+
+    def __init__(self, planets: Iterable[dict], category_page_size: int = 200):
+        assert(category_page_size > 0)
+
+        self.planets: dict[str, dict] = {planet["name"]: planet for planet in planets}
+        self.category_page_size = category_page_size
+
+        ## The category lists its members in (case insensitive) alphabetical order
+        self._category_names = sorted(self.planets.keys(), key=str.lower)
+
+    ## Methods
+
+    @classmethod
+    def generate(cls, planets: Iterable[dict], scale: int = 1, category_page_size: int = 200) -> "WikiCorpus":
+        """
+        Builds a corpus from the given planets, repeated scale times over (with numbered names after the first) to
+        benchmark against more planets than the wiki actually has
+        """
+
+        planets = list(planets)
+        scaled_planets = [
+            {**planet, "name": planet["name"] if copy == 0 else f"{planet['name']} {copy + 1}"}
+            for copy in range(scale)
+            for planet in planets
+        ]
+
+        return cls(scaled_planets, category_page_size)
+
+
+    def __len__(self) -> int:
+        return len(self.planets)
+
+
+    @staticmethod
+    def get_page_path(title: str) -> str:
+        return f"/wiki/{quote(title.replace(' ', '_'), safe=';@$!*(),/~:')}"
+
+
+    @staticmethod
+    def get_page_title(path: str) -> str:
+        _, _, title = path.partition("/wiki/")
+
+        return unquote(title).replace("_", " ")
+
+
+    def get_revision_id(self, title: str) -> int:
+        """
+        Gets a stable revision id for a planet's page, which only changes along with the planet
+        """
+
+        planet = self.planets.get(title)
+        if (planet is None):
+            return None
+
+        return zlib.crc32(repr(sorted(planet.items())).encode("utf-8"))
+
+
+    def render_planet_page(self, title: str) -> bytes:
+        planet = self.planets.get(title)
+        if (planet is None):
+            return None
+
+        infobox_items = "".join(
+            f'<div class="pi-item pi-data" data-source="{source}"><h3 class="pi-data-label">{source}</h3>'
+            f'<div class="pi-data-value pi-font">{html.escape(value_format.format(planet[field]))}</div></div>'
+            for field, (source, value_format) in self.INFOBOX_FIELDS.items()
+            if planet.get(field) is not None
+        )
+
+        sections = ""
+        for field, header in self.SECTION_FIELDS.items():
+            if (planet.get(field) is None):
+                continue
+
+            sections += (
+                f'<h2><span class="mw-headline" id="{header}">{header}</span><span class="mw-editsection">edit</span></h2>\n' +
+                "".join(f"<p>{html.escape(paragraph)}</p>\n" for paragraph in planet[field]) +
+                '<div class="ad-slot">Advertisement</div>\n'
+            )
+
+        location = " / ".join(
+            f'<a href="{self.get_page_path(planet[field] or "")}">{html.escape(planet[field] or "")}</a>'
+            for field in ["galaxy", "cluster", "system"]
+        )
+        name = html.escape(planet["name"])
+
+        return f"""<!DOCTYPE html>
+<html>
+<head><title>{name} | Mass Effect Wiki | Fandom</title></head>
+<body>
+<header class="fandom-community-header"><a href="/">Mass Effect Wiki</a><nav><ul><li><a href="/">Wiki Content</a></li></ul></nav></header>
+<main class="page__main"><div id="content"><div id="mw-content-text"><div class="mw-parser-output">
+<aside class="portable-infobox pi-background"><h2 class="pi-item pi-title" data-source="name">{name}</h2><section class="pi-item pi-group"><h2 class="pi-item pi-header">Orbital Data</h2>{infobox_items}</section></aside>
+<p><b>Location</b>: {location}
+</p>
+{sections}
+</div></div></div></main>
+<footer><div>Properties of Fandom</div></footer>
+</body>
+</html>""".encode("utf-8")
+
+
+    def render_category_page(self, from_value: str = "") -> bytes:
+        """
+        Renders the page of the planet category that starts from the first member at or after from_value, the same
+        way the wiki's ?from= query param works
+        """
+
+        from_value = from_value.lower()
+        start = next(
+            (index for index, name in enumerate(self._category_names) if name.lower() >= from_value),
+            len(self._category_names)
+        )
+        names = self._category_names[start:start + self.category_page_size]
+
+        sections: dict[str, list[str]] = {}
+        for name in names:
+            sections.setdefault(name[:1].upper(), []).append(name)
+
+        body = "".join(
+            f'<div class="category-page__first-char-group"><div class="category-page__first-char">{html.escape(first_char)}</div><ul>' +
+            "".join(
+                f'<li class="category-page__member"><a href="{self.get_page_path(name)}" class="category-page__member-link" title="{html.escape(name)}">{html.escape(name)}</a></li>'
+                for name in section_names
+            ) +
+            "</ul></div>"
+            for first_char, section_names in sections.items()
+        )
+
+        next_start = start + self.category_page_size
+        if (next_start < len(self._category_names)):
+            next_path = f"{self.get_page_path(self.CATEGORY_TITLE)}?from={quote(self._category_names[next_start])}"
+            body += f'<div class="category-page__pagination"><a class="category-page__pagination-next" href="{next_path}">Next</a></div>'
+
+        return f"""<!DOCTYPE html>
+<html>
+<head><title>{self.CATEGORY_TITLE} | Mass Effect Wiki | Fandom</title></head>
+<body><main class="page__main"><div class="category-page__members">{body}</div></main></body>
+</html>""".encode("utf-8")
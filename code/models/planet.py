@@ -1,7 +1,25 @@
 from .body import Body
 from extensions.to_dict import ToDict
 
+## The fields that place a planet, its text (lists of paragraphs), and its numeric (physical and orbital) properties
+LOCATION_FIELDS = ("galaxy", "cluster", "system")
+TEXT_FIELDS = ("description", "properties", "codex", "additional_info", "survey_text")
+NUMERIC_FIELDS = (
+    "orbital_distance_au",
+    "orbital_period_years",
+    "keplerian_ratio",
+    "radius_km",
+    "day_length_earth_hours",
+    "atmospheric_pressure",
+    "surface_temperature_celcius",
+    "surface_gravity_g",
+    "mass_earth_masses",
+    "satellite_count"
+)
+
 class Planet(Body, ToDict):
+    __slots__ = NUMERIC_FIELDS
+
     def __init__(self,
         name: str,
         ## Location
@@ -39,93 +57,11 @@ class Planet(Body, ToDict):
         self.mass_earth_masses = mass_earth_masses
         self.satellite_count = satellite_count
 
-    ## Properties
-
-    @property
-    def orbital_distance_au(self) -> float:
-        return self._orbital_distance_au
-
-    @orbital_distance_au.setter
-    def orbital_distance_au(self, value: float):
-        self._orbital_distance_au = value
-
-
-    @property
-    def orbital_period_years(self) -> float:
-        return self._orbital_period_years
-
-    @orbital_period_years.setter
-    def orbital_period_years(self, value: float):
-        self._orbital_period_years = value
-
-
-    @property
-    def keplerian_ratio(self) -> float:
-        return self._keplerian_ratio
-
-    @keplerian_ratio.setter
-    def keplerian_ratio(self, value: float):
-        self._keplerian_ratio = value
-
-
-    @property
-    def radius_km(self) -> float:
-        return self._radius_km
-
-    @radius_km.setter
-    def radius_km(self, value: float):
-        self._radius_km = value
-
-
-    @property
-    def day_length_earth_hours(self) -> float:
-        return self._day_length_earth_hours
-
-    @day_length_earth_hours.setter
-    def day_length_earth_hours(self, value: float):
-        self._day_length_earth_hours = value
-
-
-    @property
-    def atmospheric_pressure(self) -> float:
-        return self._atmospheric_pressure
-
-    @atmospheric_pressure.setter
-    def atmospheric_pressure(self, value: float):
-        self._atmospheric_pressure = value
-
-
-    @property
-    def surface_temperature_celcius(self) -> float:
-        return self._surface_temperature_celcius
-
-    @surface_temperature_celcius.setter
-    def surface_temperature_celcius(self, value: float):
-        self._surface_temperature_celcius = value
-
-
-    @property
-    def surface_gravity_g(self) -> float:
-        return self._surface_gravity_g
-
-    @surface_gravity_g.setter
-    def surface_gravity_g(self, value: float):
-        self._surface_gravity_g = value
-
-
-    @property
-    def mass_earth_masses(self) -> float:
-        return self._mass_earth_masses
-
-    @mass_earth_masses.setter
-    def mass_earth_masses(self, value: float):
-        self._mass_earth_masses = value
-
 
-    @property
-    def satellite_count(self) -> int:
-        return self._satellite_count
+    @classmethod
+    def from_dict(cls, data: dict) -> "Planet":
+        """
+        Builds a planet back up from its to_dict output
+        """
 
-    @satellite_count.setter
-    def satellite_count(self, value: int):
-        self._satellite_count = value
\ No newline at end of file
+        return cls(**data)
@@ -0,0 +1,105 @@
+import logging
+import threading
+import time
+from collections import deque
+from typing import Callable
+
+import utilities
+
+
+class CircuitBreaker:
+    """
+    Pauses every request to the server once too many of the recent ones have failed, so a struggling (or rate limiting)
+    server gets a chance to recover instead of being hit by every worker at once. Requests resume with a clean slate
+    once the pause is over.
+    """
+
+    def __init__(
+            self,
+            error_rate_threshold: float,
+            window_size: int,
+            min_requests: int,
+            open_seconds: float,
+            clock: Callable[[], float] = time.monotonic
+    ):
+        self.logger = utilities.initialize_logging(logging.getLogger(__name__))
+
+        assert(0 < error_rate_threshold <= 1)
+        assert(window_size > 0)
+        assert(0 < min_requests <= window_size)
+        assert(open_seconds >= 0)
+
+        self.error_rate_threshold = error_rate_threshold
+        self.window_size = window_size
+        self.min_requests = min_requests
+        self.open_seconds = open_seconds
+        self.clock = clock
+
+        ## Whether each of the most recent requests failed
+        self._outcomes: deque[bool] = deque(maxlen=window_size)
+        self._open_until = 0.0
+        self._trip_count = 0
+        self._lock = threading.Lock()
+
+    ## Properties
+
+    @property
+    def trip_count(self) -> int:
+        return self._trip_count
+
+
+    @property
+    def is_open(self) -> bool:
+        with self._lock:
+            return self.clock() < self._open_until
+
+    ## Methods
+
+    def wait(self):
+        """
+        Blocks while the breaker is open
+        """
+
+        while (True):
+            with self._lock:
+                remaining_seconds = self._open_until - self.clock()
+
+            if (remaining_seconds <= 0):
+                return
+
+            time.sleep(remaining_seconds)
+
+
+    def record_success(self):
+        with self._lock:
+            self._outcomes.append(False)
+
+
+    def record_failure(self, retry_after_seconds: float = None):
+        """
+        Records a failed request, and opens the breaker if the recent error rate is over the threshold. The breaker stays
+        open for at least as long as the server asked us to wait.
+        """
+
+        with self._lock:
+            ## Requests that were already in flight when the breaker opened don't count against the next window
+            now = self.clock()
+            if (now < self._open_until):
+                return
+
+            self._outcomes.append(True)
+            if (len(self._outcomes) < self.min_requests):
+                return
+
+            error_rate = sum(self._outcomes) / len(self._outcomes)
+            if (error_rate < self.error_rate_threshold):
+                return
+
+            open_seconds = max(self.open_seconds, retry_after_seconds or 0)
+            self._open_until = now + open_seconds
+            self._outcomes.clear()
+            self._trip_count += 1
+
+        self.logger.warning(
+            f"Pausing all requests for {open_seconds:.1f} seconds, after {error_rate:.0%} of recent requests failed"
+        )
@@ -0,0 +1,316 @@
+import gzip
+import http.client
+import logging
+import ssl
+import threading
+import time
+import zlib
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlsplit, urljoin
+
+import utilities
+from metrics.metrics_registry import MetricsRegistry, BYTES_BUCKETS
+from .circuit_breaker import CircuitBreaker
+
+## Brotli is optional, and only asked for when it can be decoded
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+class HttpResponse:
+    """
+    A fully read response, along with some metadata about how it was retrieved
+    """
+
+    def __init__(self,
+            url: str,
+            status_code: int,
+            headers: http.client.HTTPMessage,
+            content: bytes,
+            transfer_bytes: int,
+            elapsed_seconds: float,
+            reused_connection: bool
+    ):
+        self.url = url
+        self.status_code = status_code
+        self.headers = headers
+        self.content = content
+        self.transfer_bytes = transfer_bytes
+        self.elapsed_seconds = elapsed_seconds
+        self.reused_connection = reused_connection
+
+
+    def get_retry_after_seconds(self, now: datetime = None) -> float:
+        """
+        Gets how long the server asked us to wait before trying again, if it did. Retry-After can either be a number of
+        seconds, or an HTTP date (which is compared against now, defaulting to the current time).
+        """
+
+        retry_after = self.headers.get("Retry-After")
+        if (retry_after is None):
+            return None
+
+        retry_after = retry_after.strip()
+        if (retry_after.isdigit()):
+            return float(retry_after)
+
+        try:
+            retry_at = parsedate_to_datetime(retry_after)
+        except (TypeError, ValueError):
+            return None
+
+        if (retry_at.tzinfo is None):
+            retry_at = retry_at.replace(tzinfo=timezone.utc)
+
+        return max(0.0, (retry_at - (now or datetime.now(timezone.utc))).total_seconds())
+
+
+class HttpError(Exception):
+    """
+    Raised when the server responds with an error status code (400 and up)
+    """
+
+    def __init__(self, response: HttpResponse):
+        super().__init__(f"HTTP {response.status_code} for {response.url}")
+        self.response = response
+
+    ## Properties
+
+    @property
+    def status_code(self) -> int:
+        return self.response.status_code
+
+
+    @property
+    def headers(self) -> http.client.HTTPMessage:
+        return self.response.headers
+
+
+class HttpClient:
+    """
+    HTTP client shared by all of the scrapers. It keeps a pool of keep-alive connections per host so that each request
+    doesn't pay for a new TCP and TLS handshake, asks for compressed responses, and applies a timeout to every request.
+    When given a circuit breaker, every request waits on it, and reports back whether the server handled it. When given
+    a metrics registry, every request's latency, status code, and size are recorded to it.
+    """
+
+    REDIRECT_STATUS_CODES = (301, 302, 303, 307, 308)
+
+    def __init__(self,
+            user_agent: str,
+            timeout_seconds: float,
+            max_idle_connections_per_host: int,
+            max_redirects: int = 5,
+            circuit_breaker: CircuitBreaker = None,
+            metrics: MetricsRegistry = None
+    ):
+        self.logger = utilities.initialize_logging(logging.getLogger(__name__))
+
+        self.user_agent = user_agent
+        self.timeout_seconds = timeout_seconds
+        self.max_idle_connections_per_host = max_idle_connections_per_host
+        self.max_redirects = max_redirects
+        self.circuit_breaker = circuit_breaker
+        self.metrics = metrics
+        self.accept_encoding = "gzip, deflate, br" if brotli is not None else "gzip, deflate"
+
+        self._ssl_context = ssl.create_default_context()
+        self._idle_connections: dict[tuple[str, str], list[http.client.HTTPConnection]] = {}
+        self._idle_connections_lock = threading.Lock()
+
+
+    def _create_connection(self, scheme: str, netloc: str) -> http.client.HTTPConnection:
+        if (scheme == "https"):
+            return http.client.HTTPSConnection(netloc, timeout=self.timeout_seconds, context=self._ssl_context)
+
+        if (scheme == "http"):
+            return http.client.HTTPConnection(netloc, timeout=self.timeout_seconds)
+
+        raise ValueError(f"Unsupported url scheme: {scheme}")
+
+
+    def _acquire_connection(self, scheme: str, netloc: str) -> tuple[http.client.HTTPConnection, bool]:
+        """
+        Gets an idle connection to the host if there is one, otherwise a new one. Also returns whether it was reused.
+        """
+
+        with self._idle_connections_lock:
+            idle_connections = self._idle_connections.get((scheme, netloc))
+            if (idle_connections):
+                return (idle_connections.pop(), True)
+
+        return (self._create_connection(scheme, netloc), False)
+
+
+    def _release_connection(self, scheme: str, netloc: str, connection: http.client.HTTPConnection):
+        with self._idle_connections_lock:
+            idle_connections = self._idle_connections.setdefault((scheme, netloc), [])
+            if (len(idle_connections) < self.max_idle_connections_per_host):
+                idle_connections.append(connection)
+                return
+
+        connection.close()
+
+
+    def _decode_content(self, content: bytes, content_encoding: str) -> bytes:
+        content_encoding = (content_encoding or "identity").strip().lower()
+
+        if (content_encoding in ["identity", ""]):
+            return content
+        if (content_encoding == "gzip"):
+            return gzip.decompress(content)
+        if (content_encoding == "deflate"):
+            ## Servers disagree on whether deflate means a zlib wrapped or a raw deflate stream
+            try:
+                return zlib.decompress(content)
+            except zlib.error:
+                return zlib.decompress(content, -zlib.MAX_WBITS)
+        if (content_encoding == "br" and brotli is not None):
+            return brotli.decompress(content)
+
+        raise ValueError(f"Unsupported content encoding: {content_encoding}")
+
+
+    def _send(self, url: str, headers: dict[str, str]) -> HttpResponse:
+        split_url = urlsplit(url)
+        path = split_url.path or "/"
+        if (split_url.query):
+            path = f"{path}?{split_url.query}"
+
+        request_headers = {
+            "User-Agent": self.user_agent,
+            "Accept-Encoding": self.accept_encoding,
+            "Connection": "keep-alive",
+            **headers
+        }
+
+        start = time.monotonic()
+        connection, reused_connection = self._acquire_connection(split_url.scheme, split_url.netloc)
+        try:
+            try:
+                connection.request("GET", path, headers=request_headers)
+                response = connection.getresponse()
+            except (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError):
+                ## The server may have closed an idle connection in the meantime, so try again on a fresh one
+                if (not reused_connection):
+                    raise
+
+                connection.close()
+                connection = self._create_connection(split_url.scheme, split_url.netloc)
+                reused_connection = False
+                connection.request("GET", path, headers=request_headers)
+                response = connection.getresponse()
+
+            raw_content = response.read()
+        except Exception:
+            connection.close()
+            raise
+
+        if (response.will_close):
+            connection.close()
+        else:
+            self._release_connection(split_url.scheme, split_url.netloc, connection)
+
+        return HttpResponse(
+            url,
+            response.status,
+            response.headers,
+            self._decode_content(raw_content, response.headers.get("Content-Encoding")),
+            len(raw_content),
+            time.monotonic() - start,
+            reused_connection
+        )
+
+
+    def _is_server_failure(self, status_code: int) -> bool:
+        return status_code == 429 or status_code >= 500
+
+
+    def get(self, url: str, headers: dict[str, str] = None) -> HttpResponse:
+        """
+        Sends a GET request, following any redirects. Raises an HttpError if the server responds with an error status.
+        """
+
+        if (self.metrics is None):
+            return self._get_through_circuit_breaker(url, headers)
+
+        start = time.perf_counter()
+        try:
+            return self._get_through_circuit_breaker(url, headers)
+        except (OSError, http.client.HTTPException) as e:
+            self.metrics.increment("http_errors_total", labels={"error": type(e).__name__})
+            raise
+        finally:
+            self.metrics.observe("fetch_seconds", time.perf_counter() - start)
+
+
+    def _get_through_circuit_breaker(self, url: str, headers: dict[str, str] = None) -> HttpResponse:
+        if (self.circuit_breaker is None):
+            return self._get(url, headers)
+
+        if (self.metrics is None):
+            self.circuit_breaker.wait()
+        else:
+            with self.metrics.time("circuit_breaker_wait_seconds"):
+                self.circuit_breaker.wait()
+
+        try:
+            response = self._get(url, headers)
+        except HttpError as e:
+            if (self._is_server_failure(e.status_code)):
+                self.circuit_breaker.record_failure(e.response.get_retry_after_seconds())
+            else:
+                self.circuit_breaker.record_success()
+            raise
+        except (OSError, http.client.HTTPException):
+            self.circuit_breaker.record_failure()
+            raise
+
+        self.circuit_breaker.record_success()
+
+        return response
+
+
+    def _record_response(self, response: HttpResponse):
+        self.metrics.increment("http_responses_total", labels={"status_code": str(response.status_code)})
+        self.metrics.increment("http_transfer_bytes_total", response.transfer_bytes)
+        self.metrics.increment("http_content_bytes_total", len(response.content))
+        self.metrics.observe("http_response_bytes", response.transfer_bytes, buckets=BYTES_BUCKETS)
+
+
+    def _get(self, url: str, headers: dict[str, str] = None) -> HttpResponse:
+        for _ in range(self.max_redirects + 1):
+            response = self._send(url, headers or {})
+            if (self.metrics is not None):
+                self._record_response(response)
+
+            location = response.headers.get("Location")
+            if (response.status_code not in self.REDIRECT_STATUS_CODES or location is None):
+                break
+
+            url = urljoin(url, location)
+        else:
+            raise HttpError(response)
+
+        self.logger.debug(
+            f"GET {url} -> {response.status_code} in {response.elapsed_seconds:.2f} seconds, "
+            f"{response.transfer_bytes} bytes transferred ({len(response.content)} decoded), "
+            f"{'reused' if response.reused_connection else 'new'} connection"
+        )
+
+        if (response.status_code >= 400):
+            raise HttpError(response)
+
+        return response
+
+
+    def close(self):
+        with self._idle_connections_lock:
+            for idle_connections in self._idle_connections.values():
+                for connection in idle_connections:
+                    connection.close()
+
+            self._idle_connections.clear()
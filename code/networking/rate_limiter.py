@@ -0,0 +1,128 @@
+import logging
+import threading
+import time
+
+import utilities
+from metrics.metrics_registry import MetricsRegistry
+
+
+class RateLimiter:
+    """
+    Adaptive token bucket that's shared between every scraper hitting the same server. Tokens refill at the current rate
+    (up to the burst size), which backs off when the server responds slowly, fails to respond at all, or asks us to slow
+    down, and creeps back up towards the configured ceiling while the server stays healthy.
+    """
+
+    ## Status codes that mean the server wants us to slow down
+    THROTTLED_STATUS_CODES = (429, 503)
+
+    def __init__(self,
+            requests_per_second: float,
+            burst: int,
+            min_requests_per_second: float,
+            slow_response_seconds: float,
+            backoff_factor: float,
+            recovery_step: float,
+            metrics: MetricsRegistry = None
+    ):
+        self.logger = utilities.initialize_logging(logging.getLogger(__name__))
+
+        assert(requests_per_second > 0)
+        assert(burst >= 1)
+        assert(0 < min_requests_per_second <= requests_per_second)
+        assert(0 < backoff_factor < 1)
+
+        self.max_requests_per_second = requests_per_second
+        self.burst = burst
+        self.min_requests_per_second = min_requests_per_second
+        self.slow_response_seconds = slow_response_seconds
+        self.backoff_factor = backoff_factor
+        self.recovery_step = recovery_step
+        self.metrics = metrics
+
+        self._requests_per_second = requests_per_second
+        self._tokens = float(burst)
+        self._last_refill = time.monotonic()
+        self._lock = threading.Lock()
+
+    ## Properties
+
+    @property
+    def requests_per_second(self) -> float:
+        return self._requests_per_second
+
+    ## Methods
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._last_refill) * self._requests_per_second)
+        self._last_refill = now
+
+
+    def acquire(self):
+        """
+        Blocks until a token is available, and then consumes it
+        """
+
+        waited_seconds = 0.0
+        while (True):
+            with self._lock:
+                self._refill()
+                if (self._tokens >= 1):
+                    self._tokens -= 1
+                    break
+
+                wait_seconds = (1 - self._tokens) / self._requests_per_second
+
+            ## Sleep outside of the lock so that other threads can record responses (and change the rate) meanwhile
+            time.sleep(wait_seconds)
+            waited_seconds += wait_seconds
+
+        if (self.metrics is not None):
+            self.metrics.observe("rate_limit_wait_seconds", waited_seconds)
+
+
+    def release(self):
+        """
+        Gives back a token that was used on a request which didn't end up costing the server anything (ex. a 304)
+        """
+
+        with self._lock:
+            self._refill()
+            self._tokens = min(self.burst, self._tokens + 1)
+
+
+    def record_response(self, elapsed_seconds: float, status_code: int):
+        """
+        Adjusts the rate based on how the server handled a request. A status_code of None means that the request failed
+        without a response (ex. it timed out, or the connection was dropped).
+        """
+
+        failed = status_code is None
+        throttled = status_code in self.THROTTLED_STATUS_CODES
+        slow = elapsed_seconds >= self.slow_response_seconds
+
+        with self._lock:
+            previous_rate = self._requests_per_second
+
+            if (failed or throttled or slow):
+                self._requests_per_second = max(self.min_requests_per_second, previous_rate * self.backoff_factor)
+                ## Don't let any saved up burst keep hammering a server that's already struggling
+                self._refill()
+                self._tokens = min(self._tokens, 0)
+            else:
+                self._requests_per_second = min(self.max_requests_per_second, previous_rate + self.recovery_step)
+
+            rate = self._requests_per_second
+
+        if (self.metrics is not None):
+            self.metrics.set_gauge("rate_limit_requests_per_second", rate)
+
+        if (rate < previous_rate):
+            if (failed):
+                reason = f"a failed request ({elapsed_seconds:.1f} seconds)"
+            elif (throttled):
+                reason = f"status {status_code}"
+            else:
+                reason = f"a slow response ({elapsed_seconds:.1f} seconds)"
+            self.logger.warning(f"Backing off to {rate:.2f} requests/second after {reason}")
@@ -0,0 +1,197 @@
+import gzip
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+
+import utilities
+from metrics.metrics_registry import MetricsRegistry
+
+
+class CacheMissError(LookupError):
+    """
+    Raised when the cache is offline, and doesn't contain the requested url
+    """
+    pass
+
+
+class CachedResponse:
+    def __init__(self, url: str, content: bytes, etag: str, last_modified: str, stored_at: float):
+        self.url = url
+        self.content = content
+        self.etag = etag
+        self.last_modified = last_modified
+        self.stored_at = stored_at
+
+
+class ResponseCache:
+    """
+    Compressed on-disk cache of raw responses. Each url gets a small json entry holding its validators (ETag and
+    Last-Modified), which points at a gzipped blob named after the hash of its content, so identical responses are only
+    stored once.
+    """
+
+    def __init__(
+            self,
+            directory_path: Path,
+            max_size_bytes: int,
+            max_age_seconds: float,
+            offline: bool = False,
+            metrics: MetricsRegistry = None
+    ):
+        self.logger = utilities.initialize_logging(logging.getLogger(__name__))
+
+        self.directory_path = directory_path
+        self.max_size_bytes = max_size_bytes
+        self.max_age_seconds = max_age_seconds
+        self.offline = offline
+        self.metrics = metrics
+
+        self._entries_path = directory_path / "entries"
+        self._blobs_path = directory_path / "blobs"
+        self._entries_path.mkdir(parents=True, exist_ok=True)
+        self._blobs_path.mkdir(parents=True, exist_ok=True)
+
+        ## Blobs can be shared between entries, so make sure one isn't removed while it's being written for another
+        self._lock = threading.Lock()
+
+
+    def _get_entry_path(self, url: str) -> Path:
+        return self._entries_path / f"{hashlib.sha256(url.encode('utf-8')).hexdigest()}.json"
+
+
+    def _get_blob_path(self, content_hash: str) -> Path:
+        return self._blobs_path / f"{content_hash}.gz"
+
+
+    def _write_atomic(self, path: Path, data: bytes):
+        ## Write to a temporary file and swap it in, so a crash never leaves a half written file in the cache
+        temporary_path = path.with_name(f"{path.name}.{threading.get_ident()}.tmp")
+        with open(temporary_path, "wb") as fd:
+            fd.write(data)
+        os.replace(temporary_path, path)
+
+
+    def _load_entry(self, entry_path: Path) -> dict:
+        try:
+            return utilities.load_json(entry_path)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+
+
+    def _store_entry(self, entry: dict):
+        self._write_atomic(self._get_entry_path(entry["url"]), json.dumps(entry).encode("utf-8"))
+
+
+    def _record_lookup(self, result: str):
+        if (self.metrics is not None):
+            self.metrics.increment("response_cache_lookups_total", labels={"result": result})
+
+
+    def get(self, url: str) -> CachedResponse:
+        entry = self._load_entry(self._get_entry_path(url))
+        if (entry is None):
+            self._record_lookup("miss")
+            return None
+
+        try:
+            with gzip.open(self._get_blob_path(entry["content_hash"]), "rb") as fd:
+                content = fd.read()
+        except FileNotFoundError:
+            self._record_lookup("miss")
+            return None
+
+        self._record_lookup("hit")
+
+        return CachedResponse(url, content, entry.get("etag"), entry.get("last_modified"), entry.get("stored_at"))
+
+
+    def store(self, url: str, content: bytes, etag: str, last_modified: str):
+        content_hash = hashlib.sha256(content).hexdigest()
+        blob_path = self._get_blob_path(content_hash)
+
+        with self._lock:
+            if (not blob_path.exists()):
+                self._write_atomic(blob_path, gzip.compress(content))
+
+            self._store_entry({
+                "url": url,
+                "content_hash": content_hash,
+                "etag": etag,
+                "last_modified": last_modified,
+                "stored_at": time.time()
+            })
+
+
+    def refresh(self, url: str):
+        """
+        Marks the cached response for the url as still valid (ex. after the server responded with a 304)
+        """
+
+        if (self.metrics is not None):
+            self.metrics.increment("response_cache_revalidations_total")
+
+        with self._lock:
+            entry = self._load_entry(self._get_entry_path(url))
+            if (entry is None):
+                return
+
+            entry["stored_at"] = time.time()
+            self._store_entry(entry)
+
+
+    def evict(self):
+        """
+        Removes entries that are older than the max age, and then the oldest entries until the blobs fit in the max size.
+        Offline caches are left alone, since they're the only source of pages.
+        """
+
+        if (self.offline):
+            self.logger.info("Cache is offline, so nothing was evicted")
+            return
+
+        with self._lock:
+            now = time.time()
+            entries: list[tuple[Path, dict]] = []
+            for entry_path in self._entries_path.glob("*.json"):
+                entry = self._load_entry(entry_path)
+                if (entry is None or now - entry.get("stored_at", 0) > self.max_age_seconds):
+                    entry_path.unlink(missing_ok=True)
+                    continue
+
+                entries.append((entry_path, entry))
+
+            ## Oldest first, so they're the first to go if the cache is too big
+            entries.sort(key=lambda pair: pair[1]["stored_at"])
+
+            blob_sizes: dict[str, int] = {
+                blob_path.stem: blob_path.stat().st_size for blob_path in self._blobs_path.glob("*.gz")
+            }
+            blob_references: dict[str, int] = {}
+            for _, entry in entries:
+                blob_references[entry["content_hash"]] = blob_references.get(entry["content_hash"], 0) + 1
+
+            total_size = sum(size for content_hash, size in blob_sizes.items() if content_hash in blob_references)
+            evicted_count = 0
+            for entry_path, entry in entries:
+                if (total_size <= self.max_size_bytes):
+                    break
+
+                entry_path.unlink(missing_ok=True)
+                evicted_count += 1
+
+                content_hash = entry["content_hash"]
+                blob_references[content_hash] -= 1
+                if (blob_references[content_hash] == 0):
+                    del blob_references[content_hash]
+                    total_size -= blob_sizes.get(content_hash, 0)
+
+            ## Clean up any blobs that are no longer referenced by an entry
+            for content_hash in blob_sizes:
+                if (content_hash not in blob_references):
+                    self._get_blob_path(content_hash).unlink(missing_ok=True)
+
+        self.logger.info(f"Cache holds {len(entries) - evicted_count} responses in {total_size / 1024 / 1024:.1f} MB")
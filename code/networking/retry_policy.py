@@ -0,0 +1,52 @@
+import http.client
+import random
+
+from .http_client import HttpError
+
+
+class RetryPolicy:
+    """
+    Decides which failures are worth retrying (timeouts, dropped connections, and server side or rate limiting status
+    codes), and how long to wait before each retry. Waits grow exponentially with full jitter, so retries from many
+    workers don't all land on the server at once, but never come in sooner than the server's Retry-After.
+    """
+
+    RETRYABLE_STATUS_CODES = (408, 425, 429, 500, 502, 503, 504)
+
+    def __init__(
+            self,
+            max_attempts: int,
+            base_delay_seconds: float,
+            max_delay_seconds: float,
+            random_source: random.Random = None
+    ):
+        assert(max_attempts >= 1)
+        assert(0 <= base_delay_seconds <= max_delay_seconds)
+
+        self.max_attempts = max_attempts
+        self.base_delay_seconds = base_delay_seconds
+        self.max_delay_seconds = max_delay_seconds
+        self.random_source = random_source if random_source is not None else random.Random()
+
+
+    def is_retryable(self, exception: Exception) -> bool:
+        if (isinstance(exception, HttpError)):
+            return exception.status_code in self.RETRYABLE_STATUS_CODES
+
+        ## Timeouts and connection errors are all OSErrors, and malformed responses are HTTPExceptions
+        return isinstance(exception, (OSError, http.client.HTTPException))
+
+
+    def get_delay_seconds(self, attempt: int, exception: Exception) -> float:
+        """
+        Gets how long to wait before retrying something that's failed the given number of attempts
+        """
+
+        delay_seconds = self.random_source.uniform(0, min(self.max_delay_seconds, self.base_delay_seconds * 2 ** (attempt - 1)))
+
+        if (isinstance(exception, HttpError)):
+            retry_after_seconds = exception.response.get_retry_after_seconds()
+            if (retry_after_seconds is not None):
+                delay_seconds = max(delay_seconds, retry_after_seconds)
+
+        return delay_seconds
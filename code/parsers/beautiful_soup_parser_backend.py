@@ -0,0 +1,166 @@
+import itertools
+
+import unidecode
+from bs4 import BeautifulSoup, SoupStrainer
+from bs4.element import Tag
+
+from .parser_backend import ParserBackend
+from .planet_page_index import PlanetPageIndex
+from .category_page_index import CategoryPageIndex
+
+
+class BeautifulSoupParserBackend(ParserBackend):
+    """
+    Parses pages with BeautifulSoup, using either Python's built in html.parser or lxml underneath
+    """
+
+    def __init__(self, features: str = "html.parser", partial_parse: bool = False):
+        super().__init__(partial_parse)
+
+        ## Fail fast if lxml isn't installed, rather than on the first page
+        if (features == "lxml"):
+            import lxml
+
+        self.features = features
+        ## Only build nodes for the article's content (navigation, ads, comments, footers, etc are never needed)
+        self.article_content_strainer = SoupStrainer("div", class_=self.ARTICLE_CONTENT_CLASS)
+
+    ## Properties
+
+    @property
+    def name(self) -> str:
+        return self.features
+
+    ## Methods
+
+    def _parse(self, content: bytes, parse_only: SoupStrainer = None) -> BeautifulSoup:
+        return BeautifulSoup(content, self.features, parse_only=parse_only)
+
+
+    def _get_text_prefix(self, tag: Tag, length: int) -> str:
+        """
+        Gets (at least) the first length characters of the tag's text, without building the text of the whole subtree
+        """
+
+        prefix = ""
+        for string in tag.strings:
+            prefix += string
+            if (len(prefix) >= length):
+                break
+
+        return prefix
+
+
+    def _extract_location(self, location_start_element: Tag) -> tuple[str, ...]:
+        if (location_start_element is None):
+            return None
+
+        return tuple(
+            element.text for element in itertools.islice(location_start_element.next_siblings, 1, 6, 2)
+        )
+
+
+    def _extract_infobox(self, infobox_element: Tag) -> dict[str, str]:
+        infobox: dict[str, str] = {}
+        if (infobox_element is None):
+            return infobox
+
+        for datum_container in infobox_element.find_all(attrs={"data-source": True}):
+            ## Only the first container for any given key counts
+            infobox_key = datum_container.attrs["data-source"]
+            if (infobox_key in infobox):
+                continue
+
+            value_container = datum_container.find(class_="pi-data-value")
+            infobox[infobox_key] = value_container.text.lower() if value_container is not None else None
+
+        return {infobox_key: value for infobox_key, value in infobox.items() if value is not None}
+
+
+    def _extract_text_below_header(self, header: Tag) -> list[str]:
+        content: list[str] = []
+        element = header
+        stop = False
+        while (not stop and element.next_sibling != None):
+            element = element.next_sibling
+
+            if (issubclass(type(element), str)):
+                continue
+
+            if (isinstance(element, Tag)):
+                if (element.name in ["span", "p"]):
+                    ## Convert the misc unicode characters into their approximate ascii flavor (it's usually just nbsp
+                    ## and quote marks, so this is fine)
+                    text = unidecode.unidecode(element.text.strip())
+
+                    content.extend(text.splitlines())
+                elif (element.name.startswith("h")):
+                    stop = True
+
+        return content
+
+
+    def _index_planet_soup(self, soup: BeautifulSoup, header_texts: list[str]) -> PlanetPageIndex:
+        location_start_element: Tag = None
+        infobox_element: Tag = None
+        headers: dict[str, Tag] = {}
+        header_text_length = max((len(header_text) for header_text in header_texts), default=0)
+
+        for tag in soup.descendants:
+            if (not isinstance(tag, Tag)):
+                continue
+
+            if (location_start_element is None and tag.name == "b"):
+                if (self._get_text_prefix(tag, len("Location")).startswith("Location")):
+                    location_start_element = tag
+
+            if (infobox_element is None and "portable-infobox" in tag.get("class", [])):
+                infobox_element = tag
+
+            ## Section headers are the first tags (ex. the span in <h2><span>Description</span></h2>) whose parent is a
+            ## header, and whose text starts with the header text
+            if (len(headers) < len(header_texts) and tag.parent.name.startswith("h")):
+                text_prefix = self._get_text_prefix(tag, header_text_length)
+                for header_text in header_texts:
+                    if (header_text not in headers and text_prefix.startswith(header_text)):
+                        headers[header_text] = tag.parent
+
+            ## Everything's been found, so there's no need to walk the rest of the document
+            if (
+                location_start_element is not None and
+                infobox_element is not None and
+                len(headers) == len(header_texts)
+            ):
+                break
+
+        return PlanetPageIndex(
+            self._extract_location(location_start_element),
+            self._extract_infobox(infobox_element),
+            {header_text: self._extract_text_below_header(header) for header_text, header in headers.items()}
+        )
+
+
+    def parse_planet_page(self, content: bytes, header_texts: list[str]) -> PlanetPageIndex:
+        if (self.partial_parse):
+            page_index = self._index_planet_soup(self._parse(content, self.article_content_strainer), header_texts)
+            if (self._is_partial_index_usable(page_index)):
+                return page_index
+
+        return self._index_planet_soup(self._parse(content), header_texts)
+
+
+    def parse_category_page(self, content: bytes) -> CategoryPageIndex:
+        soup = self._parse(content)
+
+        sections = []
+        for section in soup.select("div.category-page__first-char"):
+            links = [
+                (element.text, element.attrs.get("href"))
+                for element in section.parent.select("a.category-page__member-link")
+            ]
+            sections.append((section.text.strip(), links))
+
+        next_page_element = soup.select_one(self.CATEGORY_NEXT_PAGE_SELECTOR)
+        next_page_href = next_page_element.attrs.get("href") if next_page_element is not None else None
+
+        return CategoryPageIndex(sections, next_page_href)
@@ -0,0 +1,13 @@
+class CategoryPageIndex:
+    """
+    Holds everything that the category scraper needs from a category page: each section (ex. "A") in page order along
+    with the (text, href) of every page link listed in it, and the href of the category's next page (if there is one)
+    """
+
+    def __init__(self, sections: list[tuple[str, list[tuple[str, str]]]], next_page_href: str):
+        self.sections = sections
+        self.next_page_href = next_page_href
+
+
+    def get_section_names(self) -> list[str]:
+        return [section_name for section_name, _ in self.sections]
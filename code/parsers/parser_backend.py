@@ -0,0 +1,66 @@
+from abc import ABC, abstractmethod
+
+from .planet_page_index import PlanetPageIndex
+from .category_page_index import CategoryPageIndex
+
+
+class ParserBackend(ABC):
+    """
+    Turns raw page content into the data that the scrapers extract from it, so the underlying HTML parser can be swapped
+    out without touching the scrapers
+    """
+
+    ## The class of the element that wraps the article's content (including the infobox) on every wiki page
+    ARTICLE_CONTENT_CLASS = "mw-parser-output"
+    ## The link to the next page of members on a (paginated) category page
+    CATEGORY_NEXT_PAGE_SELECTOR = "a.category-page__pagination-next"
+
+    def __init__(self, partial_parse: bool = False):
+        self.partial_parse = partial_parse
+
+    @property
+    @abstractmethod
+    def name(self) -> str:
+        pass
+
+
+    def _is_partial_index_usable(self, page_index: PlanetPageIndex) -> bool:
+        """
+        Checks that a partial parse found the anchors the planet data hangs off of, otherwise a full parse is needed
+        """
+
+        return page_index.location is not None and len(page_index.infobox) > 0
+
+
+    @abstractmethod
+    def parse_planet_page(self, content: bytes, header_texts: list[str]) -> PlanetPageIndex:
+        """
+        Indexes the location, infobox, and the text below each of the given section headers on a planet page
+        """
+        pass
+
+
+    @abstractmethod
+    def parse_category_page(self, content: bytes) -> CategoryPageIndex:
+        """
+        Finds each section on a category page (ex. "A") in page order, along with the (text, href) of every page link
+        that's listed alongside that section, and the href of the category's next page
+        """
+        pass
+
+
+def build_parser_backend(name: str, partial_parse: bool = False) -> ParserBackend:
+    """
+    Builds the parser backend with the given name, only importing what that backend needs. Partial parsing restricts the
+    planet pages to just the article's content (falling back to the full page when that isn't enough).
+    """
+
+    if (name in ["html.parser", "lxml"]):
+        from .beautiful_soup_parser_backend import BeautifulSoupParserBackend
+        return BeautifulSoupParserBackend(name, partial_parse)
+
+    if (name == "selectolax"):
+        from .selectolax_parser_backend import SelectolaxParserBackend
+        return SelectolaxParserBackend(partial_parse)
+
+    raise RuntimeError(f"Unknown parser backend {name}, must be one of html.parser, lxml, or selectolax")
@@ -0,0 +1,90 @@
+import logging
+
+import utilities
+from networking.response_cache import ResponseCache
+from scrapers.planet_data_scraper import PlanetDataScraper
+
+
+class ParserEquivalenceChecker:
+    """
+    Builds planets from the same cached pages with two different parser backends, and reports every field where the
+    resulting planets differ. This makes sure that switching backends won't silently change the planet data.
+    """
+
+    def __init__(
+            self,
+            reference_scraper: PlanetDataScraper,
+            candidate_scraper: PlanetDataScraper,
+            response_cache: ResponseCache
+    ):
+        self.logger = utilities.initialize_logging(logging.getLogger(__name__))
+
+        self.reference_scraper = reference_scraper
+        self.candidate_scraper = candidate_scraper
+        self.response_cache = response_cache
+
+
+    def _build_planet_dict(self, scraper: PlanetDataScraper, name: str, content: bytes) -> dict:
+        try:
+            planet = scraper.parse(name, content)
+        except Exception as e:
+            return {"exception": repr(e)}
+
+        if (planet is None):
+            return {"rejected": True}
+
+        return planet.to_dict()
+
+
+    def _diff_planet_dicts(self, reference: dict, candidate: dict) -> dict[str, dict]:
+        differences: dict[str, dict] = {}
+        for field in sorted(set(reference) | set(candidate)):
+            reference_value = reference.get(field)
+            candidate_value = candidate.get(field)
+            if (reference_value != candidate_value):
+                differences[field] = {
+                    self.reference_scraper.parser_backend.name: reference_value,
+                    self.candidate_scraper.parser_backend.name: candidate_value
+                }
+
+        return differences
+
+
+    def check(self, planet_index: dict[str, str]) -> dict:
+        """
+        Compares both backends across every page in the index that's been cached, and returns a report of the differences
+        """
+
+        differences: dict[str, dict] = {}
+        checked_count = 0
+        uncached_names: list[str] = []
+
+        for name, url in planet_index.items():
+            cached = self.response_cache.get(url)
+            if (cached is None):
+                uncached_names.append(name)
+                continue
+
+            reference = self._build_planet_dict(self.reference_scraper, name, cached.content)
+            candidate = self._build_planet_dict(self.candidate_scraper, name, cached.content)
+            checked_count += 1
+
+            planet_differences = self._diff_planet_dicts(reference, candidate)
+            if (planet_differences):
+                differences[name] = planet_differences
+                self.logger.warning(f"Planet {name} differs in fields: {', '.join(planet_differences.keys())}")
+
+        self.logger.info(
+            f"Compared {checked_count} planets between {self.reference_scraper.parser_backend.name} and "
+            f"{self.candidate_scraper.parser_backend.name}, {len(differences)} differed and "
+            f"{len(uncached_names)} weren't cached"
+        )
+
+        return {
+            "reference_backend": self.reference_scraper.parser_backend.name,
+            "candidate_backend": self.candidate_scraper.parser_backend.name,
+            "checked_count": checked_count,
+            "different_count": len(differences),
+            "uncached_names": uncached_names,
+            "differences": differences
+        }
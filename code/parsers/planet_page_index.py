@@ -0,0 +1,19 @@
+class PlanetPageIndex:
+    """
+    Holds everything that the planet extractors need from a planet page: the location, the infobox's data-source ->
+    value mapping, and the text below each section header. Parser backends build it with a single walk over the
+    document, rather than searching the whole tree again for every field.
+    """
+
+    def __init__(self, location: tuple[str, ...], infobox: dict[str, str], sections: dict[str, list[str]]):
+        self.location = location
+        self.infobox = infobox
+        self.sections = sections
+
+
+    def get_infobox_value(self, infobox_key: str) -> str:
+        return self.infobox.get(infobox_key)
+
+
+    def get_section(self, header_text: str) -> list[str]:
+        return self.sections.get(header_text)
@@ -0,0 +1,155 @@
+import itertools
+
+import unidecode
+from selectolax.lexbor import LexborHTMLParser, LexborNode
+
+from .parser_backend import ParserBackend
+from .planet_page_index import PlanetPageIndex
+from .category_page_index import CategoryPageIndex
+
+
+class SelectolaxParserBackend(ParserBackend):
+    """
+    Parses pages with selectolax's bindings to the lexbor HTML engine, which is written in C and much faster than
+    anything that goes through BeautifulSoup. Lexbor always builds the whole document, so partial parses just restrict
+    the walk to the article's content.
+    """
+
+    ## Properties
+
+    @property
+    def name(self) -> str:
+        return "selectolax"
+
+    ## Methods
+
+    def _parse(self, content: bytes) -> LexborHTMLParser:
+        if (isinstance(content, bytes)):
+            content = content.decode("utf-8", errors="replace")
+
+        return LexborHTMLParser(content)
+
+
+    def _is_element(self, node: LexborNode) -> bool:
+        ## Text and comment nodes have pseudo tags like "-text" and "-comment"
+        return not node.tag.startswith("-")
+
+
+    def _iterate_next_siblings(self, node: LexborNode):
+        sibling = node.next
+        while (sibling is not None):
+            yield sibling
+            sibling = sibling.next
+
+
+    def _extract_location(self, location_start_element: LexborNode) -> tuple[str, ...]:
+        if (location_start_element is None):
+            return None
+
+        return tuple(
+            element.text() for element in itertools.islice(self._iterate_next_siblings(location_start_element), 1, 6, 2)
+        )
+
+
+    def _extract_infobox(self, infobox_element: LexborNode) -> dict[str, str]:
+        infobox: dict[str, str] = {}
+        if (infobox_element is None):
+            return infobox
+
+        for datum_container in infobox_element.css("[data-source]"):
+            ## Only the first container for any given key counts
+            infobox_key = datum_container.attributes.get("data-source")
+            if (infobox_key in infobox):
+                continue
+
+            value_container = datum_container.css_first(".pi-data-value")
+            infobox[infobox_key] = value_container.text().lower() if value_container is not None else None
+
+        return {infobox_key: value for infobox_key, value in infobox.items() if value is not None}
+
+
+    def _extract_text_below_header(self, header: LexborNode) -> list[str]:
+        content: list[str] = []
+        for element in self._iterate_next_siblings(header):
+            if (not self._is_element(element)):
+                continue
+
+            if (element.tag in ["span", "p"]):
+                ## Convert the misc unicode characters into their approximate ascii flavor (it's usually just nbsp and
+                ## quote marks, so this is fine)
+                text = unidecode.unidecode(element.text().strip())
+
+                content.extend(text.splitlines())
+            elif (element.tag.startswith("h")):
+                break
+
+        return content
+
+
+    def _index_planet_tree(self, root: LexborNode, header_texts: list[str]) -> PlanetPageIndex:
+        location_start_element: LexborNode = None
+        infobox_element: LexborNode = None
+        headers: dict[str, LexborNode] = {}
+
+        for node in root.traverse():
+            if (not self._is_element(node)):
+                continue
+
+            if (location_start_element is None and node.tag == "b" and node.text().startswith("Location")):
+                location_start_element = node
+
+            if (infobox_element is None and "portable-infobox" in (node.attributes.get("class") or "").split()):
+                infobox_element = node
+
+            ## Section headers are the first tags (ex. the span in <h2><span>Description</span></h2>) whose parent is a
+            ## header, and whose text starts with the header text
+            parent = node.parent
+            if (len(headers) < len(header_texts) and parent is not None and parent.tag.startswith("h")):
+                text = node.text()
+                for header_text in header_texts:
+                    if (header_text not in headers and text.startswith(header_text)):
+                        headers[header_text] = parent
+
+            ## Everything's been found, so there's no need to walk the rest of the document
+            if (
+                location_start_element is not None and
+                infobox_element is not None and
+                len(headers) == len(header_texts)
+            ):
+                break
+
+        return PlanetPageIndex(
+            self._extract_location(location_start_element),
+            self._extract_infobox(infobox_element),
+            {header_text: self._extract_text_below_header(header) for header_text, header in headers.items()}
+        )
+
+
+    def parse_planet_page(self, content: bytes, header_texts: list[str]) -> PlanetPageIndex:
+        tree = self._parse(content)
+
+        if (self.partial_parse):
+            article_content = tree.css_first(f"div.{self.ARTICLE_CONTENT_CLASS}")
+            if (article_content is not None):
+                page_index = self._index_planet_tree(article_content, header_texts)
+                if (self._is_partial_index_usable(page_index)):
+                    return page_index
+
+        return self._index_planet_tree(tree.root, header_texts)
+
+
+    def parse_category_page(self, content: bytes) -> CategoryPageIndex:
+        tree = self._parse(content)
+
+        sections = []
+        for section in tree.css("div.category-page__first-char"):
+            links = [
+                (element.text(), element.attributes.get("href"))
+                for element in section.parent.css("a.category-page__member-link")
+            ]
+            sections.append((section.text().strip(), links))
+
+        next_page_element = tree.css_first(self.CATEGORY_NEXT_PAGE_SELECTOR)
+        next_page_href = next_page_element.attributes.get("href") if next_page_element is not None else None
+
+        return CategoryPageIndex(sections, next_page_href)
@@ -1,27 +1,44 @@
-from json import JSONEncoder
-import string
+import contextlib
+import datetime
+import sys
 import time
-import random
 import logging
-import itertools
-import re
-from typing import Callable
-from urllib import request
 from pathlib import Path
-
-import unidecode
-from bs4 import BeautifulSoup
-from bs4.element import Tag
+from typing import TYPE_CHECKING
 
 import utilities
 from scrapers.planet_category_scraper import PlanetCategoryScraper
 from scrapers.planet_data_scraper import PlanetDataScraper
-from models.planet import Planet
+from scrapers.concurrent_scraper import ConcurrentScraper
+from scrapers.page_revision_scraper import PageRevisionScraper
+from scrapers.retry_queue import RetryQueue
+from networking.rate_limiter import RateLimiter
+from networking.response_cache import ResponseCache
+from networking.http_client import HttpClient
+from networking.circuit_breaker import CircuitBreaker
+from networking.retry_policy import RetryPolicy
+from parsers.parser_backend import ParserBackend, build_parser_backend
+from storage.scrape_journal import ScrapeJournal
+from storage.planet_data_writer import PlanetDataWriter
+from storage.planet_data_reader import PlanetDataReader
+
+## Optional components are only imported when they're enabled (and the parse pipeline only once it's needed), so that
+## short jobs (ex. building the index) don't pay to import them
+if (TYPE_CHECKING):
+    from scrapers.scrape_pipeline import ScrapePipeline
+    from scrapers.mediawiki_category_scraper import MediaWikiCategoryScraper
+    from scrapers.mediawiki_page_scraper import MediaWikiPageScraper
+    from storage.planet_offset_index import PlanetOffsetIndex
+    from storage.planet_database import PlanetDatabase
+    from metrics.metrics_registry import MetricsRegistry
+    from profiling.stage_profiler import StageProfiler
 
 class PlanetScraper:
-    def __init__(self):
-        config = utilities.load_config()
+    def __init__(self, config: dict = None):
+        ## Runs are configured from the config files, unless they're handed a config directly (ex. by a benchmark)
+        config = config if config is not None else utilities.get_config()
         self.logger = utilities.initialize_logging(logging.getLogger(__name__))
+        self._run_started_at = time.time()
 
         root_url: str = config.get("root_url")
         assert(root_url != None)
@@ -35,65 +52,610 @@ class PlanetScraper:
         ## Essential start up of the class has completed, everything else is just setting the pieces into motion
         self.logger.info(f"Initialized {__name__}")
 
-        planet_category_url = f"{root_url}{planet_category_url_path}"
+        self.planet_category_url = f"{root_url}{planet_category_url_path}"
         page_name_starts_with_blacklist: list = config.get("page_name_starts_with_blacklist", [])
-        required_properties: list = config.get("required_properties", [])
-        vague_data_mappings: dict[str, any] = config.get("vague_data_mappings", {})
+        self.required_properties: list = config.get("required_properties", [])
+        self.vague_data_mappings: dict[str, any] = config.get("vague_data_mappings", {})
         output_directory_path: Path = utilities.get_root_path() / Path(config.get("output_directory_path"))
         planet_index_json_name: str = config.get("planet_index_json_name", "planet_index")
-        planet_index_json_path: Path = output_directory_path / f"{planet_index_json_name}.json"
+        self.planet_index_json_path: Path = output_directory_path / f"{planet_index_json_name}.json"
         planet_data_json_name: str = config.get("planet_data_json_name", "planet_data")
-        planet_data_json_path: Path = output_directory_path / f"{planet_data_json_name}.json"
+        planet_data_format: str = config.get("planet_data_format", PlanetDataWriter.JSON)
+        self.planet_data_json_path: Path = output_directory_path / f"{planet_data_json_name}.{planet_data_format}"
+        planet_revisions_json_name: str = config.get("planet_revisions_json_name", "planet_revisions")
+        self.planet_revisions_json_path: Path = output_directory_path / f"{planet_revisions_json_name}.json"
+        api_url = f"{root_url}{config.get('api_url_path', '/api.php')}"
+        self.incremental_refresh: bool = config.get("incremental_refresh", False)
+        self.compare_parser_backend: str = config.get("compare_parser_backend")
+        self.parser_differences_json_path: Path = output_directory_path / "parser_differences.json"
+        planet_journal_name: str = config.get("planet_journal_name", "planet_journal")
+        self.planet_journal_path: Path = output_directory_path / f"{planet_journal_name}.ndjson"
+        max_concurrent_scrapes: int = config.get("max_concurrent_scrapes", 1)
+        max_concurrent_scrapes_per_host: int = config.get("max_concurrent_scrapes_per_host", 1)
+        parse_processes: int = config.get("parse_processes", 0)
+        parse_queue_size: int = config.get("parse_queue_size", 32)
+        scrape_backend: str = config.get("scrape_backend", "html")
+        assert(scrape_backend in ["html", "mediawiki_api"])
+        metrics_directory_path: Path = utilities.get_root_path() / Path(config.get("metrics_directory_path", "out/metrics"))
+        self.metrics_prometheus_path: Path = (
+            metrics_directory_path / f"{config.get('metrics_prometheus_name', 'planet_scraper')}.prom"
+        )
+        self.metrics_summary_json_path: Path = (
+            metrics_directory_path / f"{config.get('metrics_summary_json_name', 'run_summary')}.json"
+        )
+
+        ## Init the metrics that every stage of the run records to, so it can be seen where the time went
+        self.metrics: "MetricsRegistry" = None
+        if (config.get("metrics_enabled", False)):
+            from metrics.metrics_registry import MetricsRegistry
+
+            self.metrics = MetricsRegistry()
+
+        ## And the profiler, for digging into why a run is slow or using too much memory
+        self.profiles_directory_path: Path = output_directory_path / config.get("profiles_directory_name", "profiles")
+        self.profiler: "StageProfiler" = None
+        if (config.get("profiling_enabled", False)):
+            from profiling.stage_profiler import StageProfiler
 
-        ## Init the scrapers
-        self.planet_category_scraper = PlanetCategoryScraper(
-            root_url,
-            url_query_param_format_string,
-            page_name_starts_with_blacklist
+            self.profiler = StageProfiler(
+                config.get("profiling_sample_every", 10),
+                config.get("profiling_top_count", 30),
+                config.get("profiling_trace_memory", True)
+            )
+
+        ## Init the raw response cache, so unchanged pages don't need to be downloaded again
+        self.response_cache: ResponseCache = None
+        if (config.get("response_cache_enabled", False)):
+            self.response_cache = ResponseCache(
+                utilities.get_root_path() / Path(config.get("response_cache_directory_path", "cache")),
+                config.get("response_cache_max_size_mb", 256) * 1024 * 1024,
+                config.get("response_cache_max_age_days", 30) * 24 * 60 * 60,
+                config.get("response_cache_offline", False),
+                self.metrics
+            )
+            self.response_cache.evict()
+
+        ## Init the parser that turns the raw pages into data
+        self.partial_parse: bool = config.get("partial_parse", False)
+        self.parser_backend = build_parser_backend(config.get("parser_backend", "html.parser"), self.partial_parse)
+
+        ## Init the scrapers, which all share a single pool of connections, rate limiter, and circuit breaker since
+        ## they're hitting the same server
+        self.circuit_breaker = CircuitBreaker(
+            config.get("circuit_breaker_error_rate", 0.5),
+            config.get("circuit_breaker_window_size", 20),
+            config.get("circuit_breaker_min_requests", 10),
+            config.get("circuit_breaker_open_seconds", 30)
+        )
+        self.http_client = HttpClient(
+            config.get("http_user_agent", "PlanetScraper"),
+            config.get("http_timeout_seconds", 30),
+            config.get("http_max_idle_connections_per_host", max_concurrent_scrapes_per_host),
+            circuit_breaker=self.circuit_breaker,
+            metrics=self.metrics
         )
-        self.planet_data_scraper = PlanetDataScraper(required_properties, vague_data_mappings)
+        self.rate_limiter = RateLimiter(
+            config.get("rate_limit_requests_per_second", 1),
+            config.get("rate_limit_burst", 1),
+            config.get("rate_limit_min_requests_per_second", 0.1),
+            config.get("rate_limit_slow_response_seconds", 2),
+            config.get("rate_limit_backoff_factor", 0.5),
+            config.get("rate_limit_recovery_step", 0.05),
+            self.metrics
+        )
+        self.concurrent_scraper = ConcurrentScraper(max_concurrent_scrapes, max_concurrent_scrapes_per_host)
+        self.planet_category_scraper: "PlanetCategoryScraper | MediaWikiCategoryScraper"
+        self.mediawiki_page_scraper: "MediaWikiPageScraper" = None
+        if (scrape_backend == "mediawiki_api"):
+            from scrapers.mediawiki_category_scraper import MediaWikiCategoryScraper
+            from scrapers.mediawiki_page_scraper import MediaWikiPageScraper
 
-        ## Get a mapping of all planets to their wiki page urls
-        self.planet_index: dict[str, str]
-        try:
-            self.planet_index = utilities.load_json(planet_index_json_path)
-            self.logger.info(f"Loaded {len(self.planet_index.items())} planets from cache: {planet_index_json_path}")
-        except FileNotFoundError:
-            self.planet_index = self.planet_category_scraper.scrape(None, planet_category_url)
-            self.logger.info(f"Loaded {len(self.planet_index.items())} planets from url: {planet_category_url}")
+            ## Go through the API, which can list the category and render planet pages in far fewer requests
+            self.planet_category_scraper = MediaWikiCategoryScraper(
+                root_url,
+                api_url,
+                page_name_starts_with_blacklist,
+                self.http_client,
+                self.rate_limiter,
+                self.response_cache
+            )
+            self.mediawiki_page_scraper = MediaWikiPageScraper(
+                root_url,
+                api_url,
+                config.get("api_batch_size", 20),
+                self.http_client,
+                self.rate_limiter,
+                self.response_cache
+            )
+        else:
+            self.planet_category_scraper = PlanetCategoryScraper(
+                root_url,
+                url_query_param_format_string,
+                page_name_starts_with_blacklist,
+                self.parser_backend,
+                self.concurrent_scraper,
+                self.http_client,
+                self.rate_limiter,
+                self.response_cache
+            )
+        self.planet_data_scraper = PlanetDataScraper(
+            self.required_properties,
+            self.vague_data_mappings,
+            self.parser_backend,
+            self.http_client,
+            self.rate_limiter,
+            self.response_cache,
+            self.metrics,
+            self.profiler
+        )
+        self.page_revision_scraper = PageRevisionScraper(root_url, api_url, self.http_client, self.rate_limiter)
+        self.parse_processes = parse_processes
+        self.parse_queue_size = parse_queue_size
+        self._scrape_pipeline: "ScrapePipeline" = None
+
+        ## Page revisions can't be looked up without the network, so they're only tracked when online
+        self.offline = self.response_cache is not None and self.response_cache.offline
+        if (self.incremental_refresh and self.offline):
+            raise RuntimeError("Incremental refreshes need to check page revisions, and can't be run offline")
+
+        ## Planets that fail with a transient error get retried at the end of the run
+        self.retry_policy = RetryPolicy(
+            config.get("retry_max_attempts", 3),
+            config.get("retry_base_delay_seconds", 2),
+            config.get("retry_max_delay_seconds", 60)
+        )
+
+        ## Every planet gets journaled as soon as it's been built, so that an interrupted run can pick up where it left off
+        self.scrape_journal = ScrapeJournal(self.planet_journal_path, config.get("journal_fsync_batch_size", 25))
+        ## And streamed out to the planet data store, rather than being held in memory until the end of the run
+        self.planet_data_writer = PlanetDataWriter(
+            self.planet_data_json_path,
+            planet_data_format,
+            config.get("planet_data_indent", 4)
+        )
+        ## Along with an index of where each planet is in the store, so single planets can be loaded without parsing it all
+        self.planet_offset_index: "PlanetOffsetIndex" = None
+        if (config.get("planet_data_offset_index", False)):
+            from storage.planet_offset_index import PlanetOffsetIndex
+
+            self.planet_offset_index = PlanetOffsetIndex(self.planet_data_json_path)
+        ## And upserted into the planet database as they're built, for services that want to query the planets directly
+        self.planet_database: "PlanetDatabase" = None
+        if (config.get("planet_database_enabled", False)):
+            from storage.planet_database import PlanetDatabase
 
-            utilities.store_json(self.planet_index, planet_index_json_path)
-            self.logger.info(f"Stored {len(self.planet_index.items())} planets in cache: {planet_index_json_path}")
+            planet_database_name: str = config.get("planet_database_name", "planet_data")
+            self.planet_database = PlanetDatabase(
+                output_directory_path / f"{planet_database_name}{PlanetDatabase.SUFFIX}"
+            )
 
-        ## Extract planetary info for each planet, and save it
-        self.planets: list[Planet] = self._build_planets(self.planet_index)
-        self.logger.info(f"Built {len(self.planets)} planets")
+        self.planet_index: dict[str, str] = None
 
-        ## Save planet data as a monolithic json file
-        self._store_planets(self.planets, planet_data_json_path)
-        self.logger.info(f"Stored {len(self.planets)} planets in store: {planet_data_json_path}")
+    ## Properties
 
+    @property
+    def scrape_pipeline(self) -> "ScrapePipeline":
+        if (self._scrape_pipeline is None):
+            from scrapers.scrape_pipeline import ScrapePipeline
 
-    def _build_planets(self, planet_index: dict[str, str]) -> list[Planet]:
-        planets: list[Planet] = []
+            self._scrape_pipeline = ScrapePipeline(
+                self.concurrent_scraper,
+                self.planet_data_scraper,
+                self.parse_processes,
+                self.parse_queue_size,
+                self.mediawiki_page_scraper
+            )
 
-        for name, url in planet_index.items():
+        return self._scrape_pipeline
+
+    ## Methods
+
+    def build_index(self, refresh: bool = False) -> dict[str, str]:
+        """
+        Gets a mapping of all planets to their wiki page urls, from the cached index if there is one (and it's not being
+        refreshed), or else from the planet category
+        """
+
+        self.planet_index = None
+        if (not refresh):
             try:
-                planet = self.planet_data_scraper.scrape(name, url)
-            except Exception as e:
-                self.logger.exception(e)
+                self.planet_index = utilities.load_json(self.planet_index_json_path)
+                self.logger.info(
+                    f"Loaded {len(self.planet_index.items())} planets from cache: {self.planet_index_json_path}"
+                )
+            except FileNotFoundError:
+                pass
+
+        if (self.planet_index is None):
+            with self._run_stage("index"):
+                self.planet_index = self.planet_category_scraper.scrape(None, self.planet_category_url)
+            self.logger.info(f"Loaded {len(self.planet_index.items())} planets from url: {self.planet_category_url}")
+
+            ## Redirects need the API, which isn't cached, so offline runs make do with the crawled pages as they are
+            if (not self.offline):
+                with self._run_stage("redirects"):
+                    self._remove_redirect_aliases()
+
+            utilities.store_json(self.planet_index, self.planet_index_json_path)
+            self.logger.info(f"Stored {len(self.planet_index.items())} planets in cache: {self.planet_index_json_path}")
+
+        if (self.planet_database is not None):
+            self.planet_database.store_index(self.planet_index)
+            self.planet_database.disconnect()
+
+        return self.planet_index
+
+
+    def scrape(self, resume: bool = False):
+        """
+        Scrapes every planet in the index (building it first if need be), and streams them out to the planet data store.
+        Resumed runs skip the planets that an interrupted run's journal has already finished.
+        """
+
+        if (self.incremental_refresh and resume):
+            raise RuntimeError("Incremental refreshes only scrape what's changed already, and can't be resumed")
+
+        self._run_started_at = time.time()
+
+        ## Incremental refreshes always need a fresh index, so that new and removed pages are picked up
+        self.build_index(self.incremental_refresh)
+
+        ## Rather than scraping, check that the configured parser backend and the comparison backend build the same
+        ## planets out of the cached pages
+        if (self.compare_parser_backend is not None):
+            self._compare_parser_backends(
+                build_parser_backend(self.compare_parser_backend, self.partial_parse),
+                self.required_properties,
+                self.vague_data_mappings,
+                self.parser_differences_json_path
+            )
+            self._finish_run()
+            return
+
+        if (self.incremental_refresh):
+            ## Grab the latest revision of every page before scraping it, so that any edits made mid-run get picked up
+            ## by the next incremental refresh. Only refreshes need them, so full scrapes don't depend on the api.
+            latest_revisions: dict[str, dict] = {}
+            if (not self.offline):
+                with self._run_stage("revisions"):
+                    latest_revisions = self.page_revision_scraper.scrape_all(self.planet_index)
+
+            self._refresh_planets(latest_revisions, self.planet_data_json_path, self.planet_revisions_json_path)
+            self._finish_run()
+            return
+
+        ## Extract planetary info for each planet (skipping any that a resumed run has already finished), and stream it
+        ## out to the store as it's built
+        pending_planet_index = self.planet_index
+        resumed_planet_data: dict[str, dict] = {}
+        if (resume):
+            completed_names = self.scrape_journal.load_completed_names()
+            pending_planet_index = {
+                name: url for name, url in self.planet_index.items() if name not in completed_names
+            }
+            resumed_planet_data = self._get_built_planet_data(self.scrape_journal.load_entries())
+            self.logger.info(
+                f"Resuming with {len(self.planet_index) - len(pending_planet_index)} planets already done from journal: "
+                f"{self.planet_journal_path}"
+            )
+
+        with (
+            self.scrape_journal.open(resume),
+            self.planet_data_writer.open() as planet_data_writer,
+            self._open_planet_database()
+        ):
+            ## Planets that were built before the run was interrupted go out first
+            for name, planet in resumed_planet_data.items():
+                self._write_planet(planet_data_writer, name, planet)
+
+            with self._run_stage("build"):
+                failed_names = self._build_planets(pending_planet_index, planet_data_writer)
+
+        if (self.planet_offset_index is not None):
+            self.planet_offset_index.build()
+
+        if (failed_names):
+            self.logger.warning(f"Failed to build {len(failed_names)} planets, run again with --resume to retry them")
+
+        self._finish_run()
+
+
+    def _time(self, name: str, labels: dict[str, str] = None) -> contextlib.AbstractContextManager:
+        if (self.metrics is None):
+            return contextlib.nullcontext()
+
+        return self.metrics.time(name, labels)
+
+
+    def _sample(self, stage: str) -> contextlib.AbstractContextManager:
+        if (self.profiler is None):
+            return contextlib.nullcontext()
+
+        return self.profiler.sample(stage)
+
+
+    def _open_planet_database(self) -> contextlib.AbstractContextManager:
+        if (self.planet_database is None):
+            return contextlib.nullcontext()
+
+        return self.planet_database.open()
+
+
+    def _write_planet(self, planet_data_writer: PlanetDataWriter, name: str, planet_data: dict):
+        planet_data_writer.write(name, planet_data)
+
+        if (self.planet_database is not None):
+            self.planet_database.write(name, planet_data)
+
+
+    @contextlib.contextmanager
+    def _run_stage(self, stage: str):
+        with self._time("stage_seconds", {"stage": stage}):
+            if (self.profiler is None):
+                yield
+                return
+
+            with self.profiler.trace_stage(stage):
+                yield
+
+
+    def _record_planet_result(self, result: str):
+        if (self.metrics is not None):
+            self.metrics.increment("planets_total", labels={"result": result})
+
+
+    def _finish_run(self):
+        self._export_metrics()
+
+        if (self.profiler is not None):
+            self.profiler.write_reports(self.profiles_directory_path)
+
+
+    def _export_metrics(self):
+        """
+        Exports the run's metrics as a Prometheus textfile and a JSON run summary, and logs where the time went
+        """
+
+        if (self.metrics is None):
+            return
+
+        run_seconds = time.time() - self._run_started_at
+        built_count = self.metrics.get_counter("planets_total", {"result": "built"})
+        rejected_count = self.metrics.get_counter("planets_total", {"result": "rejected"})
+        failed_count = self.metrics.get_counter("planets_total", {"result": "failed"})
+        attempted_count = built_count + rejected_count + failed_count
+
+        self.metrics.set_gauge("run_seconds", run_seconds)
+        self.metrics.set_gauge("run_completed_timestamp_seconds", time.time())
+        self.metrics.set_gauge("planet_reject_ratio", rejected_count / attempted_count if attempted_count else 0)
+        self.metrics.set_gauge("planet_failure_ratio", failed_count / attempted_count if attempted_count else 0)
+        self.metrics.set_gauge("circuit_breaker_trips", self.circuit_breaker.trip_count)
+
+        self.metrics.write_prometheus(self.metrics_prometheus_path)
+        self.metrics.write_summary(self.metrics_summary_json_path, {
+            "started_at": datetime.datetime.fromtimestamp(self._run_started_at, datetime.timezone.utc).isoformat(),
+            "run_seconds": run_seconds
+        })
+
+        ## Fetching and parsing overlap (and run on several threads/processes at once), so these are summed across
+        ## them rather than being a share of the run
+        self.logger.info(
+            f"Finished in {run_seconds:.1f} seconds. Spent {self.metrics.get_histogram_sum('fetch_seconds'):.1f} "
+            f"seconds fetching, {self.metrics.get_histogram_sum('rate_limit_wait_seconds'):.1f} cooling down, "
+            f"{self.metrics.get_histogram_sum('parse_seconds'):.1f} parsing, "
+            f"{self.metrics.get_histogram_sum('extract_seconds'):.1f} extracting, and "
+            f"{self.metrics.get_histogram_sum('store_seconds'):.1f} storing. Stored metrics in: "
+            f"{self.metrics_prometheus_path}, {self.metrics_summary_json_path}"
+        )
+
+
+    def _remove_redirect_aliases(self):
+        """
+        Drops any pages in the index that show the same page as another one (ex. a redirect to a page that's already in
+        the index), so the same page is never fetched or built twice. Of each group, the page that isn't a redirect is
+        kept, or else the first one in the index. Failing to resolve the redirects doesn't hold up the run.
+        """
+
+        try:
+            resolved_titles = self.page_revision_scraper.resolve_all(self.planet_index)
+        except Exception as e:
+            self.logger.warning(f"Unable to resolve redirects, so aliases of the same page may be scraped twice: {e!r}")
+            return
+
+        kept_names: dict[str, str] = {}
+        for name, url in self.planet_index.items():
+            resolved_title = resolved_titles.get(name)
+            if (resolved_title is None):
                 continue
 
-            planets.append(planet)
-            self.logger.info(f"Built planet {planet.name}.")
+            if (resolved_title not in kept_names or self.page_revision_scraper.get_page_title(url) == resolved_title):
+                kept_names[resolved_title] = name
+
+        alias_names = [
+            name for name in self.planet_index
+            if name in resolved_titles and kept_names[resolved_titles[name]] != name
+        ]
+        for name in alias_names:
+            self.logger.debug(f"Skipping {name}, as it's an alias of {kept_names[resolved_titles[name]]}")
+            del self.planet_index[name]
+
+        if (alias_names):
+            self.logger.info(f"Skipped {len(alias_names)} pages that show the same page as another in the index")
+
+
+    def _compare_parser_backends(
+            self,
+            candidate_parser_backend: ParserBackend,
+            required_properties: list,
+            vague_data_mappings: dict[str, any],
+            path: Path
+    ):
+        if (self.response_cache is None):
+            raise RuntimeError("Comparing parser backends works off of cached pages, so the response cache must be enabled")
+
+        candidate_scraper = PlanetDataScraper(
+            required_properties,
+            vague_data_mappings,
+            candidate_parser_backend,
+            self.http_client,
+            self.rate_limiter,
+            self.response_cache
+        )
+        from parsers.parser_equivalence_checker import ParserEquivalenceChecker
+
+        checker = ParserEquivalenceChecker(self.planet_data_scraper, candidate_scraper, self.response_cache)
+
+        report = checker.check(self.planet_index)
+        utilities.store_json(report, path)
+        self.logger.info(f"Stored parser differences for {report['different_count']} planets in: {path}")
 
-        return planets
 
+    def _refresh_planets(
+            self,
+            latest_revisions: dict[str, dict],
+            planet_data_json_path: Path,
+            planet_revisions_json_path: Path
+    ):
+        """
+        Only rebuilds the planets whose pages have been added or edited since the last run, and merges them into the
+        existing planet data
+        """
 
-    def _store_planets(self, planets: list[Planet], path: Path):
-        data = {planet.name: planet.to_dict() for planet in planets}
+        try:
+            planet_data: dict[str, dict] = dict(PlanetDataReader(planet_data_json_path).iterate_dicts())
+            stored_revisions: dict[str, dict] = utilities.load_json(planet_revisions_json_path)
+        except FileNotFoundError:
+            ## Without a previous run to compare against, everything counts as changed
+            planet_data = {}
+            stored_revisions = {}
+
+        changed_planet_index: dict[str, str] = {}
+        for name, url in self.planet_index.items():
+            stored_revision = stored_revisions.get(name)
+            latest_revision = latest_revisions.get(name)
+            if (
+                stored_revision is None or
+                latest_revision is None or
+                stored_revision.get("url") != url or
+                stored_revision.get("revision_id") != latest_revision.get("revision_id")
+            ):
+                changed_planet_index[name] = url
+
+        removed_names = [name for name in planet_data if name not in self.planet_index]
+        self.logger.info(
+            f"Refreshing {len(changed_planet_index)} changed planets, and dropping {len(removed_names)} removed planets"
+        )
+
+        with (
+            self.scrape_journal.open(),
+            self.planet_data_writer.open() as planet_data_writer,
+            self._open_planet_database()
+        ):
+            ## Unchanged planets carry over as they are
+            for name in self.planet_index:
+                if (name not in changed_planet_index and name in planet_data):
+                    self._write_planet(planet_data_writer, name, planet_data[name])
+
+            with self._run_stage("build"):
+                failed_names = self._build_planets(changed_planet_index, planet_data_writer)
+
+            ## Planets that failed to build keep their previous data (and revision, so they're tried again next time).
+            ## Planets that no longer have their required properties are dropped.
+            for name in failed_names:
+                if (name in planet_data):
+                    self._write_planet(planet_data_writer, name, planet_data[name])
+
+        if (self.planet_offset_index is not None):
+            self.planet_offset_index.build()
+
+        merged_revisions: dict[str, dict] = {}
+        for name in self.planet_index:
+            if (name in changed_planet_index and name not in failed_names):
+                if (name in latest_revisions):
+                    merged_revisions[name] = latest_revisions[name]
+            elif (name in stored_revisions):
+                merged_revisions[name] = stored_revisions[name]
+
+        self._store_revisions(merged_revisions, planet_revisions_json_path)
+
+
+    def _build_planets(self, planet_index: dict[str, str], planet_data_writer: PlanetDataWriter) -> set[str]:
+        """
+        Builds the planets in the index, and journals and writes out each one as soon as it's done. Planets that fail
+        with a transient error are deferred, and retried (with backoff) once everything else has been built. Returns the
+        names of the planets that couldn't be built.
+        """
+
+        built_count = 0
+        failed_names = set()
+        recovered_count = 0
+        retry_queue = RetryQueue(self.retry_policy)
+
+        pending_planet_index = planet_index
+        while (pending_planet_index):
+            scrape_results = self.scrape_pipeline.scrape_all(pending_planet_index)
+            for name, planet, exception in scrape_results:
+                if (exception is not None):
+                    if (retry_queue.defer(name, planet_index[name], exception)):
+                        if (self.metrics is not None):
+                            self.metrics.increment("planet_deferrals_total")
+                        self.logger.warning(f"Unable to build planet {name}, deferring it to retry later: {exception!r}")
+                        continue
+
+                    self.logger.error(f"Unable to build planet {name}.", exc_info=exception)
+                    self.scrape_journal.record_failed(name, planet_index[name], repr(exception))
+                    failed_names.add(name)
+                    self._record_planet_result("failed")
+                    continue
+
+                if (retry_queue.get_failed_attempts(name) > 0):
+                    recovered_count += 1
+
+                if (planet is None):
+                    self.logger.info(f"Skipped planet {name}, as it's missing required properties.")
+                    self.scrape_journal.record_rejected(name)
+                    self._record_planet_result("rejected")
+                    continue
+
+                with self._time("store_seconds"), self._sample("store"):
+                    planet_data = planet.to_dict()
+                    self.scrape_journal.record_built(name, planet_data)
+                    self._write_planet(planet_data_writer, name, planet_data)
+                built_count += 1
+                self._record_planet_result("built")
+                self.logger.info(f"Built planet {planet.name}.")
+
+            pending_planet_index = retry_queue.pop_ready()
+
+        self.logger.info(
+            f"Built {built_count} planets, and failed to build {len(failed_names)}. Retried {retry_queue.retry_count} "
+            f"failed scrapes ({recovered_count} recovered), and paused for a struggling server "
+            f"{self.circuit_breaker.trip_count} times."
+        )
+
+        return failed_names
+
+
+    def _get_built_planet_data(self, journal_entries: dict[str, dict]) -> dict[str, dict]:
+        ## Scrapes finish in any order, so put the planets back into the same order as the index
+        return {
+            name: journal_entries[name]["planet"]
+            for name in self.planet_index
+            if name in journal_entries and journal_entries[name]["status"] == ScrapeJournal.BUILT
+        }
+
+
+    def _store_revisions(self, revisions: dict[str, dict], path: Path):
+        ## Keep the url alongside the revision, so a page that moves is treated as changed
+        data = {name: {"url": self.planet_index[name], **revision} for name, revision in revisions.items()}
 
         utilities.store_json(data, path)
+        self.logger.info(f"Stored {len(data)} page revisions in store: {path}")
+
 
+## Parse processes may re-import this module (ex. on Windows), so only start scraping when it's run directly
+## Scrapes are run through the CLI, this just keeps `python planet_scraper.py` working as a shortcut for `cli.py scrape`
+if (__name__ == "__main__"):
+    from cli import main
 
-PlanetScraper()
\ No newline at end of file
+    main(["scrape", *sys.argv[1:]])
@@ -0,0 +1,215 @@
+import cProfile
+import io
+import logging
+import pstats
+import threading
+import tracemalloc
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator
+
+import utilities
+
+
+class _RawProfileStats:
+    """
+    Wraps stats that were collected in another process, so that pstats can add them like any other profile
+    """
+
+    def __init__(self, stats: dict):
+        self.stats = stats
+
+
+    def create_stats(self):
+        pass
+
+
+class StageProfiler:
+    """
+    Opt-in profiler for the scrape's stages. Per page stages (ex. fetching or parsing a page) are profiled with cProfile
+    on whichever thread (or process) runs them, but only every sample_every'th call to keep the overhead down. Whole
+    run stages (ex. building the index) have their memory traced with tracemalloc, for their peak usage and the sites
+    that allocated the most over the stage. Hotspot tables and memory reports are written out once the run's done.
+    """
+
+    ## Don't count the profiler's own bookkeeping as allocations made by the stage
+    _MEMORY_TRACE_FILTERS = (
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, pstats.__file__),
+        tracemalloc.Filter(False, cProfile.__file__),
+        tracemalloc.Filter(False, __file__),
+        tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+        tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+        tracemalloc.Filter(False, "<unknown>")
+    )
+
+    def __init__(self, sample_every: int = 1, top_count: int = 30, trace_memory: bool = True):
+        self.logger = utilities.initialize_logging(logging.getLogger(__name__))
+
+        assert(sample_every >= 1)
+        assert(top_count >= 1)
+
+        self.sample_every = sample_every
+        self.top_count = top_count
+        self.trace_memory = trace_memory
+
+        self._call_counts: dict[str, int] = {}
+        self._sampled_counts: dict[str, int] = {}
+        self._stage_stats: dict[str, pstats.Stats] = {}
+        self._memory_stages: dict[str, dict] = {}
+        self._lock = threading.Lock()
+        ## Only one profiler can be active at a time (which Python 3.12+ enforces), even across threads
+        self._sample_lock = threading.Lock()
+
+
+    def _should_sample(self, stage: str) -> bool:
+        with self._lock:
+            call_count = self._call_counts.get(stage, 0)
+            self._call_counts[stage] = call_count + 1
+
+        return call_count % self.sample_every == 0
+
+
+    def _add_stats(self, stage: str, profile: cProfile.Profile | _RawProfileStats, sampled_count: int = 1):
+        with self._lock:
+            stage_stats = self._stage_stats.get(stage)
+            if (stage_stats is None):
+                stage_stats = self._stage_stats[stage] = pstats.Stats()
+
+            stage_stats.add(profile)
+            self._sampled_counts[stage] = self._sampled_counts.get(stage, 0) + sampled_count
+
+
+    @contextmanager
+    def sample(self, stage: str) -> Iterator[None]:
+        """
+        Profiles the body of the with statement, if it's one of the calls to the stage that's being sampled. Calls that
+        come in while another thread's call is being profiled are skipped, rather than profiled on top of it.
+        """
+
+        if (not self._should_sample(stage)):
+            yield
+            return
+
+        if (not self._sample_lock.acquire(blocking=False)):
+            yield
+            return
+
+        try:
+            profile = cProfile.Profile()
+            profile.enable()
+            try:
+                yield
+            finally:
+                profile.disable()
+                self._add_stats(stage, profile)
+        finally:
+            self._sample_lock.release()
+
+
+    @contextmanager
+    def trace_stage(self, stage: str) -> Iterator[None]:
+        """
+        Traces the memory allocated over the body of the with statement (across every thread in this process)
+        """
+
+        if (not self.trace_memory):
+            yield
+            return
+
+        if (not tracemalloc.is_tracing()):
+            tracemalloc.start()
+
+        tracemalloc.reset_peak()
+        start_bytes, _ = tracemalloc.get_traced_memory()
+        start_snapshot = tracemalloc.take_snapshot().filter_traces(self._MEMORY_TRACE_FILTERS)
+        try:
+            yield
+        finally:
+            end_bytes, peak_bytes = tracemalloc.get_traced_memory()
+            snapshot = tracemalloc.take_snapshot().filter_traces(self._MEMORY_TRACE_FILTERS)
+            top_allocations = snapshot.compare_to(start_snapshot, "lineno")[:self.top_count]
+
+            self._memory_stages[stage] = {
+                "start_bytes": start_bytes,
+                "end_bytes": end_bytes,
+                "peak_bytes": peak_bytes,
+                "top_allocations": [
+                    {
+                        "site": str(statistic.traceback),
+                        "size_bytes": statistic.size,
+                        "size_diff_bytes": statistic.size_diff,
+                        "count": statistic.count,
+                        "count_diff": statistic.count_diff
+                    }
+                    for statistic in top_allocations
+                ]
+            }
+            self.logger.info(
+                f"Stage {stage} peaked at {peak_bytes / 1024 / 1024:.1f} MB traced, and ended "
+                f"{(end_bytes - start_bytes) / 1024 / 1024:+.1f} MB from where it started"
+            )
+
+
+    def drain(self) -> dict:
+        """
+        Hands back the profiles sampled so far and starts over, so that profiles sampled in another process can be
+        shipped back and merged into the main profiler
+        """
+
+        with self._lock:
+            snapshot = {
+                stage: (stage_stats.stats, self._sampled_counts.get(stage, 0))
+                for stage, stage_stats in self._stage_stats.items()
+            }
+            self._stage_stats = {}
+            self._sampled_counts = {}
+
+        return snapshot
+
+
+    def merge(self, snapshot: dict):
+        for stage, (stats, sampled_count) in snapshot.items():
+            self._add_stats(stage, _RawProfileStats(stats), sampled_count)
+
+
+    def _build_hotspot_table(self, stage: str, stage_stats: pstats.Stats) -> str:
+        stream = io.StringIO()
+        stream.write(
+            f"Stage {stage}: profiled {self._sampled_counts.get(stage, 0)} calls, sampling every {self.sample_every}\n"
+        )
+
+        stage_stats.stream = stream
+        for sort_key in [pstats.SortKey.CUMULATIVE, pstats.SortKey.TIME]:
+            stream.write(f"\nTop {self.top_count} by {sort_key.value} time\n")
+            stage_stats.sort_stats(sort_key).print_stats(self.top_count)
+
+        return stream.getvalue()
+
+
+    def write_reports(self, directory_path: Path):
+        """
+        Writes a hotspot table (and a .pstats dump, for pstats or snakeviz) for each profiled stage, along with the
+        memory report for the traced stages
+        """
+
+        directory_path.mkdir(parents=True, exist_ok=True)
+
+        with self._lock:
+            stage_stats = dict(self._stage_stats)
+
+        for stage, stats in stage_stats.items():
+            stats.dump_stats(directory_path / f"{stage}.pstats")
+            with open(directory_path / f"{stage}_hotspots.txt", "w", encoding="utf-8") as fd:
+                fd.write(self._build_hotspot_table(stage, stats))
+
+        if (self._memory_stages):
+            utilities.store_json(self._memory_stages, directory_path / "memory.json")
+
+        if (tracemalloc.is_tracing()):
+            tracemalloc.stop()
+
+        self.logger.info(
+            f"Stored profiles of {len(stage_stats)} stages, and the memory of {len(self._memory_stages)} stages in: "
+            f"{directory_path}"
+        )
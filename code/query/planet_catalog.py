@@ -0,0 +1,179 @@
+import logging
+from bisect import bisect_left, bisect_right
+from pathlib import Path
+from typing import Iterable
+
+import utilities
+from models.planet import Planet, LOCATION_FIELDS, NUMERIC_FIELDS
+from storage.planet_data_reader import PlanetDataReader
+
+
+class PlanetCatalog:
+    """
+    Answers queries over a set of planets without scanning every one of them. Each location field (galaxy, cluster, and
+    system) gets a hash index of value -> planets, and each numeric field gets a sorted index for O(log n) range
+    lookups. Compound queries intersect the matches for each filter, starting from the most selective one.
+
+    Planets that are missing a value (None) are indexed separately, so range queries never match them unless they're
+    explicitly asked for, and they can be looked up on their own with find_missing.
+    """
+
+    def __init__(self, planets: Iterable[Planet]):
+        self.logger = utilities.initialize_logging(logging.getLogger(__name__))
+
+        self._planets: list[Planet] = list(planets)
+        self._positions_by_name: dict[str, int] = {planet.name: position for position, planet in enumerate(self._planets)}
+
+        ## Maps each location field to its value -> planet positions index. Missing values are indexed under None.
+        self._location_indexes: dict[str, dict[str, list[int]]] = {field: {} for field in LOCATION_FIELDS}
+        for position, planet in enumerate(self._planets):
+            for field, index in self._location_indexes.items():
+                index.setdefault(getattr(planet, field), []).append(position)
+
+        ## Maps each numeric field to its (sorted values, planet positions) index, along with the planets missing it
+        self._numeric_indexes: dict[str, tuple[list[float], list[int]]] = {}
+        self._missing_numeric_positions: dict[str, list[int]] = {}
+        for field in NUMERIC_FIELDS:
+            present = []
+            missing = []
+            for position, planet in enumerate(self._planets):
+                value = getattr(planet, field)
+                if (value is None):
+                    missing.append(position)
+                else:
+                    present.append((value, position))
+
+            present.sort()
+            self._numeric_indexes[field] = ([value for value, _ in present], [position for _, position in present])
+            self._missing_numeric_positions[field] = missing
+
+    ## Properties
+
+    @property
+    def planets(self) -> list[Planet]:
+        return self._planets
+
+    ## Methods
+
+    @classmethod
+    def load(cls, path: Path) -> "PlanetCatalog":
+        """
+        Loads a catalog from a planet data store, either a json object of planets, or newline delimited json
+        """
+
+        planets = list(PlanetDataReader(path))
+        catalog = cls(planets)
+        catalog.logger.info(f"Loaded {len(planets)} planets into the catalog from: {path}")
+
+        return catalog
+
+
+    def __len__(self) -> int:
+        return len(self._planets)
+
+
+    def _get_planets(self, positions: Iterable[int]) -> list[Planet]:
+        ## Always hand back planets in the same order as the catalog, no matter which index found them
+        return [self._planets[position] for position in sorted(positions)]
+
+
+    def _get_location_positions(self, field: str, value: str) -> list[int]:
+        if (field not in self._location_indexes):
+            raise ValueError(f"Unknown location field {field}, must be one of {', '.join(LOCATION_FIELDS)}")
+
+        return self._location_indexes[field].get(value, [])
+
+
+    def _get_range_positions(self, field: str, minimum: float = None, maximum: float = None) -> list[int]:
+        if (field not in self._numeric_indexes):
+            raise ValueError(f"Unknown numeric field {field}, must be one of {', '.join(NUMERIC_FIELDS)}")
+
+        values, positions = self._numeric_indexes[field]
+        start = bisect_left(values, minimum) if minimum is not None else 0
+        end = bisect_right(values, maximum) if maximum is not None else len(values)
+
+        return positions[start:end]
+
+
+    def get(self, name: str) -> Planet:
+        position = self._positions_by_name.get(name)
+        if (position is None):
+            return None
+
+        return self._planets[position]
+
+
+    def find_by_location(self, field: str, value: str) -> list[Planet]:
+        """
+        Finds the planets whose location field (galaxy, cluster, or system) matches the value exactly
+        """
+
+        return self._get_planets(self._get_location_positions(field, value))
+
+
+    def find_in_range(
+            self,
+            field: str,
+            minimum: float = None,
+            maximum: float = None,
+            include_missing: bool = False
+    ) -> list[Planet]:
+        """
+        Finds the planets whose numeric field is between the (inclusive) minimum and maximum, either of which can be
+        left open. Planets that are missing the field are only included when asked for.
+        """
+
+        positions = self._get_range_positions(field, minimum, maximum)
+        if (include_missing):
+            positions = positions + self._missing_numeric_positions[field]
+
+        return self._get_planets(positions)
+
+
+    def find_missing(self, field: str) -> list[Planet]:
+        """
+        Finds the planets that don't have a value for the given location or numeric field
+        """
+
+        if (field in self._location_indexes):
+            return self._get_planets(self._location_indexes[field].get(None, []))
+        if (field in self._missing_numeric_positions):
+            return self._get_planets(self._missing_numeric_positions[field])
+
+        raise ValueError(f"Unknown field {field}")
+
+
+    def query(
+            self,
+            galaxy: str = None,
+            cluster: str = None,
+            system: str = None,
+            **ranges: tuple[float, float]
+    ) -> list[Planet]:
+        """
+        Finds the planets that match every given filter. Location filters match exactly, and numeric filters are passed
+        as (minimum, maximum) tuples keyed by field, either end of which can be None to leave it open. For example:
+        query(cluster="Attican Traverse", radius_km=(5000, 7000))
+        """
+
+        candidate_positions: list[list[int]] = []
+        for field, value in zip(LOCATION_FIELDS, (galaxy, cluster, system)):
+            if (value is not None):
+                candidate_positions.append(self._get_location_positions(field, value))
+
+        for field, (minimum, maximum) in ranges.items():
+            candidate_positions.append(self._get_range_positions(field, minimum, maximum))
+
+        if (not candidate_positions):
+            return list(self._planets)
+
+        ## Start from the smallest set of matches, so every intersection after it is as cheap as possible
+        candidate_positions.sort(key=len)
+        positions = set(candidate_positions[0])
+        for other_positions in candidate_positions[1:]:
+            if (not positions):
+                break
+
+            positions.intersection_update(other_positions)
+
+        return self._get_planets(positions)
@@ -0,0 +1,71 @@
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Callable, Iterator
+from urllib.parse import urlsplit
+
+import utilities
+
+
+class ConcurrentScraper:
+    """
+    Runs a scrape function over many pages at once with a bounded pool of workers, while also capping the number of
+    scrapes that can be in flight against any single host
+    """
+
+    def __init__(self, max_workers: int, max_scrapes_per_host: int):
+        self.logger = utilities.initialize_logging(logging.getLogger(__name__))
+
+        assert(max_workers > 0)
+        assert(max_scrapes_per_host > 0)
+
+        self.max_workers = max_workers
+        self.max_scrapes_per_host = max_scrapes_per_host
+
+        self._host_semaphores: dict[str, threading.BoundedSemaphore] = {}
+        self._host_semaphores_lock = threading.Lock()
+
+
+    def _get_host_semaphore(self, url: str) -> threading.BoundedSemaphore:
+        host = urlsplit(url).netloc.lower()
+
+        with self._host_semaphores_lock:
+            semaphore = self._host_semaphores.get(host)
+            if (semaphore is None):
+                semaphore = threading.BoundedSemaphore(self.max_scrapes_per_host)
+                self._host_semaphores[host] = semaphore
+
+        return semaphore
+
+
+    def _scrape_with_host_limit(self, scrape: Callable[[str, str], object], name: str, url: str) -> object:
+        with self._get_host_semaphore(url):
+            return scrape(name, url)
+
+
+    def scrape_all(
+            self,
+            scrape: Callable[[str, str], object],
+            pages: dict[str, str]
+    ) -> Iterator[tuple[str, object, Exception]]:
+        """
+        Scrapes every name -> url pair in pages, and yields (name, result, exception) tuples in the order that the scrapes
+        complete. Exactly one of result or exception is meaningful, exception is None when the scrape succeeded.
+        """
+
+        self.logger.info(
+            f"Scraping {len(pages)} pages with {self.max_workers} workers, and at most {self.max_scrapes_per_host} per host"
+        )
+
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="scraper") as executor:
+            futures = {
+                executor.submit(self._scrape_with_host_limit, scrape, name, url): name
+                for name, url in pages.items()
+            }
+
+            for future in as_completed(futures):
+                name = futures[future]
+                try:
+                    yield (name, future.result(), None)
+                except Exception as e:
+                    yield (name, None, e)
@@ -0,0 +1,70 @@
+import json
+from abc import abstractmethod
+from urllib.parse import urlencode, urlsplit, quote, unquote
+
+from networking.http_client import HttpClient
+from networking.rate_limiter import RateLimiter
+from networking.response_cache import ResponseCache
+
+from .scraper import Scraper
+
+
+class MediaWikiApiScraper(Scraper):
+    """
+    Base for the scrapers that go through the wiki's api.php, rather than its rendered pages
+    """
+
+    ## The API refuses to handle more than this many titles in a single query (for regular users)
+    MAX_TITLES_PER_REQUEST = 50
+
+    def __init__(self,
+            root_url: str,
+            api_url: str,
+            http_client: HttpClient,
+            rate_limiter: RateLimiter,
+            response_cache: ResponseCache = None
+    ):
+        super().__init__(http_client, rate_limiter, response_cache)
+
+        self.root_url = root_url
+        self.api_url = api_url
+
+
+    @abstractmethod
+    def scrape(self, name: str, url: str) -> object:
+        pass
+
+
+    @staticmethod
+    def get_page_title(url: str) -> str:
+        """
+        Turns a wiki page url (ex. https://masseffect.fandom.com/wiki/2175_Aeia) into its page title (ex. 2175 Aeia)
+        """
+
+        path = urlsplit(url).path
+        _, _, title = path.partition("/wiki/")
+
+        return unquote(title).replace("_", " ")
+
+
+    def get_page_url(self, title: str) -> str:
+        """
+        Turns a page title (ex. 2175 Aeia) into its wiki page url (ex. https://masseffect.fandom.com/wiki/2175_Aeia)
+        """
+
+        ## These are the same characters that MediaWiki leaves unescaped in its own urls
+        return f"{self.root_url}/wiki/{quote(title.replace(' ', '_'), safe=';@$!*(),/~:')}"
+
+
+    def build_api_url(self, query_params: dict[str, any]) -> str:
+        return f"{self.api_url}?{urlencode({**query_params, 'format': 'json', 'formatversion': 2})}"
+
+
+    def fetch_api(self, query_params: dict[str, any]) -> dict:
+        response = json.loads(self.fetch(self.build_api_url(query_params)))
+
+        error = response.get("error")
+        if (error is not None):
+            raise RuntimeError(f"MediaWiki API error {error.get('code')}: {error.get('info')}")
+
+        return response
@@ -0,0 +1,75 @@
+import logging
+
+import utilities
+from networking.http_client import HttpClient
+from networking.rate_limiter import RateLimiter
+from networking.response_cache import ResponseCache
+
+from .mediawiki_api_scraper import MediaWikiApiScraper
+
+
+class MediaWikiCategoryScraper(MediaWikiApiScraper):
+    """
+    Lists the name and URL of all potential planets in the planet category through the MediaWiki API, which hands back
+    hundreds of category members per request
+    """
+
+    ## The most category members the API will list in a single request (for regular users)
+    MAX_MEMBERS_PER_REQUEST = 500
+
+    def __init__(self,
+            root_url: str,
+            api_url: str,
+            page_name_starts_with_blacklist: list[str],
+            http_client: HttpClient,
+            rate_limiter: RateLimiter,
+            response_cache: ResponseCache = None
+    ):
+        super().__init__(root_url, api_url, http_client, rate_limiter, response_cache)
+        self.logger = utilities.initialize_logging(logging.getLogger(__name__))
+
+        self.page_name_starts_with_blacklist = page_name_starts_with_blacklist
+
+
+    def _is_valid_page_name(self, page_name: str) -> bool:
+        return not any(page_name.startswith(value) for value in self.page_name_starts_with_blacklist)
+
+
+    def scrape(self, name: str, url: str) -> dict[str, str]:
+        """
+        Maps each page in the category at the given url (ex. https://masseffect.fandom.com/wiki/Category:Planets) to its
+        wiki page url
+        """
+
+        query_params = {
+            "action": "query",
+            "list": "categorymembers",
+            "cmtitle": self.get_page_title(url),
+            "cmprop": "title",
+            "cmlimit": self.MAX_MEMBERS_PER_REQUEST
+        }
+
+        planet_url_mapping = {}
+        request_count = 0
+        while (True):
+            response = self.fetch_api(query_params)
+            request_count += 1
+
+            for member in response.get("query", {}).get("categorymembers", []):
+                page_name = member["title"]
+                if (not self._is_valid_page_name(page_name)):
+                    continue
+
+                planet_url_mapping[page_name] = self.get_page_url(page_name)
+                self.logger.debug(f"Found: {page_name}, {planet_url_mapping[page_name]}")
+
+            ## The API hands back the params to pass along with the next request, until there are no members left
+            continuation = response.get("continue")
+            if (continuation is None):
+                break
+
+            query_params = {**query_params, **continuation}
+
+        self.logger.info(f"Listed {len(planet_url_mapping)} category members in {request_count} requests")
+
+        return planet_url_mapping
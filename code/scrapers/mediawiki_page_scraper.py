@@ -0,0 +1,95 @@
+import logging
+import re
+
+import utilities
+from networking.http_client import HttpClient
+from networking.rate_limiter import RateLimiter
+from networking.response_cache import ResponseCache
+
+from .mediawiki_api_scraper import MediaWikiApiScraper
+
+
+class MediaWikiPageScraper(MediaWikiApiScraper):
+    """
+    Renders many wiki pages with a single MediaWiki API request, by transcluding each of them into one chunk of wikitext
+    that's rendered with action=parse. Each page is separated by an empty marker element, so the rendered HTML can be
+    split back up into the content of every individual page, which is then fed through the usual planet extractors.
+    """
+
+    ## Marks the start of each page in the rendered HTML
+    PAGE_MARKER_FORMAT_STRING = '<div id="planet-scraper-page-{}"></div>'
+    PAGE_MARKER_REGEX = re.compile(r'<div id="planet-scraper-page-(\d+)"></div>')
+
+    def __init__(self,
+            root_url: str,
+            api_url: str,
+            batch_size: int,
+            http_client: HttpClient,
+            rate_limiter: RateLimiter,
+            response_cache: ResponseCache = None
+    ):
+        super().__init__(root_url, api_url, http_client, rate_limiter, response_cache)
+        self.logger = utilities.initialize_logging(logging.getLogger(__name__))
+
+        assert(batch_size > 0)
+
+        self.batch_size = min(batch_size, self.MAX_TITLES_PER_REQUEST)
+
+
+    def build_batches(self, pages: dict[str, str]) -> list[dict[str, str]]:
+        """
+        Splits the name -> url pairs in pages up into batches that can each be scraped with a single request
+        """
+
+        items = list(pages.items())
+
+        return [dict(items[start:start + self.batch_size]) for start in range(0, len(items), self.batch_size)]
+
+
+    def _build_wikitext(self, titles: list[str]) -> str:
+        return "\n".join(
+            f"{self.PAGE_MARKER_FORMAT_STRING.format(index)}\n{{{{:{title}}}}}\n" for index, title in enumerate(titles)
+        )
+
+
+    def _split_rendered_html(self, html: str, page_count: int) -> list[str]:
+        contents: list[str] = [None] * page_count
+
+        markers = list(self.PAGE_MARKER_REGEX.finditer(html))
+        for marker_index, marker in enumerate(markers):
+            end = markers[marker_index + 1].start() if marker_index + 1 < len(markers) else len(html)
+            page_index = int(marker.group(1))
+            if (page_index < page_count):
+                ## Wrap each page back up in the article content element, just like a page rendered on its own
+                contents[page_index] = f'<div class="mw-parser-output">{html[marker.end():end]}</div>'
+
+        return contents
+
+
+    def scrape_batch(self, pages: dict[str, str]) -> dict[str, bytes]:
+        """
+        Maps each name in pages to the rendered content of its page. Any pages that couldn't be rendered are left out.
+        """
+
+        names = list(pages.keys())
+        titles = [self.get_page_title(url) for url in pages.values()]
+
+        response = self.fetch_api({
+            "action": "parse",
+            "text": self._build_wikitext(titles),
+            "contentmodel": "wikitext",
+            "prop": "text",
+            "disableeditsection": 1,
+            "disablelimitreport": 1
+        })
+        html = response.get("parse", {}).get("text", "")
+
+        contents = self._split_rendered_html(html, len(titles))
+
+        return {
+            name: content.encode("utf-8") for name, content in zip(names, contents) if content is not None
+        }
+
+
+    def scrape(self, name: str, url: str) -> bytes:
+        return self.scrape_batch({name: url}).get(name)
@@ -0,0 +1,123 @@
+import logging
+from typing import Iterable, Iterator
+
+import utilities
+from networking.http_client import HttpClient
+from networking.rate_limiter import RateLimiter
+
+from .mediawiki_api_scraper import MediaWikiApiScraper
+
+
+class PageRevisionScraper(MediaWikiApiScraper):
+    """
+    Looks up the latest revision of wiki pages (or just the page that they redirect to) through the MediaWiki API,
+    batching many pages into each request
+    """
+
+    def __init__(
+            self,
+            root_url: str,
+            api_url: str,
+            http_client: HttpClient,
+            rate_limiter: RateLimiter,
+            batch_size: int = MediaWikiApiScraper.MAX_TITLES_PER_REQUEST
+    ):
+        ## Revisions always need to come straight from the server, so don't go through the response cache
+        super().__init__(root_url, api_url, http_client, rate_limiter)
+        self.logger = utilities.initialize_logging(logging.getLogger(__name__))
+
+        self.batch_size = min(batch_size, self.MAX_TITLES_PER_REQUEST)
+
+
+    def _get_resolved_titles(self, query: dict, titles: Iterable[str]) -> dict[str, str]:
+        """
+        The API hands back the normalized (and redirect resolved) title, so map those back to what was asked for
+        """
+
+        resolved_titles: dict[str, str] = {title: title for title in titles}
+        for mapping_type in ["normalized", "redirects"]:
+            for mapping in query.get(mapping_type, []):
+                for title, resolved_title in resolved_titles.items():
+                    if (resolved_title == mapping["from"]):
+                        resolved_titles[title] = mapping["to"]
+
+        return resolved_titles
+
+
+    def _iterate_batches(self, pages: dict[str, str]) -> Iterator[dict[str, str]]:
+        """
+        Yields the pages as title -> name batches, each small enough for a single request
+        """
+
+        title_names: dict[str, str] = {self.get_page_title(url): name for name, url in pages.items()}
+        titles = list(title_names.keys())
+
+        for start in range(0, len(titles), self.batch_size):
+            yield {title: title_names[title] for title in titles[start:start + self.batch_size]}
+
+
+    def _scrape_batch(self, title_names: dict[str, str]) -> dict[str, dict]:
+        response = self.fetch_api({
+            "action": "query",
+            "prop": "revisions",
+            "rvprop": "ids|timestamp",
+            "titles": "|".join(title_names.keys()),
+            "redirects": 1
+        })
+        query = response.get("query", {})
+        resolved_titles = self._get_resolved_titles(query, title_names)
+
+        revisions_by_title: dict[str, dict] = {}
+        for page in query.get("pages", []):
+            revisions = page.get("revisions")
+            if (page.get("missing") or not revisions):
+                continue
+
+            revisions_by_title[page["title"]] = {
+                "revision_id": revisions[0]["revid"],
+                "timestamp": revisions[0]["timestamp"]
+            }
+
+        revisions_by_name: dict[str, dict] = {}
+        for title, name in title_names.items():
+            revision = revisions_by_title.get(resolved_titles[title])
+            if (revision is not None):
+                revisions_by_name[name] = revision
+
+        return revisions_by_name
+
+
+    def scrape_all(self, pages: dict[str, str]) -> dict[str, dict]:
+        """
+        Maps each page name to its latest revision (the revision_id and its timestamp). Pages that don't exist anymore
+        are left out.
+        """
+
+        revisions: dict[str, dict] = {}
+        for batch in self._iterate_batches(pages):
+            revisions.update(self._scrape_batch(batch))
+
+        self.logger.info(f"Found revisions for {len(revisions)} of {len(pages)} pages")
+
+        return revisions
+
+
+    def resolve_all(self, pages: dict[str, str]) -> dict[str, str]:
+        """
+        Maps each page name to the title of the page that it actually shows, which is its own (normalized) title unless
+        it redirects somewhere else
+        """
+
+        resolved_titles_by_name: dict[str, str] = {}
+        for batch in self._iterate_batches(pages):
+            response = self.fetch_api({"action": "query", "titles": "|".join(batch.keys()), "redirects": 1})
+            resolved_titles = self._get_resolved_titles(response.get("query", {}), batch)
+
+            for title, name in batch.items():
+                resolved_titles_by_name[name] = resolved_titles[title]
+
+        return resolved_titles_by_name
+
+
+    def scrape(self, name: str, url: str) -> dict:
+        return self.scrape_all({name: url}).get(name)
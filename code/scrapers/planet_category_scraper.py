@@ -1,29 +1,50 @@
 import logging
 import string
-from typing import Callable
-from urllib import request
+import threading
+from urllib.parse import quote, unquote, urljoin, urlsplit, urlunsplit
 
 import utilities
-from bs4 import BeautifulSoup
-
+from networking.http_client import HttpClient
+from networking.rate_limiter import RateLimiter
+from networking.response_cache import ResponseCache
+from parsers.parser_backend import ParserBackend
+from .concurrent_scraper import ConcurrentScraper
 from .scraper import Scraper
 
 
 class PlanetCategoryScraper(Scraper):
     """
-    Handles scraping the planet category page for the name and URL of all potential planets
+    Handles scraping the planet category page for the name and URL of all potential planets. Each section (ex. "A") is
+    crawled concurrently, following the category's next page links while that section runs on past the end of a page.
+    The wiki often lists the following sections alongside the one requested, so any section that's already been listed
+    in full is skipped rather than fetched again, and pages are deduplicated by their canonical URL.
     """
 
+    ## Title characters that MediaWiki leaves unescaped in its page urls
+    URL_SAFE_CHARACTERS = ";@$!*(),/~:"
+
     def __init__(self,
             root_url: str,
             url_query_param_format_string: str,
-            page_name_starts_with_blacklist: list[str]
+            page_name_starts_with_blacklist: list[str],
+            parser_backend: ParserBackend,
+            concurrent_scraper: ConcurrentScraper,
+            http_client: HttpClient,
+            rate_limiter: RateLimiter,
+            response_cache: ResponseCache = None
     ):
+        super().__init__(http_client, rate_limiter, response_cache)
         self.logger = utilities.initialize_logging(logging.getLogger(__name__))
 
         self.root_url = root_url
         self.url_query_param_format_string = url_query_param_format_string
         self.page_name_starts_with_blacklist = page_name_starts_with_blacklist
+        self.parser_backend = parser_backend
+        self.concurrent_scraper = concurrent_scraper
+
+        self._listed_section_names: set[str] = set()
+        self._request_count = 0
+        self._crawl_state_lock = threading.Lock()
 
 
     def _generate_section_urls(self, base_url: str) -> tuple[str, str]:
@@ -35,18 +56,6 @@ class PlanetCategoryScraper(Scraper):
         yield from [(value, build_section_url(value)) for value in string.ascii_lowercase]
 
 
-    def _find_index_conditional(self, sequence: list, condition: Callable) -> int:
-        """
-        Finds the index of an element in a provided list based on the evaluation of a provided condition
-        """
-
-        for index, element in enumerate(sequence):
-            if (condition(element)):
-                return index
-
-        return -1
-
-
     def _is_valid_page_name(self, page_name: str) -> bool:
         """
         Validate that the provided page name refers to a page that should be scraped
@@ -60,55 +69,136 @@ class PlanetCategoryScraper(Scraper):
         return not any_failed_conditions
 
 
-    def _extract_planets_from_category_section(self, section) -> dict[str, str]:
-        planets_in_section_mapping = {}
+    def _extract_planets_from_category_section(self, links: list[tuple[str, str]]) -> list[tuple[str, str]]:
+        planets_in_section = []
 
-        link_elements = section.parent.select("a.category-page__member-link")
-        ## With the relevant section found, iterate over its children with this class. These elements have the name
-        ## and href data that we need
-        for element in link_elements:
+        ## Iterate over the section's links. These have the name and href data that we need
+        for page_name, href in links:
             ## Some children are of the wrong type (ex. a link to a planet image)
-            page_name = element.text
             if (not self._is_valid_page_name(page_name)):
                 continue
 
             ## Ensure that the child isn't malformed, and has a link
-            href = element.attrs.get('href')
             if (href is None):
                 continue
 
-            planets_in_section_mapping[page_name] = f"{self.root_url}{href}"
+            planets_in_section.append((page_name, f"{self.root_url}{href}"))
+
+            self.logger.debug(f"Found: {page_name}, {self.root_url}{href}")
+
+        return planets_in_section
+
+
+    def _get_canonical_url(self, url: str) -> str:
+        """
+        Normalizes the different ways of writing the same page url (ex. escaped characters, spaces instead of
+        underscores, a lowercase first letter, or a trailing fragment), so they can be compared
+        """
+
+        split_url = urlsplit(url)
+        path = unquote(split_url.path).replace(" ", "_")
+
+        ## The first letter of a MediaWiki title is case insensitive
+        prefix, _, title = path.partition("/wiki/")
+        if (title):
+            path = f"{prefix}/wiki/{title[:1].upper()}{title[1:]}"
 
-            self.logger.debug(f"Found: {page_name}, {planets_in_section_mapping[page_name]}")
+        return urlunsplit((
+            split_url.scheme.lower(),
+            split_url.netloc.lower(),
+            quote(path, safe=self.URL_SAFE_CHARACTERS),
+            "",
+            ""
+        ))
 
-        return planets_in_section_mapping
 
+    def _is_section_listed(self, section_name: str) -> bool:
+        with self._crawl_state_lock:
+            return section_name in self._listed_section_names
 
-    def _scrape_planets_from_category_url(self, name: str, url: str) -> dict[str, str]:
-        content = request.urlopen(url).read()
-        soup = BeautifulSoup(content, "html.parser")
 
-        ## Each page can have multuple sections, so we need to find the specific one for our current section_name
-        sections = soup.select("div.category-page__first-char")
-        ## This is the (index of the) section that's relevant to the current url, as the wiki will (sometimes) return multiple sections starting with the one requested
-        section_index = self._find_index_conditional(sections, lambda candidate: candidate.text.strip().lower() == name.lower())
-        if (section_index < 0):
-            return {}
+    def _fetch_category_page(self, url: str) -> bytes:
+        content = self.fetch(url)
 
-        section = sections[section_index]
+        with self._crawl_state_lock:
+            self._request_count += 1
 
-        return self._extract_planets_from_category_section(section)
+        return content
+
+
+    def _scrape_planets_from_category_section(self, name: str, url: str) -> list[tuple[str, str]]:
+        """
+        Lists the (name, url) of the planets in the requested section, along with any planets in the sections that
+        follow it on the same pages
+        """
+
+        section_name = name.lower()
+        if (self._is_section_listed(section_name)):
+            self.logger.debug(f"Skipping section {name}, as it's already been listed in full")
+            return []
+
+        planets_in_sections = []
+        visited_urls = set()
+        while (url is not None and url not in visited_urls):
+            visited_urls.add(url)
+            category_page_index = self.parser_backend.parse_category_page(self._fetch_category_page(url))
+            section_names = [value.lower() for value in category_page_index.get_section_names()]
+
+            next_page_url = None
+            if (category_page_index.next_page_href is not None):
+                next_page_url = urljoin(url, category_page_index.next_page_href)
+
+            ## Every section on the page has been listed in full, except for the last one if it continues onto the
+            ## next page
+            with self._crawl_state_lock:
+                self._listed_section_names.update(section_names if next_page_url is None else section_names[:-1])
+
+            for _, links in category_page_index.sections:
+                planets_in_sections.extend(self._extract_planets_from_category_section(links))
+
+            ## Only keep paging while the requested section runs on past the end of this page
+            if (not section_names or section_names[-1] != section_name):
+                break
+
+            url = next_page_url
+
+        return planets_in_sections
 
 
     def scrape(self, name: str, url: str) -> dict[str, str]:
-        planet_url_mapping = {}
+        section_urls = dict(self._generate_section_urls(url))
+
+        self._listed_section_names = set()
+        self._request_count = 0
 
-        ## Look over all provided planet category urls for potential planets and their urls
-        for section_name, planet_url in self._generate_section_urls(url):
-            ## And save those planet -> url mappings in memory for now
-            planet_url_mapping.update(self._scrape_planets_from_category_url(section_name, planet_url))
+        ## Look over all of the planet category's sections for potential planets and their urls
+        section_planets: dict[str, list[tuple[str, str]]] = {}
+        scrape_results = self.concurrent_scraper.scrape_all(self._scrape_planets_from_category_section, section_urls)
+        for section_name, planets_in_sections, exception in scrape_results:
+            ## A partial index would be cached as if it were complete, so give up on the whole thing instead
+            if (exception is not None):
+                raise exception
 
-            ## Don't just hammer their servers and get rate limited
-            self.scrape_cooldown()
+            section_planets[section_name] = planets_in_sections
+
+        ## Sections finish in any order, so merge them back in section order. Overlapping sections (along with aliases of
+        ## the same page) list the same planet more than once, but only the first listing is kept.
+        planet_url_mapping = {}
+        canonical_urls = set()
+        duplicate_count = 0
+        for section_name in section_urls:
+            for page_name, page_url in section_planets[section_name]:
+                canonical_url = self._get_canonical_url(page_url)
+                if (page_name in planet_url_mapping or canonical_url in canonical_urls):
+                    duplicate_count += 1
+                    continue
+
+                planet_url_mapping[page_name] = page_url
+                canonical_urls.add(canonical_url)
+
+        self.logger.info(
+            f"Listed {len(planet_url_mapping)} category members in {self._request_count} requests, skipping "
+            f"{duplicate_count} duplicates"
+        )
 
         return planet_url_mapping
@@ -1,77 +1,52 @@
-from json import JSONEncoder
-import string
-import time
-import random
+import contextlib
 import logging
-import itertools
 import re
-from typing import Callable
-from urllib import request
-from pathlib import Path
-
-import unidecode
-from bs4 import BeautifulSoup
-from bs4.element import Tag
+from typing import Callable, TYPE_CHECKING
 
 import utilities
+from networking.http_client import HttpClient
+from networking.rate_limiter import RateLimiter
+from networking.response_cache import ResponseCache
 from .scraper import Scraper
 from models.planet import Planet
+from parsers.planet_page_index import PlanetPageIndex
+from parsers.parser_backend import ParserBackend
+from metrics.metrics_registry import MetricsRegistry
+
+## The profiler's only handed in when profiling's enabled, so don't pay to import it (and cProfile) otherwise
+if (TYPE_CHECKING):
+    from profiling.stage_profiler import StageProfiler
 
 
 class PlanetDataScraper(Scraper):
     """
-    Scrapes detailed planetary data from the specific page for that planet, and will yield a Planet object
+    Scrapes detailed planetary data from the specific page for that planet, and will yield a Planet object. When given a
+    metrics registry, the time spent parsing, extracting each field, and validating is recorded to it. When given a
+    profiler, a sample of the fetches and parses are profiled.
     """
 
+    ## The headers of the sections whose text gets stored on the planet
+    SECTION_HEADERS = ["Description", "Properties", "Codex", "Additional", "Survey"]
+
     def __init__(self,
         required_properties: list[str],
-        vague_data_mappings: dict[str, any]
+        vague_data_mappings: dict[str, any],
+        parser_backend: ParserBackend,
+        http_client: HttpClient,
+        rate_limiter: RateLimiter,
+        response_cache: ResponseCache = None,
+        metrics: MetricsRegistry = None,
+        profiler: "StageProfiler" = None
     ):
+        super().__init__(http_client, rate_limiter, response_cache)
         self.logger = utilities.initialize_logging(logging.getLogger(__name__))
 
         self.required_properties = required_properties
         self.vague_data_mappings = vague_data_mappings
-        self.non_float_regex = re.compile("[^\d\.-]")
-
-
-    def _extract_planet_location(self, soup) -> tuple[str, str, str]:
-        output = []
-
-        location_start_element = soup.find(lambda tag: tag.name == "b" and tag.text.startswith("Location"))
-        for element in itertools.islice(location_start_element.next_siblings, 1, 6, 2):
-            output.append(element.text)
-
-        return tuple(output)
-
-
-    def _extract_text_below_header(self, header_text: str, soup) -> list[str]:
-        header = soup.find(
-            lambda tag: tag.parent.name.startswith("h") and tag.text.startswith(header_text)
-        )
-
-        if (header is None):
-            return None
-
-        content: list[str] = []
-        element = header.parent
-        stop = False
-        while (not stop and element.next_sibling != None):
-            element = element.next_sibling
-
-            if (issubclass(type(element), str)):
-                continue
-
-            if (isinstance(element, Tag)):
-                if (element.name in ["span", "p"]):
-                    ## Convert the misc unicode characters into their approximate ascii flavor (it's usually just nbsp
-                    ## and quote marks, so this is fine)
-                    text = unidecode.unidecode(element.text.strip())
-
-                    content.extend(text.splitlines())
-                elif (element.name.startswith("h")):
-                    stop = True
-
-        return content
+        self.parser_backend = parser_backend
+        self.metrics = metrics
+        self.profiler = profiler
+        self.non_float_regex = re.compile(r"[^\d\.-]")
 
 
     def _convert_str_to_float(self, value: str) -> float:
@@ -80,29 +55,19 @@ class PlanetDataScraper(Scraper):
         return float(parsed)
 
 
-    def _extract_planet_infobox_datum(self, infobox_key: str, soup) -> str:
-        infobox = soup.select(".portable-infobox")
-        if (len(infobox) == 0):
+    def _extract_planet_infobox_datum(self, infobox_key: str, page_index: PlanetPageIndex) -> str:
+        value = page_index.get_infobox_value(infobox_key)
+        if (value is None):
             return None
 
-        datum_container = infobox[0].select(f"[data-source='{infobox_key}']")
-        if (len(datum_container) == 0):
-            return None
-
-        value_container = datum_container[0].select(".pi-data-value")
-        if (len(value_container) == 0):
-            return None
-
-        value = value_container[0].text.lower()
-
         if (value in self.vague_data_mappings):
             return str(self.vague_data_mappings.get(value))
 
         return value
 
 
-    def _extract_planet_infobox_datum_float(self, infobox_key: str, soup) -> float:
-        datum = self._extract_planet_infobox_datum(infobox_key, soup)
+    def _extract_planet_infobox_datum_float(self, infobox_key: str, page_index: PlanetPageIndex) -> float:
+        datum = self._extract_planet_infobox_datum(infobox_key, page_index)
 
         if (datum is not None):
             return self._convert_str_to_float(datum)
@@ -110,16 +75,16 @@ class PlanetDataScraper(Scraper):
         return None
 
 
-    def _extract_planet_infobox_atmospheric_pressure(self, soup) -> float:
-        atmospheric_pressure = self._extract_planet_infobox_datum("atmpressure", soup)
+    def _extract_planet_infobox_atmospheric_pressure(self, page_index: PlanetPageIndex) -> float:
+        atmospheric_pressure = self._extract_planet_infobox_datum("atmpressure", page_index)
         if (atmospheric_pressure is None):
             return None
 
         return self._convert_str_to_float(atmospheric_pressure)
 
 
-    def _extract_planet_infobox_satellites(self, soup) -> int:
-        satellites = self._extract_planet_infobox_datum("satellites", soup)
+    def _extract_planet_infobox_satellites(self, page_index: PlanetPageIndex) -> int:
+        satellites = self._extract_planet_infobox_datum("satellites", page_index)
         if (satellites is None):
             return None
 
@@ -144,37 +109,85 @@ class PlanetDataScraper(Scraper):
         return True
 
 
-    def scrape(self, name: str, url: str) -> Planet:
-        content = request.urlopen(url).read()
-        ## Don't just hammer the server and get rate limited
-        self.scrape_cooldown()
-        soup = BeautifulSoup(content, "html.parser")
+    def _record_missing_properties(self, planet: Planet):
+        for prop in self.required_properties:
+            if (getattr(planet, prop) is None):
+                self.metrics.increment("planet_missing_properties_total", labels={"property": prop})
+
+
+    def _time(self, name: str, labels: dict[str, str] = None) -> contextlib.AbstractContextManager:
+        if (self.metrics is None):
+            return contextlib.nullcontext()
+
+        return self.metrics.time(name, labels)
+
+
+    def _sample(self, stage: str) -> contextlib.AbstractContextManager:
+        if (self.profiler is None):
+            return contextlib.nullcontext()
+
+        return self.profiler.sample(stage)
+
+
+    def _extract(self, field: str, extract: Callable, *args) -> any:
+        with self._time("extract_seconds", {"field": field}):
+            return extract(*args)
+
+
+    def fetch(self, url: str) -> bytes:
+        with self._sample("fetch"):
+            return super().fetch(url)
 
-        location = self._extract_planet_location(soup)
+
+    def parse(self, name: str, content: bytes) -> Planet:
+        """
+        Builds a Planet from the raw content of its page, or None if the planet is missing any required properties
+        """
+
+        with self._sample("parse"):
+            return self._parse(name, content)
+
+
+    def _parse(self, name: str, content: bytes) -> Planet:
+        with self._time("parse_seconds"):
+            page_index = self.parser_backend.parse_planet_page(content, self.SECTION_HEADERS)
+
+        location = self._extract("location", lambda: page_index.location)
+        float_datum = self._extract_planet_infobox_datum_float
 
         planet = Planet(
             name,
             location[0],
             location[1],
             location[2],
-            self._extract_text_below_header("Description", soup),
-            self._extract_text_below_header("Properties", soup),
-            self._extract_text_below_header("Codex", soup),
-            self._extract_text_below_header("Additional", soup),
-            self._extract_text_below_header("Survey", soup),
-            self._extract_planet_infobox_datum_float("orbitaldistance", soup),
-            self._extract_planet_infobox_datum_float("orbitalperiod", soup),
-            self._extract_planet_infobox_datum_float("kepler", soup),
-            self._extract_planet_infobox_datum_float("radius", soup),
-            self._extract_planet_infobox_datum_float("daylength", soup),
-            self._extract_planet_infobox_atmospheric_pressure(soup),
-            self._extract_planet_infobox_datum_float("surfacetemp", soup),
-            self._extract_planet_infobox_datum_float("surfacegrav", soup),
-            self._extract_planet_infobox_datum_float("mass", soup),
-            self._extract_planet_infobox_satellites(soup)
+            self._extract("description", page_index.get_section, "Description"),
+            self._extract("properties", page_index.get_section, "Properties"),
+            self._extract("codex", page_index.get_section, "Codex"),
+            self._extract("additional_info", page_index.get_section, "Additional"),
+            self._extract("survey_text", page_index.get_section, "Survey"),
+            self._extract("orbital_distance_au", float_datum, "orbitaldistance", page_index),
+            self._extract("orbital_period_years", float_datum, "orbitalperiod", page_index),
+            self._extract("keplerian_ratio", float_datum, "kepler", page_index),
+            self._extract("radius_km", float_datum, "radius", page_index),
+            self._extract("day_length_earth_hours", float_datum, "daylength", page_index),
+            self._extract("atmospheric_pressure", self._extract_planet_infobox_atmospheric_pressure, page_index),
+            self._extract("surface_temperature_celcius", float_datum, "surfacetemp", page_index),
+            self._extract("surface_gravity_g", float_datum, "surfacegrav", page_index),
+            self._extract("mass_earth_masses", float_datum, "mass", page_index),
+            self._extract("satellite_count", self._extract_planet_infobox_satellites, page_index)
         )
 
-        if (self._is_valid_planet(planet)):
+        with self._time("validate_seconds"):
+            valid = self._is_valid_planet(planet)
+
+        if (valid):
             return planet
 
+        if (self.metrics is not None):
+            self._record_missing_properties(planet)
+
         return None
+
+
+    def scrape(self, name: str, url: str) -> Planet:
+        return self.parse(name, self.fetch(url))
@@ -0,0 +1,88 @@
+import logging
+import time
+from typing import Callable
+
+import utilities
+from networking.retry_policy import RetryPolicy
+
+
+class RetryQueue:
+    """
+    Defers the pages that failed with a (possibly) transient error, so they can be retried once the rest of the run is
+    done rather than holding it up. Each page waits out the retry policy's backoff before it's handed back.
+    """
+
+    def __init__(
+            self,
+            retry_policy: RetryPolicy,
+            clock: Callable[[], float] = time.monotonic,
+            sleep: Callable[[float], None] = time.sleep
+    ):
+        self.logger = utilities.initialize_logging(logging.getLogger(__name__))
+
+        self.retry_policy = retry_policy
+        self.clock = clock
+        self.sleep = sleep
+
+        ## Maps each deferred page's name to its url, and the earliest time it can be retried
+        self._deferred: dict[str, tuple[str, float]] = {}
+        self._failed_attempts: dict[str, int] = {}
+        self._retry_count = 0
+
+    ## Properties
+
+    @property
+    def retry_count(self) -> int:
+        return self._retry_count
+
+    ## Methods
+
+    def __len__(self) -> int:
+        return len(self._deferred)
+
+
+    def get_failed_attempts(self, name: str) -> int:
+        return self._failed_attempts.get(name, 0)
+
+
+    def defer(self, name: str, url: str, exception: Exception) -> bool:
+        """
+        Queues up a failed page to be retried later, unless the failure isn't worth retrying or the page is out of
+        attempts. Returns whether the page was deferred.
+        """
+
+        failed_attempts = self.get_failed_attempts(name) + 1
+        self._failed_attempts[name] = failed_attempts
+
+        if (not self.retry_policy.is_retryable(exception) or failed_attempts >= self.retry_policy.max_attempts):
+            return False
+
+        delay_seconds = self.retry_policy.get_delay_seconds(failed_attempts, exception)
+        self._deferred[name] = (url, self.clock() + delay_seconds)
+        self.logger.debug(f"Retrying {name} in {delay_seconds:.1f} seconds, after {failed_attempts} failed attempts")
+
+        return True
+
+
+    def pop_ready(self) -> dict[str, str]:
+        """
+        Blocks until at least one deferred page is ready to be retried, and then hands back every ready name -> url pair.
+        Hands back nothing once the queue is empty.
+        """
+
+        if (not self._deferred):
+            return {}
+
+        wait_seconds = min(retry_at for _, retry_at in self._deferred.values()) - self.clock()
+        if (wait_seconds > 0):
+            self.logger.info(f"Waiting {wait_seconds:.1f} seconds to retry {len(self._deferred)} deferred pages")
+            self.sleep(wait_seconds)
+
+        now = self.clock()
+        ready = {name: url for name, (url, retry_at) in self._deferred.items() if retry_at <= now}
+        for name in ready:
+            del self._deferred[name]
+
+        self._retry_count += len(ready)
+
+        return ready
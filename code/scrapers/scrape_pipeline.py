@@ -0,0 +1,288 @@
+import logging
+import multiprocessing
+import queue
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor, FIRST_COMPLETED, wait
+from concurrent.futures.process import BrokenProcessPool
+from typing import Iterator
+
+import utilities
+from metrics.metrics_registry import MetricsRegistry
+from profiling.stage_profiler import StageProfiler
+from models.planet import Planet
+from parsers.parser_backend import build_parser_backend
+
+from .concurrent_scraper import ConcurrentScraper
+from .planet_data_scraper import PlanetDataScraper
+from .mediawiki_page_scraper import MediaWikiPageScraper
+
+
+## Each parse process builds its own scraper once, rather than having one pickled over with every page
+_worker_planet_data_scraper: PlanetDataScraper = None
+
+
+def _initialize_parse_worker(
+        required_properties: list[str],
+        vague_data_mappings: dict[str, any],
+        parser_backend_name: str,
+        partial_parse: bool,
+        record_metrics: bool,
+        profile_sample_every: int
+):
+    global _worker_planet_data_scraper
+
+    _worker_planet_data_scraper = PlanetDataScraper(
+        required_properties,
+        vague_data_mappings,
+        build_parser_backend(parser_backend_name, partial_parse),
+        None,
+        None,
+        metrics=MetricsRegistry() if record_metrics else None,
+        ## Memory is only traced in the main process, so just sample the parses here
+        profiler=StageProfiler(profile_sample_every, trace_memory=False) if profile_sample_every is not None else None
+    )
+
+
+def _parse_in_worker(name: str, content: bytes) -> tuple[Planet, dict, dict]:
+    planet = _worker_planet_data_scraper.parse(name, content)
+
+    ## Metrics recorded (and profiles sampled) in this process are shipped back with the planet, to be merged into the
+    ## main process' registry and profiler
+    metrics = _worker_planet_data_scraper.metrics
+    profiler = _worker_planet_data_scraper.profiler
+
+    return (
+        planet,
+        metrics.drain() if metrics is not None else None,
+        profiler.drain() if profiler is not None else None
+    )
+
+
+class ScrapePipeline:
+    """
+    Builds planets in two stages. The (I/O bound) fetch stage downloads raw pages on threads, and hands them through a
+    bounded queue to the (CPU bound) parse stage, which builds the planets on a pool of processes. When the parse stage
+    falls behind, the full queue blocks the fetch threads until it catches up.
+
+    Parse processes are spawned rather than forked, since forking while the fetch threads hold locks (for logging, the
+    rate limiter, or the connection pool) can deadlock the child. If a parse process dies (ex. killed for running out of
+    memory), the planets it had in flight are failed, and the rest of the run carries on with a fresh pool.
+
+    Pages are fetched one at a time from the wiki itself, unless a MediaWikiPageScraper is provided, in which case
+    they're fetched in batches from the MediaWiki API instead.
+    """
+
+    ## Marks the end of the fetch stage's output
+    _FETCH_STAGE_DONE = object()
+    ## How often a fetch thread blocked on the full queue checks whether the pipeline's been stopped
+    _PUT_POLL_SECONDS = 0.1
+
+    def __init__(
+            self,
+            concurrent_scraper: ConcurrentScraper,
+            planet_data_scraper: PlanetDataScraper,
+            parse_processes: int,
+            queue_size: int,
+            mediawiki_page_scraper: MediaWikiPageScraper = None
+    ):
+        self.logger = utilities.initialize_logging(logging.getLogger(__name__))
+
+        assert(parse_processes >= 0)
+        assert(queue_size > 0)
+
+        self.concurrent_scraper = concurrent_scraper
+        self.planet_data_scraper = planet_data_scraper
+        self.parse_processes = parse_processes
+        self.queue_size = queue_size
+        self.mediawiki_page_scraper = mediawiki_page_scraper
+
+
+    def _put_fetched(self, fetched_pages: queue.Queue, fetched_page: object, stopped: threading.Event):
+        """
+        Blocks while the queue is full, which keeps the fetch thread from fetching anything else, but gives up once the
+        pipeline's been stopped (ex. when whoever was iterating over it has gone away)
+        """
+
+        while (not stopped.is_set()):
+            try:
+                fetched_pages.put(fetched_page, timeout=self._PUT_POLL_SECONDS)
+                return
+            except queue.Full:
+                continue
+
+
+    def _run_fetch_stage(self, pages: dict[str, str], fetched_pages: queue.Queue, stopped: threading.Event):
+        try:
+            if (self.mediawiki_page_scraper is not None):
+                self._fetch_page_batches(pages, fetched_pages, stopped)
+            else:
+                self._fetch_pages(pages, fetched_pages, stopped)
+        finally:
+            self._put_fetched(fetched_pages, self._FETCH_STAGE_DONE, stopped)
+
+
+    def _fetch_pages(self, pages: dict[str, str], fetched_pages: queue.Queue, stopped: threading.Event):
+        def fetch_into_queue(name: str, url: str):
+            if (stopped.is_set()):
+                return
+
+            self._put_fetched(fetched_pages, (name, self.planet_data_scraper.fetch(url), None), stopped)
+
+        for name, _, exception in self.concurrent_scraper.scrape_all(fetch_into_queue, pages):
+            if (exception is not None):
+                self._put_fetched(fetched_pages, (name, None, exception), stopped)
+
+
+    def _fetch_page_batches(self, pages: dict[str, str], fetched_pages: queue.Queue, stopped: threading.Event):
+        batches = self.mediawiki_page_scraper.build_batches(pages)
+        ## Every batch goes to the API, so that's the url the per host limit applies to
+        batch_urls = {str(index): self.mediawiki_page_scraper.api_url for index in range(len(batches))}
+
+        def fetch_batch_into_queue(batch_name: str, _: str):
+            if (stopped.is_set()):
+                return
+
+            batch = batches[int(batch_name)]
+            contents = self.mediawiki_page_scraper.scrape_batch(batch)
+
+            for name in batch:
+                if (name in contents):
+                    self._put_fetched(fetched_pages, (name, contents[name], None), stopped)
+                else:
+                    exception = LookupError(f"The API didn't render a page for {name}")
+                    self._put_fetched(fetched_pages, (name, None, exception), stopped)
+
+        for batch_name, _, exception in self.concurrent_scraper.scrape_all(fetch_batch_into_queue, batch_urls):
+            if (exception is not None):
+                for name in batches[int(batch_name)]:
+                    self._put_fetched(fetched_pages, (name, None, exception), stopped)
+
+
+    def _iterate_fetched_pages(self, pages: dict[str, str]) -> Iterator[tuple[str, bytes, Exception]]:
+        """
+        Runs the fetch stage in the background, and yields (name, content, exception) tuples as pages are fetched. If
+        the iteration ends early, the fetch stage is stopped rather than left blocked on the full queue.
+        """
+
+        fetched_pages = queue.Queue(maxsize=self.queue_size)
+        stopped = threading.Event()
+        fetch_stage = threading.Thread(
+            target=self._run_fetch_stage,
+            args=(pages, fetched_pages, stopped),
+            name="fetch-stage",
+            daemon=True
+        )
+        fetch_stage.start()
+
+        try:
+            while (True):
+                fetched_page = fetched_pages.get()
+                if (fetched_page is self._FETCH_STAGE_DONE):
+                    break
+
+                yield fetched_page
+
+            fetch_stage.join()
+        finally:
+            ## Only does anything if the iteration was abandoned, in which case the fetch threads skip whatever pages
+            ## they haven't started on, and stop waiting on the queue
+            stopped.set()
+
+
+    def _collect_parsed(self, futures: dict[Future, str], done: set[Future]) -> Iterator[tuple[str, Planet, Exception]]:
+        for future in done:
+            name = futures.pop(future)
+            exception = future.exception()
+            if (exception is not None):
+                yield (name, None, exception)
+                continue
+
+            planet, metrics_snapshot, profile_snapshot = future.result()
+            if (metrics_snapshot is not None):
+                self.planet_data_scraper.metrics.merge(metrics_snapshot)
+            if (profile_snapshot):
+                self.planet_data_scraper.profiler.merge(profile_snapshot)
+
+            yield (name, planet, None)
+
+
+    def _create_executor(self, initializer_args: tuple) -> ProcessPoolExecutor:
+        return ProcessPoolExecutor(
+            self.parse_processes,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_initialize_parse_worker,
+            initargs=initializer_args
+        )
+
+
+    def scrape_all(self, pages: dict[str, str]) -> Iterator[tuple[str, Planet, Exception]]:
+        """
+        Builds the planet for every name -> url pair in pages, and yields (name, planet, exception) tuples in the order
+        that they complete, just like ConcurrentScraper.scrape_all
+        """
+
+        ## Without any parse processes, just parse the pages as they're fetched
+        if (self.parse_processes == 0):
+            if (self.mediawiki_page_scraper is None):
+                yield from self.concurrent_scraper.scrape_all(self.planet_data_scraper.scrape, pages)
+                return
+
+            for name, content, exception in self._iterate_fetched_pages(pages):
+                if (exception is not None):
+                    yield (name, None, exception)
+                    continue
+
+                try:
+                    yield (name, self.planet_data_scraper.parse(name, content), None)
+                except Exception as e:
+                    yield (name, None, e)
+
+            return
+
+        self.logger.info(f"Parsing pages on {self.parse_processes} processes, with up to {self.queue_size} queued")
+
+        parser_backend = self.planet_data_scraper.parser_backend
+        profiler = self.planet_data_scraper.profiler
+        initializer_args = (
+            self.planet_data_scraper.required_properties,
+            self.planet_data_scraper.vague_data_mappings,
+            parser_backend.name,
+            parser_backend.partial_parse,
+            self.planet_data_scraper.metrics is not None,
+            profiler.sample_every if profiler is not None else None
+        )
+        ## Keep each process busy, but leave the rest of the pages on the queue so backpressure reaches the fetch stage
+        max_in_flight = self.parse_processes * 2
+
+        executor = self._create_executor(initializer_args)
+        futures: dict[Future, str] = {}
+        try:
+            for name, content, exception in self._iterate_fetched_pages(pages):
+                if (exception is not None):
+                    yield (name, None, exception)
+                    continue
+
+                try:
+                    future = executor.submit(_parse_in_worker, name, content)
+                except BrokenProcessPool:
+                    ## A parse process died, which fails every planet that was in flight on the pool. Report them (so
+                    ## they're journaled as failed, and retried by a resumed run) and carry on with a fresh pool.
+                    done, _ = wait(futures)
+                    yield from self._collect_parsed(futures, done)
+
+                    self.logger.warning("A parse process died, so restarting the pool of parse processes")
+                    executor.shutdown(wait=False)
+                    executor = self._create_executor(initializer_args)
+                    future = executor.submit(_parse_in_worker, name, content)
+
+                futures[future] = name
+
+                if (len(futures) >= max_in_flight):
+                    done, _ = wait(futures, return_when=FIRST_COMPLETED)
+                    yield from self._collect_parsed(futures, done)
+
+            if (futures):
+                done, _ = wait(futures)
+                yield from self._collect_parsed(futures, done)
+        finally:
+            executor.shutdown(cancel_futures=True)
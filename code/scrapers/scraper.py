@@ -1,15 +1,70 @@
-import random
+import http.client
 import time
 from abc import ABC, abstractmethod
 
+from networking.http_client import HttpClient, HttpError
+from networking.rate_limiter import RateLimiter
+from networking.response_cache import ResponseCache, CacheMissError
+
 class Scraper(ABC):
+    def __init__(self, http_client: HttpClient, rate_limiter: RateLimiter, response_cache: ResponseCache = None):
+        self.http_client = http_client
+        self.rate_limiter = rate_limiter
+        self.response_cache = response_cache
+
+
     @abstractmethod
     def scrape(self, name: str, url: str) -> object:
         pass
 
 
-    ## Implicitly virtual
-    def scrape_cooldown(self, min_seconds: int = 0, max_seconds: int = 5):
-        cooldown = random.uniform(min_seconds, max_seconds)
-        self.logger.info(f"Sleeping for {cooldown:.1f} seconds")
-        time.sleep(cooldown)
+    def fetch(self, url: str) -> bytes:
+        """
+        Downloads the content at the given url, waiting on the shared rate limiter first so the server isn't hammered.
+        Cached responses are revalidated with a conditional request, and are used as-is when the cache is offline.
+        """
+
+        cached = self.response_cache.get(url) if self.response_cache is not None else None
+        if (self.response_cache is not None and self.response_cache.offline):
+            if (cached is None):
+                raise CacheMissError(f"No cached response for {url}")
+
+            return cached.content
+
+        headers = {}
+        if (cached is not None):
+            if (cached.etag is not None):
+                headers["If-None-Match"] = cached.etag
+            if (cached.last_modified is not None):
+                headers["If-Modified-Since"] = cached.last_modified
+
+        self.rate_limiter.acquire()
+
+        started_at = time.monotonic()
+        try:
+            response = self.http_client.get(url, headers)
+        except HttpError as e:
+            self.rate_limiter.record_response(e.response.elapsed_seconds, e.status_code)
+            raise
+        except (OSError, http.client.HTTPException):
+            ## Timeouts and dropped connections are the surest sign of a struggling server, so they back off too
+            self.rate_limiter.record_response(time.monotonic() - started_at, None)
+            raise
+
+        self.rate_limiter.record_response(response.elapsed_seconds, response.status_code)
+
+        ## Nothing changed, so skip the download, and don't make the next request wait on this one
+        if (response.status_code == 304 and cached is not None):
+            self.rate_limiter.release()
+            self.response_cache.refresh(url)
+            return cached.content
+
+        if (self.response_cache is not None):
+            self.response_cache.store(
+                url,
+                response.content,
+                response.headers.get("ETag"),
+                response.headers.get("Last-Modified")
+            )
+
+        return response.content
@@ -0,0 +1,214 @@
+import argparse
+import logging
+from pathlib import Path
+from typing import Iterable
+
+import utilities
+from models.planet import Planet, LOCATION_FIELDS, NUMERIC_FIELDS
+
+
+## Satellites are counted, everything else is measured
+_NUMERIC_FIELD_DTYPES = {field: "int32" if field == "satellite_count" else "float64" for field in NUMERIC_FIELDS}
+
+
+def _import_numpy():
+    ## NumPy is only needed for columnar data, so it's optional, and only imported when it's actually used
+    try:
+        import numpy
+    except ImportError as e:
+        raise RuntimeError("Columnar planet data needs NumPy, install it with: pip install numpy") from e
+
+    return numpy
+
+
+class ColumnarExporter:
+    """
+    Exports the planets as a directory of NumPy columns, which can be memory-mapped and filtered or aggregated with
+    vectorized operations, without parsing anything. Each numeric field gets its own column (with missing values
+    zeroed out) alongside a null mask, the names get a fixed width string column, and each location field is dictionary
+    encoded into integer codes (with -1 for missing values) plus the sorted values that they point into. The manifest is
+    written last, so a bundle without one is incomplete.
+    """
+
+    MANIFEST_NAME = "manifest.json"
+    FORMAT_VERSION = 1
+
+    def __init__(self, directory_path: Path):
+        self.logger = utilities.initialize_logging(logging.getLogger(__name__))
+
+        self.directory_path = directory_path
+
+
+    def _save(self, name: str, array):
+        numpy = _import_numpy()
+        numpy.save(self.directory_path / f"{name}.npy", array, allow_pickle=False)
+
+
+    def export(self, planets: Iterable[Planet]) -> dict:
+        numpy = _import_numpy()
+
+        planets = list(planets)
+        self.directory_path.mkdir(parents=True, exist_ok=True)
+
+        ## Remove any previous manifest first, so a half written bundle is never mistaken for a complete one
+        manifest_path = self.directory_path / self.MANIFEST_NAME
+        manifest_path.unlink(missing_ok=True)
+
+        ## Fixed width strings (rather than python objects) are what let the names be memory-mapped
+        self._save("name", numpy.array([planet.name for planet in planets], dtype=str))
+
+        for field, dtype in _NUMERIC_FIELD_DTYPES.items():
+            values = [getattr(planet, field) for planet in planets]
+            mask = numpy.array([value is None for value in values], dtype=bool)
+            column = numpy.array([0 if value is None else value for value in values], dtype=dtype)
+
+            self._save(field, column)
+            self._save(f"{field}.mask", mask)
+
+        for field in LOCATION_FIELDS:
+            values = [getattr(planet, field) for planet in planets]
+            dictionary = sorted({value for value in values if value is not None})
+            codes_by_value = {value: code for code, value in enumerate(dictionary)}
+            codes = numpy.array([codes_by_value.get(value, -1) for value in values], dtype="int32")
+
+            self._save(f"{field}.codes", codes)
+            self._save(f"{field}.values", numpy.array(dictionary, dtype=str))
+
+        manifest = {
+            "format_version": self.FORMAT_VERSION,
+            "row_count": len(planets),
+            "numeric_fields": _NUMERIC_FIELD_DTYPES,
+            "location_fields": list(LOCATION_FIELDS)
+        }
+        utilities.store_json(manifest, manifest_path)
+
+        self.logger.info(f"Exported {len(planets)} planets as columns in: {self.directory_path}")
+
+        return manifest
+
+
+class ColumnarPlanetData:
+    """
+    Loads a bundle written by the ColumnarExporter, memory-mapping each column (by default) so that only the pages that
+    are actually read get loaded
+    """
+
+    def __init__(self, directory_path: Path, mmap_mode: str = "r"):
+        self.directory_path = directory_path
+        self.mmap_mode = mmap_mode
+
+        manifest_path = directory_path / ColumnarExporter.MANIFEST_NAME
+        if (not manifest_path.exists()):
+            raise FileNotFoundError(f"No manifest in {directory_path}, so the columnar export is missing or incomplete")
+
+        self.manifest = utilities.load_json(manifest_path)
+        if (self.manifest["format_version"] != ColumnarExporter.FORMAT_VERSION):
+            raise RuntimeError(f"Unsupported columnar format version {self.manifest['format_version']}")
+
+        self._arrays = {}
+
+    ## Properties
+
+    @property
+    def names(self):
+        return self._load("name")
+
+    ## Methods
+
+    def __len__(self) -> int:
+        return self.manifest["row_count"]
+
+
+    def _load(self, name: str):
+        array = self._arrays.get(name)
+        if (array is None):
+            numpy = _import_numpy()
+            array = numpy.load(self.directory_path / f"{name}.npy", mmap_mode=self.mmap_mode, allow_pickle=False)
+            self._arrays[name] = array
+
+        return array
+
+
+    def _assert_numeric_field(self, field: str):
+        if (field not in self.manifest["numeric_fields"]):
+            raise ValueError(f"Unknown numeric field {field}, must be one of {', '.join(self.manifest['numeric_fields'])}")
+
+
+    def _assert_location_field(self, field: str):
+        if (field not in self.manifest["location_fields"]):
+            raise ValueError(f"Unknown location field {field}, must be one of {', '.join(self.manifest['location_fields'])}")
+
+
+    def get_column(self, field: str):
+        """
+        Gets the raw values of a numeric field, where missing values are zeroed out (see get_mask)
+        """
+
+        self._assert_numeric_field(field)
+        return self._load(field)
+
+
+    def get_mask(self, field: str):
+        """
+        Gets the null mask of a numeric field, which is True wherever the value is missing
+        """
+
+        self._assert_numeric_field(field)
+        return self._load(f"{field}.mask")
+
+
+    def get_masked_column(self, field: str):
+        """
+        Gets a numeric field as a masked array, so that missing values are left out of any aggregations
+        """
+
+        numpy = _import_numpy()
+        return numpy.ma.MaskedArray(self.get_column(field), mask=self.get_mask(field))
+
+
+    def get_location_codes(self, field: str):
+        self._assert_location_field(field)
+        return self._load(f"{field}.codes")
+
+
+    def get_location_values(self, field: str):
+        self._assert_location_field(field)
+        return self._load(f"{field}.values")
+
+
+    def get_location_code(self, field: str, value: str) -> int:
+        """
+        Gets the code that a location value is encoded as, or -1 if no planet has it
+        """
+
+        numpy = _import_numpy()
+        values = self.get_location_values(field)
+        code = int(numpy.searchsorted(values, value))
+
+        return code if code < len(values) and values[code] == value else -1
+
+
+if (__name__ == "__main__"):
+    config = utilities.get_config()
+    output_directory_path = utilities.get_root_path() / config.get("output_directory_path", "out")
+
+    parser = argparse.ArgumentParser(description="Exports planet data as memory-mappable NumPy columns")
+    parser.add_argument(
+        "--path",
+        type=Path,
+        default=(
+            output_directory_path /
+            f"{config.get('planet_data_json_name', 'planet_data')}.{config.get('planet_data_format', 'json')}"
+        ),
+        help="The planet data store to export"
+    )
+    parser.add_argument(
+        "--output",
+        type=Path,
+        default=output_directory_path / "planet_columns",
+        help="The directory to export the columns into"
+    )
+    args = parser.parse_args()
+
+    from storage.planet_data_reader import PlanetDataReader
+    ColumnarExporter(args.output).export(PlanetDataReader(args.path))
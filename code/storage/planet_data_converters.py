@@ -0,0 +1,110 @@
+import argparse
+import csv
+import json
+import os
+from pathlib import Path
+from typing import Iterable, Iterator
+
+import utilities
+from storage.planet_data_reader import PlanetDataReader
+from storage.planet_data_writer import PlanetDataWriter
+
+
+def iterate_csv_rows(planets: Iterable[dict]) -> Iterator[list]:
+    """
+    Turns planets into csv rows, starting with a header row. List fields (ex. the description) are json encoded, so
+    nothing is lost, and missing values are left empty.
+    """
+
+    field_names: list[str] = None
+    for planet in planets:
+        if (field_names is None):
+            field_names = list(planet.keys())
+            yield field_names
+
+        yield [
+            json.dumps(value, ensure_ascii=False) if isinstance(value, list) else value
+            for value in (planet.get(field_name) for field_name in field_names)
+        ]
+
+
+def convert_to_csv(planets: Iterable[dict], path: Path) -> int:
+    """
+    Streams planets out to a csv file, via a .partial file that only replaces the destination once it's complete.
+    Returns the number of planets written.
+    """
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    partial_path = path.with_name(f"{path.name}.partial")
+
+    row_count = 0
+    with open(partial_path, "w", encoding="utf-8", newline="") as fd:
+        writer = csv.writer(fd)
+        for row in iterate_csv_rows(planets):
+            writer.writerow(row)
+            row_count += 1
+
+        fd.flush()
+        os.fsync(fd.fileno())
+
+    os.replace(partial_path, path)
+
+    ## Don't count the header
+    return max(row_count - 1, 0)
+
+
+def convert_to_planet_data(
+        named_planets: Iterable[tuple[str, dict]],
+        path: Path,
+        output_format: str,
+        indent: int = None
+) -> int:
+    """
+    Streams (name, planet) pairs out to a planet data store (json or newline delimited json). Returns the number of
+    planets written.
+    """
+
+    with PlanetDataWriter(path, output_format, indent).open() as planet_data_writer:
+        for name, planet in named_planets:
+            planet_data_writer.write(name, planet)
+
+    return planet_data_writer.count
+
+
+def convert(path: Path, output_path: Path, indent: int = None) -> int:
+    """
+    Converts a planet data store into the format given by the output path's extension (csv, ndjson, or json)
+    """
+
+    reader = PlanetDataReader(path)
+    output_format = output_path.suffix.lstrip(".")
+
+    if (output_format == "csv"):
+        return convert_to_csv((planet for _, planet in reader.iterate_dicts()), output_path)
+
+    if (output_format in [PlanetDataWriter.JSON, PlanetDataWriter.NDJSON]):
+        return convert_to_planet_data(reader.iterate_dicts(), output_path, output_format, indent)
+
+    raise RuntimeError(f"Unable to convert to {output_path}, the extension must be .csv, .ndjson, or .json")
+
+
+if (__name__ == "__main__"):
+    config = utilities.get_config()
+
+    parser = argparse.ArgumentParser(description="Converts planet data between json, newline delimited json, and csv")
+    parser.add_argument(
+        "--path",
+        type=Path,
+        default=(
+            utilities.get_root_path() /
+            config.get("output_directory_path", "out") /
+            f"{config.get('planet_data_json_name', 'planet_data')}.{config.get('planet_data_format', 'json')}"
+        ),
+        help="The planet data store to convert"
+    )
+    parser.add_argument("--output", type=Path, required=True, help="Where to convert to (.csv, .ndjson, or .json)")
+    parser.add_argument("--indent", type=int, default=None, help="The indent for json output (compact if left out)")
+    args = parser.parse_args()
+
+    count = convert(args.path, args.output, args.indent)
+    print(f"Converted {count} planets to: {args.output}")
@@ -0,0 +1,135 @@
+import json
+from pathlib import Path
+from typing import Iterator, TextIO
+
+from extensions import fast_json
+from models.planet import Planet
+
+
+class PlanetDataReader:
+    """
+    Streams planets out of a planet data store one at a time, so memory stays flat no matter how big the store gets.
+    Newline delimited json is read a line at a time, and json objects are read in chunks and incrementally decoded a
+    planet at a time, so only the current planet (and the chunk it's in) is ever held in memory.
+    """
+
+    ## What the json object decoder expects to find next
+    _OPEN = "open"
+    _NAME_OR_CLOSE = "name or close"
+    _NAME = "name"
+    _COLON = "colon"
+    _VALUE = "value"
+    _SEPARATOR_OR_CLOSE = "separator or close"
+    _DONE = "done"
+
+    _WHITESPACE = " \t\n\r"
+
+    def __init__(self, path: Path, chunk_size: int = 64 * 1024):
+        assert(chunk_size > 0)
+
+        self.path = path
+        self.chunk_size = chunk_size
+
+
+    def __iter__(self) -> Iterator[Planet]:
+        for _, planet_data in self.iterate_dicts():
+            yield Planet.from_dict(planet_data)
+
+
+    def iterate_dicts(self) -> Iterator[tuple[str, dict]]:
+        """
+        Yields (name, planet data) tuples in store order
+        """
+
+        with open(self.path, encoding="utf-8") as fd:
+            if (self.path.suffix == ".ndjson"):
+                for line in fd:
+                    if (line.strip()):
+                        planet_data = fast_json.loads(line)
+                        yield (planet_data["name"], planet_data)
+            else:
+                yield from self._iterate_json_object(fd)
+
+
+    def _raise_unexpected(self, expected: str, buffer: str):
+        found = repr(buffer[:20]) if buffer else "the end of the file"
+        raise ValueError(f"Expected {expected} in {self.path}, but found {found}")
+
+
+    def _iterate_json_object(self, fd: TextIO) -> Iterator[tuple[str, dict]]:
+        decoder = json.JSONDecoder()
+        buffer = ""
+        end_of_file = False
+        expecting = self._OPEN
+        name: str = None
+
+        while (True):
+            buffer = buffer.lstrip(self._WHITESPACE)
+
+            ## Tokens are only decoded once they're complete, so keep reading until there's something to decode
+            if (not buffer):
+                if (end_of_file):
+                    if (expecting != self._DONE):
+                        self._raise_unexpected(expecting, buffer)
+                    return
+
+                chunk = fd.read(self.chunk_size)
+                end_of_file = not chunk
+                buffer += chunk
+                continue
+
+            if (expecting == self._DONE):
+                self._raise_unexpected("nothing after the planet data", buffer)
+
+            if (expecting == self._OPEN):
+                if (buffer[0] != "{"):
+                    self._raise_unexpected("'{'", buffer)
+
+                buffer = buffer[1:]
+                expecting = self._NAME_OR_CLOSE
+                continue
+
+            if (expecting in [self._NAME_OR_CLOSE, self._SEPARATOR_OR_CLOSE] and buffer[0] == "}"):
+                buffer = buffer[1:]
+                expecting = self._DONE
+                continue
+
+            if (expecting == self._SEPARATOR_OR_CLOSE):
+                if (buffer[0] != ","):
+                    self._raise_unexpected("',' or '}'", buffer)
+
+                buffer = buffer[1:]
+                expecting = self._NAME
+                continue
+
+            if (expecting == self._COLON):
+                if (buffer[0] != ":"):
+                    self._raise_unexpected("':'", buffer)
+
+                buffer = buffer[1:]
+                expecting = self._VALUE
+                continue
+
+            ## Otherwise it's a name or a planet. Either could be cut off at the end of the chunk (and a number that ends
+            ## right at the end might be missing digits), so read more and try again until it's complete.
+            try:
+                value, end = decoder.raw_decode(buffer)
+            except json.JSONDecodeError:
+                if (end_of_file):
+                    raise
+
+                value, end = (None, len(buffer))
+
+            if (end == len(buffer) and not end_of_file):
+                chunk = fd.read(self.chunk_size)
+                end_of_file = not chunk
+                buffer += chunk
+                continue
+
+            buffer = buffer[end:]
+            if (expecting == self._VALUE):
+                yield (name, value)
+                expecting = self._SEPARATOR_OR_CLOSE
+            else:
+                name = value
+                expecting = self._COLON
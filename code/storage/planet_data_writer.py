@@ -0,0 +1,120 @@
+import json
+import logging
+import os
+from pathlib import Path
+
+import utilities
+from extensions import fast_json
+
+
+class PlanetDataWriter:
+    """
+    Streams planets out to disk as soon as they're built, rather than holding every planet in memory until the end of
+    the run. Planets are written as a single json object (keyed by name), or as newline delimited json with one planet
+    per line. Everything goes to a .partial file alongside the destination, which downstream consumers can tail during
+    the run, and which only replaces the destination once the run has finished successfully.
+    """
+
+    JSON = "json"
+    NDJSON = "ndjson"
+
+    def __init__(self, path: Path, output_format: str = JSON, indent: int = None):
+        self.logger = utilities.initialize_logging(logging.getLogger(__name__))
+
+        assert(output_format in [self.JSON, self.NDJSON])
+        assert(indent is None or indent >= 0)
+
+        self.path = path
+        self.output_format = output_format
+        self.indent = indent
+
+        self._file = None
+        self._count = 0
+
+    ## Properties
+
+    @property
+    def partial_path(self) -> Path:
+        return self.path.with_name(f"{self.path.name}.partial")
+
+
+    @property
+    def count(self) -> int:
+        return self._count
+
+    ## Methods
+
+    def __enter__(self):
+        return self
+
+
+    def __exit__(self, exception_type, exception, traceback):
+        ## Leave the destination alone if the run didn't finish, but keep whatever was written for a look
+        if (exception is not None):
+            self.abort()
+        else:
+            self.close()
+
+
+    def open(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._file = open(self.partial_path, "w", encoding="utf-8")
+        self._count = 0
+
+        if (self.output_format == self.JSON):
+            self._file.write("{")
+
+        return self
+
+
+    def write(self, name: str, planet: dict):
+        if (self.output_format == self.NDJSON):
+            ## Each line has to stand on its own, so they're always compact
+            self._file.write(fast_json.dumps(planet) + "\n")
+        elif (self.indent is None):
+            self._file.write(f"{',' if self._count > 0 else ''}{fast_json.dumps(name)}:{fast_json.dumps(planet)}")
+        else:
+            ## Nest the planet one level in, just like json.dump would
+            padding = " " * self.indent
+            entry = f"{json.dumps(name)}: {json.dumps(planet, indent=self.indent)}".replace("\n", f"\n{padding}")
+            self._file.write(f"{',' if self._count > 0 else ''}\n{padding}{entry}")
+
+        ## Don't leave planets sitting in the buffer, so anything tailing the file sees them as they're built
+        self._file.flush()
+        self._count += 1
+
+
+    def _close_file(self):
+        if (self.output_format == self.JSON):
+            self._file.write("\n}" if self._count > 0 and self.indent is not None else "}")
+
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._file.close()
+        self._file = None
+
+
+    def close(self):
+        """
+        Finishes the file, and atomically moves it over the destination
+        """
+
+        if (self._file is None):
+            return
+
+        self._close_file()
+        os.replace(self.partial_path, self.path)
+        self.logger.info(f"Stored {self._count} planets in store: {self.path}")
+
+
+    def abort(self):
+        """
+        Stops writing without touching the destination, leaving the partial file behind
+        """
+
+        if (self._file is None):
+            return
+
+        self._file.close()
+        self._file = None
+        self.logger.warning(f"Left {self._count} planets in partial store: {self.partial_path}")
@@ -0,0 +1,330 @@
+import argparse
+import logging
+import sqlite3
+import time
+from pathlib import Path
+from typing import Iterable, Iterator
+
+import utilities
+from extensions import fast_json
+from models.planet import Planet, LOCATION_FIELDS, TEXT_FIELDS, NUMERIC_FIELDS
+from storage.planet_data_writer import PlanetDataWriter
+from storage.planet_data_converters import convert_to_csv
+
+## Every planet column, in the same (sorted) order as Planet.to_dict, so rows turn straight back into the same dicts
+_PLANET_FIELDS = tuple(sorted(("name", *LOCATION_FIELDS, *TEXT_FIELDS, *NUMERIC_FIELDS)))
+_INTEGER_FIELDS = ("satellite_count",)
+
+
+class PlanetDatabase:
+    """
+    SQLite store of the planet index and the planets. Each numeric field gets its own column, the text fields are
+    stored as json, and the location fields are indexed, so services can query it directly. Planets are upserted one at
+    a time, each in its own transaction, so the database stays current (and consistent) during long runs without ever
+    being rewritten whole.
+
+    Like PlanetDataWriter, planets are written between open and close. Closing also removes any planets that weren't
+    written since it was opened, so the database ends up holding the same planets as the planet data store.
+    """
+
+    SUFFIX = ".sqlite3"
+
+    def __init__(self, path: Path):
+        self.logger = utilities.initialize_logging(logging.getLogger(__name__))
+
+        self.path = path
+
+        self._connection: sqlite3.Connection = None
+        self._written_names: set[str] = None
+
+    ## Properties
+
+    @property
+    def connection(self) -> sqlite3.Connection:
+        if (self._connection is None):
+            self._connection = self._connect()
+
+        return self._connection
+
+    ## Methods
+
+    def _connect(self) -> sqlite3.Connection:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+
+        connection = sqlite3.connect(self.path)
+        ## Readers aren't blocked while the scrape writes, and each commit only needs to sync the write-ahead log
+        connection.execute("PRAGMA journal_mode = WAL")
+        connection.execute("PRAGMA synchronous = NORMAL")
+        self._create_schema(connection)
+
+        return connection
+
+
+    def _create_schema(self, connection: sqlite3.Connection):
+        columns = []
+        for field in _PLANET_FIELDS:
+            if (field == "name"):
+                columns.append("name TEXT PRIMARY KEY")
+            elif (field in NUMERIC_FIELDS):
+                columns.append(f"{field} {'INTEGER' if field in _INTEGER_FIELDS else 'REAL'}")
+            else:
+                ## Locations are plain text, and the text fields are json arrays
+                columns.append(f"{field} TEXT")
+
+        with connection:
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS planet_index (name TEXT PRIMARY KEY, url TEXT NOT NULL, position INTEGER)"
+            )
+            connection.execute(
+                f"CREATE TABLE IF NOT EXISTS planets ({', '.join(columns)}, updated_at REAL NOT NULL)"
+            )
+            for field in LOCATION_FIELDS:
+                connection.execute(f"CREATE INDEX IF NOT EXISTS planets_{field} ON planets ({field})")
+
+
+    def _to_row(self, name: str, planet: dict) -> tuple:
+        row = []
+        for field in _PLANET_FIELDS:
+            value = name if field == "name" else planet.get(field)
+            if (field in TEXT_FIELDS and value is not None):
+                value = fast_json.dumps(value)
+
+            row.append(value)
+
+        return tuple(row)
+
+
+    def _to_dict(self, row: tuple) -> dict:
+        planet = dict(zip(_PLANET_FIELDS, row))
+        for field in TEXT_FIELDS:
+            if (planet[field] is not None):
+                planet[field] = fast_json.loads(planet[field])
+
+        return planet
+
+
+    def __enter__(self):
+        return self
+
+
+    def __exit__(self, exception_type, exception, traceback):
+        ## Whatever was upserted before a failure stays, but nothing is removed based on an unfinished run
+        if (exception is not None):
+            self.abort()
+        else:
+            self.close()
+
+
+    def open(self):
+        self._written_names = set()
+
+        return self
+
+
+    def upsert(self, name: str, planet: dict):
+        """
+        Inserts the planet, or updates it if it's already stored, in a transaction of its own
+        """
+
+        columns = ", ".join((*_PLANET_FIELDS, "updated_at"))
+        placeholders = ", ".join("?" * (len(_PLANET_FIELDS) + 1))
+        updates = ", ".join(
+            f"{field} = excluded.{field}" for field in (*_PLANET_FIELDS, "updated_at") if field != "name"
+        )
+
+        with self.connection:
+            self.connection.execute(
+                f"INSERT INTO planets ({columns}) VALUES ({placeholders}) ON CONFLICT (name) DO UPDATE SET {updates}",
+                (*self._to_row(name, planet), time.time())
+            )
+
+
+    def write(self, name: str, planet: dict):
+        self.upsert(name, planet)
+        self._written_names.add(name)
+
+
+    def close(self):
+        """
+        Removes the planets that weren't written since the database was opened
+        """
+
+        if (self._written_names is not None):
+            stored_names = [row[0] for row in self.connection.execute("SELECT name FROM planets")]
+            removed_names = [(name,) for name in stored_names if name not in self._written_names]
+
+            with self.connection:
+                self.connection.executemany("DELETE FROM planets WHERE name = ?", removed_names)
+
+            self.logger.info(
+                f"Stored {len(self._written_names)} planets (and removed {len(removed_names)}) in database: {self.path}"
+            )
+            self._written_names = None
+
+        self.disconnect()
+
+
+    def abort(self):
+        self._written_names = None
+        self.disconnect()
+
+
+    def disconnect(self):
+        if (self._connection is not None):
+            self._connection.close()
+            self._connection = None
+
+
+    def store_index(self, planet_index: dict[str, str]):
+        """
+        Replaces the stored planet index, in a single transaction
+        """
+
+        with self.connection:
+            self.connection.execute("DELETE FROM planet_index")
+            self.connection.executemany(
+                "INSERT INTO planet_index (name, url, position) VALUES (?, ?, ?)",
+                ((name, url, position) for position, (name, url) in enumerate(planet_index.items()))
+            )
+
+        self.logger.info(f"Stored {len(planet_index)} planets from the index in database: {self.path}")
+
+
+    def load_index(self) -> dict[str, str]:
+        return dict(self.connection.execute("SELECT name, url FROM planet_index ORDER BY position"))
+
+
+    def __len__(self) -> int:
+        return self.connection.execute("SELECT COUNT(*) FROM planets").fetchone()[0]
+
+
+    def get_dict(self, name: str) -> dict:
+        row = self.connection.execute(
+            f"SELECT {', '.join(_PLANET_FIELDS)} FROM planets WHERE name = ?",
+            (name,)
+        ).fetchone()
+
+        return self._to_dict(row) if row is not None else None
+
+
+    def get(self, name: str) -> Planet:
+        planet_data = self.get_dict(name)
+        if (planet_data is None):
+            return None
+
+        return Planet.from_dict(planet_data)
+
+
+    def iterate_dicts(self) -> Iterator[tuple[str, dict]]:
+        """
+        Yields a (name, planet dict) pair for every stored planet, in the order they were first stored
+        """
+
+        for row in self.connection.execute(f"SELECT {', '.join(_PLANET_FIELDS)} FROM planets ORDER BY rowid"):
+            planet = self._to_dict(row)
+            yield (planet["name"], planet)
+
+
+    def query(
+            self,
+            galaxy: str = None,
+            cluster: str = None,
+            system: str = None,
+            **ranges: tuple[float, float]
+    ) -> list[dict]:
+        """
+        Finds the planets that match every given filter, just like PlanetCatalog.query. Location filters match exactly,
+        and numeric filters are passed as (minimum, maximum) tuples keyed by field, either end of which can be None.
+        """
+
+        conditions = []
+        parameters = []
+        for field, value in zip(LOCATION_FIELDS, (galaxy, cluster, system)):
+            if (value is not None):
+                conditions.append(f"{field} = ?")
+                parameters.append(value)
+
+        for field, (minimum, maximum) in ranges.items():
+            if (field not in NUMERIC_FIELDS):
+                raise ValueError(f"Unknown numeric field {field}, must be one of {', '.join(NUMERIC_FIELDS)}")
+
+            if (minimum is not None):
+                conditions.append(f"{field} >= ?")
+                parameters.append(minimum)
+            if (maximum is not None):
+                conditions.append(f"{field} <= ?")
+                parameters.append(maximum)
+            if (minimum is None and maximum is None):
+                conditions.append(f"{field} IS NOT NULL")
+
+        where = f" WHERE {' AND '.join(conditions)}" if conditions else ""
+        rows = self.connection.execute(
+            f"SELECT {', '.join(_PLANET_FIELDS)} FROM planets{where} ORDER BY rowid",
+            parameters
+        )
+
+        return [self._to_dict(row) for row in rows]
+
+
+    def import_planets(self, planets: Iterable[tuple[str, dict]]) -> int:
+        """
+        Replaces the stored planets with the given (name, planet dict) pairs, ex. from a PlanetDataReader
+        """
+
+        with self.open():
+            for name, planet in planets:
+                self.write(name, planet)
+
+            return len(self._written_names)
+
+
+    def export(self, path: Path, output_format: str = PlanetDataWriter.JSON, indent: int = None) -> int:
+        """
+        Exports the stored planets to the planet data format (json or newline delimited json), or to csv
+        """
+
+        if (output_format == "csv"):
+            return convert_to_csv((planet for _, planet in self.iterate_dicts()), path)
+        if (output_format not in [PlanetDataWriter.JSON, PlanetDataWriter.NDJSON]):
+            raise ValueError(f"Unable to export the planet database to {output_format}, it must be csv, ndjson, or json")
+
+        with PlanetDataWriter(path, output_format, indent).open() as planet_data_writer:
+            for name, planet in self.iterate_dicts():
+                planet_data_writer.write(name, planet)
+
+            return planet_data_writer.count
+
+
+if (__name__ == "__main__"):
+    config = utilities.get_config()
+    output_directory_path = utilities.get_root_path() / config.get("output_directory_path", "out")
+
+    parser = argparse.ArgumentParser(
+        description="Exports the planet database to planet data, or imports planet data into it"
+    )
+    parser.add_argument(
+        "--path",
+        type=Path,
+        default=output_directory_path / f"{config.get('planet_database_name', 'planet_data')}{PlanetDatabase.SUFFIX}",
+        help="The planet database"
+    )
+    parser.add_argument(
+        "--export",
+        type=Path,
+        default=None,
+        help="Export the database to this .csv, .json, or .ndjson file"
+    )
+    parser.add_argument("--import", dest="import_path", type=Path, default=None, help="Import this planet data store")
+    parser.add_argument("--indent", type=int, default=None, help="The indent for json output (compact if left out)")
+    args = parser.parse_args()
+
+    planet_database = PlanetDatabase(args.path)
+    if (args.import_path is not None):
+        from storage.planet_data_reader import PlanetDataReader
+
+        count = planet_database.import_planets(PlanetDataReader(args.import_path).iterate_dicts())
+        print(f"Imported {count} planets into: {args.path}")
+    if (args.export is not None):
+        count = planet_database.export(args.export, args.export.suffix.lstrip("."), args.indent)
+        planet_database.disconnect()
+        print(f"Exported {count} planets to: {args.export}")
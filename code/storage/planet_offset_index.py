@@ -0,0 +1,240 @@
+import argparse
+import hashlib
+import json
+import logging
+import mmap
+import os
+import re
+from pathlib import Path
+from typing import Iterator
+
+import utilities
+from extensions import fast_json
+from models.planet import Planet
+
+
+class StaleOffsetIndexError(RuntimeError):
+    """
+    Raised when an offset index doesn't match the data file that it indexes, as the file's changed since it was built
+    """
+    pass
+
+
+## Everything that json allows between tokens
+_WHITESPACE = re.compile(r"[ \t\n\r]*")
+
+
+def _hash_file(path: Path) -> str:
+    content_hash = hashlib.sha256()
+    with open(path, "rb") as fd:
+        for chunk in iter(lambda: fd.read(1024 * 1024), b""):
+            content_hash.update(chunk)
+
+    return content_hash.hexdigest()
+
+
+class PlanetOffsetIndex:
+    """
+    Sidecar index for a planet data store (either a json object of planets, or newline delimited json), which maps
+    each planet's name to the byte offset and length of its record in the file. The index holds the hash of the file
+    that it was built from, so that a stale index is caught rather than handing back the wrong bytes, along with its
+    size and modification time, so that an unchanged file can be recognized without hashing it.
+    """
+
+    FORMAT_VERSION = 1
+
+    def __init__(self, data_path: Path):
+        self.logger = utilities.initialize_logging(logging.getLogger(__name__))
+
+        self.data_path = data_path
+
+    ## Properties
+
+    @property
+    def path(self) -> Path:
+        return self.data_path.with_name(f"{self.data_path.name}.offsets.json")
+
+    ## Methods
+
+    def _scan_ndjson(self, content: bytes) -> Iterator[tuple[str, int, int]]:
+        offset = 0
+        for line in content.splitlines(keepends=True):
+            record = line.rstrip(b"\r\n")
+            if (record.strip()):
+                yield (fast_json.loads(record)["name"], offset, len(record))
+
+            offset += len(line)
+
+
+    def _scan_json(self, content: bytes) -> Iterator[tuple[str, int, int]]:
+        text = content.decode("utf-8")
+        decoder = json.JSONDecoder()
+
+        ## The decoder works in characters, so keep a running count of the bytes that they add up to
+        byte_offset = 0
+        character_offset = 0
+        def to_byte_offset(index: int) -> int:
+            nonlocal byte_offset, character_offset
+            byte_offset += len(text[character_offset:index].encode("utf-8"))
+            character_offset = index
+            return byte_offset
+
+        def expect(index: int, token: str) -> int:
+            index = _WHITESPACE.match(text, index).end()
+            if (text[index:index + 1] != token):
+                raise ValueError(f"Expected '{token}' at character {index} of {self.data_path}")
+
+            return _WHITESPACE.match(text, index + 1).end()
+
+        index = expect(0, "{")
+        if (text[index:index + 1] == "}"):
+            return
+
+        while (True):
+            name, index = decoder.raw_decode(text, index)
+            index = expect(index, ":")
+
+            start = to_byte_offset(index)
+            _, index = decoder.raw_decode(text, index)
+            yield (name, start, to_byte_offset(index) - start)
+
+            index = _WHITESPACE.match(text, index).end()
+            if (text[index:index + 1] == "}"):
+                return
+
+            index = expect(index, ",")
+
+
+    def build(self) -> dict:
+        """
+        Scans the data file for the offset of every planet, and stores the index alongside it
+        """
+
+        with open(self.data_path, "rb") as fd:
+            content = fd.read()
+            ## Stat the open file, so the modification time matches the content that was actually read
+            modified_ns = os.fstat(fd.fileno()).st_mtime_ns
+
+        is_ndjson = self.data_path.suffix == ".ndjson"
+        records = self._scan_ndjson(content) if is_ndjson else self._scan_json(content)
+
+        index = {
+            "format_version": self.FORMAT_VERSION,
+            "data_sha256": hashlib.sha256(content).hexdigest(),
+            "data_size": len(content),
+            "data_mtime_ns": modified_ns,
+            "offsets": {name: [offset, length] for name, offset, length in records}
+        }
+        utilities.store_json(index, self.path)
+        self.logger.info(f"Stored the offsets of {len(index['offsets'])} planets in: {self.path}")
+
+        return index
+
+
+class PlanetOffsetReader:
+    """
+    Looks up single planets in a planet data store through its offset index, by memory-mapping the data file and only
+    decoding the requested records. The data file is checked against the index when the reader is opened, and only
+    hashed if its modification time has changed since the index was built.
+    """
+
+    def __init__(self, data_path: Path):
+        self.data_path = data_path
+        self.index_path = PlanetOffsetIndex(data_path).path
+
+        self._offsets: dict[str, list[int]] = None
+        self._file = None
+        self._mmap: mmap.mmap = None
+
+
+    def __enter__(self):
+        return self.open()
+
+
+    def __exit__(self, exception_type, exception, traceback):
+        self.close()
+
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._offsets
+
+
+    def __len__(self) -> int:
+        return len(self._offsets)
+
+
+    def open(self):
+        index = utilities.load_json(self.index_path)
+        if (index["format_version"] != PlanetOffsetIndex.FORMAT_VERSION):
+            raise StaleOffsetIndexError(f"Unsupported offset index version {index['format_version']} in {self.index_path}")
+
+        ## Check the size first, since it's free, and catches most changes without needing to hash anything. An unchanged
+        ## modification time means the file hasn't been written since the index was built, so hashing it is skipped
+        ## (keeping quick lookups quick), otherwise the hash decides, since a file can be touched without changing.
+        stat = self.data_path.stat()
+        if (
+            stat.st_size != index["data_size"] or
+            (
+                stat.st_mtime_ns != index.get("data_mtime_ns") and
+                _hash_file(self.data_path) != index["data_sha256"]
+            )
+        ):
+            raise StaleOffsetIndexError(f"{self.index_path} is out of date with {self.data_path}, and needs rebuilding")
+
+        self._offsets = index["offsets"]
+        self._file = open(self.data_path, "rb")
+        ## Empty files can't be mapped, but then there's nothing to look up in them anyway
+        if (index["data_size"] > 0):
+            self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        return self
+
+
+    def close(self):
+        if (self._mmap is not None):
+            self._mmap.close()
+            self._mmap = None
+
+        if (self._file is not None):
+            self._file.close()
+            self._file = None
+
+
+    def get_names(self) -> list[str]:
+        return list(self._offsets.keys())
+
+
+    def get_dict(self, name: str) -> dict:
+        offsets = self._offsets.get(name)
+        if (offsets is None):
+            return None
+
+        offset, length = offsets
+        return fast_json.loads(self._mmap[offset:offset + length])
+
+
+    def get(self, name: str) -> Planet:
+        planet_data = self.get_dict(name)
+        if (planet_data is None):
+            return None
+
+        return Planet.from_dict(planet_data)
+
+
+if (__name__ == "__main__"):
+    config = utilities.get_config()
+
+    parser = argparse.ArgumentParser(description="Builds the offset index for a planet data store")
+    parser.add_argument(
+        "--path",
+        type=Path,
+        default=(
+            utilities.get_root_path() /
+            config.get("output_directory_path", "out") /
+            f"{config.get('planet_data_json_name', 'planet_data')}.{config.get('planet_data_format', 'json')}"
+        ),
+        help="The planet data store to index"
+    )
+    args = parser.parse_args()
+
+    PlanetOffsetIndex(args.path).build()
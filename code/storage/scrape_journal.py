@@ -0,0 +1,125 @@
+import logging
+import os
+from pathlib import Path
+
+import utilities
+from extensions import fast_json
+
+
+class ScrapeJournal:
+    """
+    Append-only journal of every planet that's been built, rejected, or failed during a run. Each entry is a line of
+    json, and the file's fsync'd after every batch of entries, so a crash only loses the last partial batch. Interrupted
+    runs can then be resumed from whatever the journal says is already done.
+    """
+
+    BUILT = "built"
+    REJECTED = "rejected"
+    FAILED = "failed"
+
+    def __init__(self, path: Path, fsync_batch_size: int):
+        self.logger = utilities.initialize_logging(logging.getLogger(__name__))
+
+        assert(fsync_batch_size > 0)
+
+        self.path = path
+        self.fsync_batch_size = fsync_batch_size
+
+        self._file = None
+        self._unsynced_count = 0
+
+
+    def __enter__(self):
+        return self
+
+
+    def __exit__(self, exception_type, exception, traceback):
+        self.close()
+
+
+    def open(self, resume: bool = False):
+        """
+        Opens the journal for writing, appending to the existing journal when resuming, or starting a fresh one otherwise
+        """
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._file = open(self.path, "a" if resume else "w", encoding="utf-8")
+        self._unsynced_count = 0
+
+        ## Make sure that a partial last line (from a crash mid-write) doesn't swallow the first new entry
+        if (resume and self._file.tell() > 0):
+            with open(self.path, "rb") as fd:
+                fd.seek(-1, os.SEEK_END)
+                if (fd.read(1) != b"\n"):
+                    self._file.write("\n")
+
+        return self
+
+
+    def sync(self):
+        if (self._file is None):
+            return
+
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._unsynced_count = 0
+
+
+    def close(self):
+        if (self._file is None):
+            return
+
+        self.sync()
+        self._file.close()
+        self._file = None
+
+
+    def _append(self, entry: dict):
+        self._file.write(fast_json.dumps(entry) + "\n")
+
+        self._unsynced_count += 1
+        if (self._unsynced_count >= self.fsync_batch_size):
+            self.sync()
+
+
+    def record_built(self, name: str, planet: dict):
+        self._append({"name": name, "status": self.BUILT, "planet": planet})
+
+
+    def record_rejected(self, name: str):
+        self._append({"name": name, "status": self.REJECTED})
+
+
+    def record_failed(self, name: str, url: str, error: str):
+        self._append({"name": name, "status": self.FAILED, "url": url, "error": error})
+
+
+    def load_entries(self) -> dict[str, dict]:
+        """
+        Loads the latest journal entry for each planet
+        """
+
+        entries: dict[str, dict] = {}
+        try:
+            with open(self.path, encoding="utf-8") as fd:
+                for line in fd:
+                    try:
+                        entry = fast_json.loads(line)
+                    except ValueError:
+                        ## A crash mid-write can leave a partial last line behind, which never made it to disk anyway
+                        self.logger.warning(f"Skipping malformed journal entry in {self.path}")
+                        continue
+
+                    entries[entry["name"]] = entry
+        except FileNotFoundError:
+            pass
+
+        return entries
+
+
+    def load_completed_names(self) -> set[str]:
+        """
+        Gets the names of the planets that don't need to be scraped again (built or rejected, but not failed)
+        """
+
+        return {name for name, entry in self.load_entries().items() if entry["status"] != self.FAILED}
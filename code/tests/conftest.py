@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+## The modules import each other relative to the code directory, just like when they're run from it
+sys.path.insert(0, str(Path(__file__).parent.parent))
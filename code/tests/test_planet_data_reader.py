@@ -0,0 +1,81 @@
+import pytest
+
+from storage.planet_data_reader import PlanetDataReader
+from storage.planet_data_writer import PlanetDataWriter
+
+## Small chunks, so names, strings, escapes, and multibyte characters all end up split across chunks
+CHUNK_SIZE = 7
+
+PLANETS = {
+    "2175 Aeia": {
+        "name": "2175 Aeia",
+        "cluster": "Rosetta Nebula",
+        "radius_km": 7437.0,
+        "satellite_count": 2,
+        "description": ["A \"quoted\" word, a back\\slash, and a\nnewline", "{not: [a, planet]}"]
+    },
+    "Tuchanka": {"name": "Tuchanka", "cluster": "Aralakh", "radius_km": 6325.123456789, "description": None},
+    "Ærith ☄": {"name": "Ærith ☄", "cluster": "Ωmega Nebula", "radius_km": -1e-05, "description": ["惑星 🪐"]},
+    "": {"name": "", "cluster": None, "radius_km": 0, "description": []}
+}
+
+
+def _write_store(tmp_path, output_format: str, indent: int = None):
+    path = tmp_path / f"planet_data.{output_format}"
+    with PlanetDataWriter(path, output_format, indent).open() as planet_data_writer:
+        for name, planet in PLANETS.items():
+            planet_data_writer.write(name, planet)
+
+    return path
+
+
+@pytest.mark.parametrize(
+    "output_format, indent",
+    [(PlanetDataWriter.JSON, None), (PlanetDataWriter.JSON, 4), (PlanetDataWriter.NDJSON, None)]
+)
+@pytest.mark.parametrize("chunk_size", [1, CHUNK_SIZE, 64 * 1024])
+def test_round_trips_the_writer_output(tmp_path, output_format: str, indent: int, chunk_size: int):
+    path = _write_store(tmp_path, output_format, indent)
+
+    assert(list(PlanetDataReader(path, chunk_size).iterate_dicts()) == list(PLANETS.items()))
+
+
+def test_reads_an_empty_store(tmp_path):
+    path = tmp_path / "planet_data.json"
+    with PlanetDataWriter(path, PlanetDataWriter.JSON, 4).open():
+        pass
+
+    assert(list(PlanetDataReader(path, CHUNK_SIZE).iterate_dicts()) == [])
+
+
+@pytest.mark.parametrize("indent", [None, 4])
+def test_rejects_every_truncation_of_a_json_store(tmp_path, indent: int):
+    content = _write_store(tmp_path, PlanetDataWriter.JSON, indent).read_bytes().rstrip()
+    truncated_path = tmp_path / "truncated.json"
+
+    for length in range(len(content)):
+        truncated_path.write_bytes(content[:length])
+
+        with pytest.raises(ValueError):
+            list(PlanetDataReader(truncated_path, CHUNK_SIZE).iterate_dicts())
+
+
+def test_rejects_a_truncated_ndjson_store(tmp_path):
+    content = _write_store(tmp_path, PlanetDataWriter.NDJSON).read_bytes()
+    truncated_path = tmp_path / "truncated.ndjson"
+    truncated_path.write_bytes(content[:-10])
+
+    with pytest.raises(ValueError):
+        list(PlanetDataReader(truncated_path, CHUNK_SIZE).iterate_dicts())
+
+
+@pytest.mark.parametrize(
+    "content",
+    ['{"Aeia" {}}', '{"Aeia": {} "Akuze": {}}', '{"Aeia": {}}}', '["Aeia"]', '{"Aeia": {"radius_km": 1.}}']
+)
+def test_rejects_malformed_stores(tmp_path, content: str):
+    path = tmp_path / "planet_data.json"
+    path.write_text(content, encoding="utf-8")
+
+    with pytest.raises(ValueError):
+        list(PlanetDataReader(path, CHUNK_SIZE).iterate_dicts())
@@ -0,0 +1,66 @@
+import os
+
+import pytest
+
+from storage import planet_offset_index
+from storage.planet_offset_index import PlanetOffsetIndex, PlanetOffsetReader, StaleOffsetIndexError
+
+PLANET_DATA = '{"Aeia": {"name": "Aeia", "radius_km": 7437.0}, "Bekke": {"name": "Bekke", "radius_km": 3212.0}}'
+
+
+def _build_index(tmp_path):
+    path = tmp_path / "planet_data.json"
+    path.write_text(PLANET_DATA, encoding="utf-8")
+    PlanetOffsetIndex(path).build()
+
+    return path
+
+
+def _set_mtime_ns(path, mtime_ns):
+    os.utime(path, ns=(mtime_ns, mtime_ns))
+
+
+def test_unchanged_file_is_not_hashed(tmp_path, monkeypatch):
+    path = _build_index(tmp_path)
+
+    def fail_hash(path):
+        raise AssertionError(f"{path} shouldn't be hashed")
+    monkeypatch.setattr(planet_offset_index, "_hash_file", fail_hash)
+
+    with PlanetOffsetReader(path) as reader:
+        assert(reader.get_dict("Bekke") == {"name": "Bekke", "radius_km": 3212.0})
+
+
+def test_touched_file_is_hashed_and_still_fresh(tmp_path, monkeypatch):
+    path = _build_index(tmp_path)
+    _set_mtime_ns(path, path.stat().st_mtime_ns + 1_000_000_000)
+
+    hashed_paths = []
+    hash_file = planet_offset_index._hash_file
+    def record_hash(path):
+        hashed_paths.append(path)
+        return hash_file(path)
+    monkeypatch.setattr(planet_offset_index, "_hash_file", record_hash)
+
+    with PlanetOffsetReader(path) as reader:
+        assert(reader.get_dict("Aeia") == {"name": "Aeia", "radius_km": 7437.0})
+    assert(hashed_paths == [path])
+
+
+def test_same_size_rewrite_is_stale(tmp_path):
+    path = _build_index(tmp_path)
+    mtime_ns = path.stat().st_mtime_ns
+
+    path.write_text(PLANET_DATA.replace("7437.0", "7438.0"), encoding="utf-8")
+    _set_mtime_ns(path, mtime_ns + 1_000_000_000)
+
+    with pytest.raises(StaleOffsetIndexError):
+        PlanetOffsetReader(path).open()
+
+
+def test_resized_file_is_stale(tmp_path):
+    path = _build_index(tmp_path)
+    path.write_text(PLANET_DATA.replace("7437.0", "7437.25"), encoding="utf-8")
+
+    with pytest.raises(StaleOffsetIndexError):
+        PlanetOffsetReader(path).open()
@@ -0,0 +1,174 @@
+import http.client
+from datetime import datetime, timezone
+
+from networking.circuit_breaker import CircuitBreaker
+from networking.http_client import HttpError, HttpResponse
+from networking.retry_policy import RetryPolicy
+from scrapers.retry_queue import RetryQueue
+
+NOW = datetime(2026, 1, 1, 12, 0, 0, tzinfo=timezone.utc)
+
+
+class _FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+
+    def __call__(self) -> float:
+        return self.now
+
+
+    def sleep(self, seconds: float):
+        self.now += seconds
+
+
+class _MaxRandom:
+    """
+    Always picks the top of the range, so the backoff is as long as it can be
+    """
+
+    def uniform(self, low: float, high: float) -> float:
+        return high
+
+
+def _build_response(status_code: int, retry_after: str = None) -> HttpResponse:
+    headers = http.client.HTTPMessage()
+    if (retry_after is not None):
+        headers["Retry-After"] = retry_after
+
+    return HttpResponse("https://example.com/wiki/Aeia", status_code, headers, b"", 0, 0.1, False)
+
+
+def test_retry_after_in_seconds():
+    assert(_build_response(503, "120").get_retry_after_seconds(NOW) == 120)
+
+
+def test_retry_after_as_an_http_date():
+    assert(_build_response(503, "Thu, 01 Jan 2026 12:01:30 GMT").get_retry_after_seconds(NOW) == 90)
+    ## Dates that have already passed don't mean waiting backwards
+    assert(_build_response(503, "Thu, 01 Jan 2026 11:00:00 GMT").get_retry_after_seconds(NOW) == 0)
+
+
+def test_retry_after_missing_or_malformed():
+    assert(_build_response(503).get_retry_after_seconds(NOW) is None)
+    assert(_build_response(503, "soon").get_retry_after_seconds(NOW) is None)
+
+
+def test_retryable_failures():
+    retry_policy = RetryPolicy(3, 1, 4)
+
+    assert(retry_policy.is_retryable(HttpError(_build_response(503))))
+    assert(retry_policy.is_retryable(TimeoutError()))
+    assert(not retry_policy.is_retryable(HttpError(_build_response(404))))
+    assert(not retry_policy.is_retryable(ValueError()))
+
+
+def test_backoff_grows_exponentially_up_to_the_max():
+    retry_policy = RetryPolicy(5, 1, 4, random_source=_MaxRandom())
+    exception = HttpError(_build_response(503))
+
+    assert([retry_policy.get_delay_seconds(attempt, exception) for attempt in range(1, 5)] == [1, 2, 4, 4])
+
+
+def test_backoff_is_jittered_but_never_sooner_than_retry_after():
+    retry_policy = RetryPolicy(3, 1, 4)
+
+    for _ in range(100):
+        assert(0 <= retry_policy.get_delay_seconds(3, HttpError(_build_response(503))) <= 4)
+        assert(retry_policy.get_delay_seconds(3, HttpError(_build_response(503, "30"))) >= 30)
+
+
+def test_breaker_opens_at_the_threshold_and_closes_after_open_seconds():
+    clock = _FakeClock()
+    circuit_breaker = CircuitBreaker(0.5, 4, 4, 10, clock)
+
+    circuit_breaker.record_failure()
+    circuit_breaker.record_success()
+    circuit_breaker.record_failure()
+    ## Not enough requests to judge by yet
+    assert(not circuit_breaker.is_open)
+
+    circuit_breaker.record_success()
+    assert(not circuit_breaker.is_open)
+
+    ## Still 2 of the last 4
+    circuit_breaker.record_failure()
+    assert(circuit_breaker.is_open)
+    assert(circuit_breaker.trip_count == 1)
+
+    clock.now += 9.9
+    assert(circuit_breaker.is_open)
+    clock.now += 0.1
+    assert(not circuit_breaker.is_open)
+
+
+def test_breaker_window_slides():
+    clock = _FakeClock()
+    circuit_breaker = CircuitBreaker(0.5, 4, 4, 10, clock)
+
+    circuit_breaker.record_failure()
+    for _ in range(3):
+        circuit_breaker.record_success()
+
+    ## The first failure has slid out of the window, so this is only 1 of the last 4
+    circuit_breaker.record_failure()
+    assert(not circuit_breaker.is_open)
+
+    circuit_breaker.record_failure()
+    assert(circuit_breaker.is_open)
+
+
+def test_breaker_stays_open_for_retry_after_if_longer():
+    clock = _FakeClock()
+    circuit_breaker = CircuitBreaker(1, 1, 1, 10, clock)
+
+    circuit_breaker.record_failure(retry_after_seconds=30)
+
+    clock.now += 29
+    assert(circuit_breaker.is_open)
+    clock.now += 1
+    assert(not circuit_breaker.is_open)
+
+
+def test_breaker_ignores_failures_from_before_it_opened():
+    clock = _FakeClock()
+    circuit_breaker = CircuitBreaker(1, 2, 2, 10, clock)
+
+    circuit_breaker.record_failure()
+    circuit_breaker.record_failure()
+    ## Already in flight when the breaker opened
+    circuit_breaker.record_failure()
+    assert(circuit_breaker.trip_count == 1)
+
+    ## Starts over with a clean window once it closes
+    clock.now += 10
+    circuit_breaker.record_failure()
+    assert(not circuit_breaker.is_open)
+
+
+def test_deferred_planet_recovers_on_retry():
+    clock = _FakeClock()
+    retry_queue = RetryQueue(RetryPolicy(3, 1, 4, random_source=_MaxRandom()), clock, clock.sleep)
+    url = "https://example.com/wiki/Aeia"
+
+    assert(retry_queue.defer("Aeia", url, HttpError(_build_response(503, "5"))))
+    assert(len(retry_queue) == 1)
+
+    ## Waits out the Retry-After before handing the planet back
+    assert(retry_queue.pop_ready() == {"Aeia": url})
+    assert(clock.now == 1005)
+    assert(retry_queue.get_failed_attempts("Aeia") == 1)
+    assert(retry_queue.retry_count == 1)
+    assert(retry_queue.pop_ready() == {})
+
+
+def test_planet_is_given_up_on_once_out_of_attempts():
+    clock = _FakeClock()
+    retry_queue = RetryQueue(RetryPolicy(2, 1, 4, random_source=_MaxRandom()), clock, clock.sleep)
+    url = "https://example.com/wiki/Aeia"
+
+    assert(retry_queue.defer("Aeia", url, TimeoutError()))
+    retry_queue.pop_ready()
+    assert(not retry_queue.defer("Aeia", url, TimeoutError()))
+    assert(not retry_queue.defer("Akuze", url, HttpError(_build_response(404))))
+    assert(len(retry_queue) == 0)
@@ -0,0 +1,63 @@
+import json
+
+from storage.scrape_journal import ScrapeJournal
+
+## What a crash in the middle of writing an entry leaves behind
+TRUNCATED_ENTRY = '{"name": "Feros", "status": "bui'
+
+
+def _write_interrupted_journal(path):
+    with ScrapeJournal(path, 2).open() as scrape_journal:
+        scrape_journal.record_built("Aeia", {"name": "Aeia", "radius_km": 7437.0})
+        scrape_journal.record_rejected("Akuze")
+        scrape_journal.record_failed("Bekke", "https://example.com/wiki/Bekke", "HttpError(503)")
+        ## Only the latest entry for each planet counts
+        scrape_journal.record_built("Belan", {"name": "Belan"})
+        scrape_journal.record_failed("Belan", "https://example.com/wiki/Belan", "TimeoutError()")
+        scrape_journal.record_failed("Eden Prime", "https://example.com/wiki/Eden_Prime", "TimeoutError()")
+        scrape_journal.record_built("Eden Prime", {"name": "Eden Prime"})
+
+    with open(path, "a", encoding="utf-8") as fd:
+        fd.write(TRUNCATED_ENTRY)
+
+
+def test_completed_names_skip_failed_planets_and_the_partial_last_line(tmp_path):
+    path = tmp_path / "planet_journal.ndjson"
+    _write_interrupted_journal(path)
+
+    scrape_journal = ScrapeJournal(path, 2)
+
+    assert(scrape_journal.load_completed_names() == {"Aeia", "Akuze", "Eden Prime"})
+    assert(scrape_journal.load_entries()["Aeia"]["planet"] == {"name": "Aeia", "radius_km": 7437.0})
+
+
+def test_resuming_appends_after_the_partial_last_line(tmp_path):
+    path = tmp_path / "planet_journal.ndjson"
+    _write_interrupted_journal(path)
+
+    with ScrapeJournal(path, 2).open(resume=True) as scrape_journal:
+        scrape_journal.record_built("Bekke", {"name": "Bekke"})
+        scrape_journal.record_built("Feros", {"name": "Feros"})
+
+    lines = path.read_text(encoding="utf-8").split("\n")
+    ## The partial line is left on a line of its own, and every other line (including the new ones) is valid json
+    assert(lines[-1] == "")
+    assert(TRUNCATED_ENTRY in lines)
+    entries = [json.loads(line) for line in lines[:-1] if line != TRUNCATED_ENTRY]
+    assert([entry["name"] for entry in entries[-2:]] == ["Bekke", "Feros"])
+
+    assert(ScrapeJournal(path, 2).load_completed_names() == {"Aeia", "Akuze", "Bekke", "Eden Prime", "Feros"})
+
+
+def test_starting_over_clears_the_journal(tmp_path):
+    path = tmp_path / "planet_journal.ndjson"
+    _write_interrupted_journal(path)
+
+    with ScrapeJournal(path, 2).open() as scrape_journal:
+        scrape_journal.record_rejected("Akuze")
+
+    assert(ScrapeJournal(path, 2).load_entries() == {"Akuze": {"name": "Akuze", "status": ScrapeJournal.REJECTED}})
+
+
+def test_missing_journal_has_nothing_completed(tmp_path):
+    assert(ScrapeJournal(tmp_path / "planet_journal.ndjson", 2).load_completed_names() == set())
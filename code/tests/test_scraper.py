@@ -0,0 +1,26 @@
+import socket
+
+import pytest
+
+from networking.rate_limiter import RateLimiter
+from scrapers.scraper import Scraper
+
+
+class _TimingOutHttpClient:
+    def get(self, url: str, headers: dict):
+        raise socket.timeout("timed out")
+
+
+class _FetchingScraper(Scraper):
+    def scrape(self, name: str, url: str) -> bytes:
+        return self.fetch(url)
+
+
+def test_fetch_backs_off_when_the_request_times_out():
+    rate_limiter = RateLimiter(10, 1, 0.5, 2, 0.5, 0.05)
+    scraper = _FetchingScraper(_TimingOutHttpClient(), rate_limiter)
+
+    with pytest.raises(socket.timeout):
+        scraper.fetch("https://example.com/wiki/Aeia")
+
+    assert(rate_limiter.requests_per_second == 5)
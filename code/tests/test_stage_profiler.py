@@ -0,0 +1,38 @@
+import threading
+
+from profiling.stage_profiler import StageProfiler
+
+
+def test_sample_skips_overlapping_calls_across_threads():
+    profiler = StageProfiler(sample_every=1, trace_memory=False)
+    thread_count = 4
+    ## Holds every thread inside its sample, so they're all active at once
+    barrier = threading.Barrier(thread_count, timeout=10)
+    exceptions = []
+
+    def run():
+        try:
+            with profiler.sample("parse"):
+                barrier.wait()
+        except Exception as exception:
+            exceptions.append(exception)
+
+    threads = [threading.Thread(target=run) for _ in range(thread_count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert(exceptions == [])
+    ## Only the first of the overlapping calls gets profiled
+    assert(profiler.drain()["parse"][1] == 1)
+
+
+def test_sample_profiles_again_once_the_active_sample_is_done():
+    profiler = StageProfiler(sample_every=1, trace_memory=False)
+
+    for _ in range(3):
+        with profiler.sample("parse"):
+            sum(range(100))
+
+    assert(profiler.drain()["parse"][1] == 3)
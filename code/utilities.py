@@ -3,7 +3,9 @@
 import json
 import logging
 import datetime
+import functools
 import os
+import threading
 from pathlib import Path
 from logging.handlers import TimedRotatingFileHandler
 
@@ -94,8 +96,64 @@ def load_config(directory_path: Path = None) -> dict:
     return config
 
 
+@functools.cache
+def get_config() -> dict:
+    '''
+    Gets the program's configuration, which is only loaded (and parsed) the first time it's asked for. It's shared, so
+    copy it before making any changes.
+    '''
+
+    return load_config()
+
+
+## The log file's handler is shared by every logger, so the log file is only opened (and rotated) by one handler
+_log_handler: TimedRotatingFileHandler = None
+_log_handler_lock = threading.Lock()
+
+
+def _get_log_handler(config: dict, formatter: logging.Formatter, logger) -> TimedRotatingFileHandler:
+    global _log_handler
+
+    with _log_handler_lock:
+        if (_log_handler is not None):
+            return _log_handler
+
+        ## Get the directory containing the logs and make sure it exists, creating it if it doesn't
+        log_path = config.get("log_path")
+        if (log_path):
+            log_path = Path(log_path)
+        else:
+            log_path = Path.joinpath(get_root_path(), 'logs')
+
+        log_path.mkdir(parents=True, exist_ok=True)    # Basically a mkdir -p $log_path
+        log_file_name = f"{config.get('name', 'service')}.log"
+        log_file = Path(log_path, log_file_name)    # Build the true path to the log file
+
+        ## Windows has an issue with overwriting old logs (from the previous day, or older) automatically so just delete
+        ## them. This is hacky, but I only use Windows for development so it's not a big deal.
+        removed_previous_logs = False
+        if ('nt' in os.name and log_file.exists()):
+            last_modified = datetime.datetime.fromtimestamp(os.path.getmtime(log_file))
+            now = datetime.datetime.now()
+            if (last_modified.day != now.day):
+                os.remove(log_file)
+                removed_previous_logs = True
+
+        ## Setup the timed rotating log handler
+        backup_count = config.get("log_backup_count", 7)    # Store a week's logs then start overwriting them
+        _log_handler = TimedRotatingFileHandler(str(log_file), when='midnight', interval=1, backupCount=backup_count)
+        _log_handler.setFormatter(formatter)
+
+        ## With the new handler set up, let the user know if the previously used log file was removed.
+        if (removed_previous_logs):
+            logger.addHandler(_log_handler)
+            logger.info("Removed previous log file.")
+
+        return _log_handler
+
+
 def initialize_logging(logger):
-    config = load_config()
+    config = get_config()
 
     FORMAT = "%(asctime)s - %(module)s - %(funcName)s - %(levelname)s - %(message)s"
     formatter = logging.Formatter(FORMAT)
@@ -115,39 +173,9 @@ def initialize_logging(logger):
     else:
         logger.setLevel(logging.DEBUG)
 
-    ## Get the directory containing the logs and make sure it exists, creating it if it doesn't
-    log_path = config.get("log_path")
-    if (log_path):
-        log_path = Path(log_path)
-    else:
-        log_path = Path.joinpath(get_root_path(), 'logs')
-
-    log_path.mkdir(parents=True, exist_ok=True)    # Basically a mkdir -p $log_path
-    log_file_name = f"{CONFIG.get('name', 'service')}.log"
-    log_file = Path(log_path, log_file_name)    # Build the true path to the log file
-
-    ## Windows has an issue with overwriting old logs (from the previous day, or older) automatically so just delete
-    ## them. This is hacky, but I only use Windows for development so it's not a big deal.
-    removed_previous_logs = False
-    if ('nt' in os.name and log_file.exists()):
-        last_modified = datetime.datetime.fromtimestamp(os.path.getmtime(log_file))
-        now = datetime.datetime.now()
-        if (last_modified.day != now.day):
-            os.remove(log_file)
-            removed_previous_logs = True
-
-    ## Setup and add the timed rotating log handler to the logger
-    backup_count = config.get("log_backup_count", 7)    # Store a week's logs then start overwriting them
-    log_handler = TimedRotatingFileHandler(str(log_file), when='midnight', interval=1, backupCount=backup_count)
-    log_handler.setFormatter(formatter)
-    logger.addHandler(log_handler)
-
-    ## With the new logger set up, let the user know if the previously used log file was removed.
-    if (removed_previous_logs):
-        logger.info("Removed previous log file.")
+    ## Add the shared log handler to the logger, unless it's already been initialized
+    log_handler = _get_log_handler(config, formatter, logger)
+    if (log_handler not in logger.handlers):
+        logger.addHandler(log_handler)
 
     return logger
-
-
-## Load configuration to aid in logging setup
-CONFIG = load_config()